@@ -2,24 +2,43 @@
 from flask import Flask, jsonify
 # Importa a extensão Flask-CORS para lidar com a política de mesma origem do navegador
 from flask_cors import CORS 
+# Importa o click para definir comandos de CLI (flask ...)
+import click
+import threading
 
 # Importa a classe de configuração (Config) do módulo core.config
 from app.core.config import Config
 
 # Importa as instâncias das extensões (db, migrate, etc.) e o cliente qdrant
 from app.extensions import db, migrate, bcrypt, jwt, ma, qdrant 
-# Importa o cliente principal do Qdrant
-from qdrant_client import QdrantClient 
-# Importa modelos específicos do Qdrant para configuração de vetores
-from qdrant_client.http.models import VectorParams, Distance
-# Importa a biblioteca do Google Gemini
-import google.generativeai as genai
+# Importa o bootstrap (criação/reconciliação) da coleção de vetores
+from app.core.qdrant_bootstrap import bootstrap_collection, SCHEMA_VERSION
+# Configuração do Google Gemini (o SDK só é importado no primeiro uso)
+from app.core import genai
+# Tempo por etapa (Server-Timing e /metrics)
+from app.core import metrics
 
 # Importa os Blueprints (módulos de rotas) da aplicação
 from app.routers import auth
 from app.routers import tasks
 from app.routers import chat
 from app.routers import documents
+# Pool local de workers da fila de ingestão
+from app.services.ingestion_worker import ingestion_pool
+
+
+def run_bootstrap(app):
+    """Cria a coleção de vetores (ou ajusta a existente) conforme o esquema declarado. Retorna True se deu certo."""
+    with app.app_context():
+        try:
+            actions = bootstrap_collection(qdrant.client, app.config)
+            print(f"Coleção '{app.config['QDRANT_COLLECTION_NAME']}' verificada (esquema v{SCHEMA_VERSION}): {', '.join(actions) or 'sem mudanças'}.") # Log
+            return True
+        except Exception as e:
+            # Se for um erro (ex: falha de conexão, API key inválida), imprime o erro;
+            # a API continua no ar e o comando 'flask bootstrap-collection' pode ser rodado depois
+            print(f"ERRO ao inicializar Qdrant ou criar coleção: {e}")
+            return False
 
 # --- A FÁBRICA DE APLICAÇÃO (Application Factory Pattern) ---
 def create_app(config_class=Config):
@@ -44,15 +63,25 @@ def create_app(config_class=Config):
          # Define quais recursos (rotas, ex: "/*" para todas) usarão quais origens
          resources={r"/*": {"origins": origins}},
          # Permite que o navegador envie credenciais (como cookies ou tokens de autorização)
-         supports_credentials=True
+         supports_credentials=True,
+         # Headers de resposta que o front-end pode ler (cursor de paginação, ETag da lista de tarefas e tempos por etapa)
+         expose_headers=["X-Next-Cursor", "ETag", "Server-Timing"]
         )
     # --- Fim da configuração do CORS ---
     
     # 3. Carrega as configurações (chaves de API, URL do banco, etc.) do objeto de configuração
     app.config.from_object(config_class)
 
-    # 4. Configura a API do Google Gemini com a chave carregada do app.config
-    genai.configure(api_key=app.config['GOOGLE_API_KEY'])
+    # 4. Guarda a chave do Google Gemini (o SDK é configurado no primeiro uso)
+    genai.init_app(app)
+
+    # JSON das respostas com orjson, se instalado (mesma saída do provedor padrão)
+    if app.config['JSON_FAST_PROVIDER']:
+        try:
+            from app.core.json_provider import OrjsonProvider
+            app.json = OrjsonProvider(app)
+        except ImportError:
+            print("AVISO: orjson não instalado; usando o JSON padrão do Flask.")
 
     # 5. Inicializa as extensões do Flask, ligando-as à instância 'app'
     db.init_app(app) # Inicializa o SQLAlchemy (banco de dados)
@@ -61,35 +90,25 @@ def create_app(config_class=Config):
     jwt.init_app(app) # Inicializa o Flask-JWT-Extended (tokens JWT)
     ma.init_app(app) # Inicializa o Flask-Marshmallow (serialização/validação)
 
-    # Inicializa o Cliente Qdrant global com as configurações carregadas do app.config
-    global qdrant # Informa que estamos usando a variável global 'qdrant' (de extensions.py)
-    try:
-        # Tenta criar uma nova instância do cliente Qdrant
-        qdrant = QdrantClient(
-            host=app.config['QDRANT_HOST'], # Pega o host do Qdrant do config
-            api_key=app.config['QDRANT_API_KEY'], # Pega a API key do Qdrant do config
-            prefer_grpc=True # Usa gRPC para melhor performance, se disponível
-        )
-        print("Cliente Qdrant conectado.") # Log de sucesso
-        
-        # Tenta criar a coleção de vetores se ela ainda não existir
-        qdrant.create_collection(
-            collection_name=app.config['QDRANT_COLLECTION_NAME'], # Nome da coleção vindo do config
-            vectors_config=VectorParams( # Define a configuração dos vetores
-                size=768, # Tamanho do vetor (compatível com o modelo de embedding)
-                distance=Distance.COSINE # Métrica de distância (similaridade de cosseno)
-            )
-        )
-        print(f"Coleção '{app.config['QDRANT_COLLECTION_NAME']}' verificada/criada.") # Log
-    except Exception as e:
-        # Captura exceções durante a inicialização do Qdrant
-        # Verifica se o erro é apenas porque a coleção já existe (o que é esperado)
-        if "already exists" in str(e).lower():
-            print(f"Coleção '{app.config['QDRANT_COLLECTION_NAME']}' já existe.") # Log normal
-        else:
-            # Se for outro erro (ex: falha de conexão, API key inválida), imprime o erro
-            print(f"ERRO ao inicializar Qdrant ou criar coleção: {e}")
-            # Em produção, você poderia levantar o erro aqui ou ter um fallback
+    qdrant.init_app(app) # Inicializa o Qdrant (o cliente só é criado no primeiro uso, em cada processo)
+    metrics.init_app(app) # Server-Timing e GET /metrics (só com METRICS_ENABLED)
+
+    # O bootstrap da coleção não roda aqui (o boot não depende da rede):
+    # é feito por 'flask bootstrap-collection' ou, com QDRANT_BOOTSTRAP=background,
+    # uma vez por processo numa thread em segundo plano, na primeira requisição
+    if app.config['QDRANT_BOOTSTRAP'] == 'background':
+        bootstrap_lock = threading.Lock()
+        bootstrap_started = threading.Event()
+
+        @app.before_request
+        def start_background_bootstrap():
+            if bootstrap_started.is_set():
+                return
+            with bootstrap_lock:
+                if bootstrap_started.is_set():
+                    return
+                bootstrap_started.set()
+            threading.Thread(target=run_bootstrap, args=(app,), name="qdrant-bootstrap", daemon=True).start()
 
     # 6. Rota de Teste (Raiz da API)
     @app.route('/')
@@ -100,11 +119,65 @@ def create_app(config_class=Config):
             message="Bem-vindo à API Flask do Gênio Guiado, Chefe!"
         )
 
+    # Health check: verifica o Qdrant (e aquece a conexão deste worker)
+    @app.route('/health')
+    def health():
+        qdrant_status = qdrant.health_check()
+        status_code = 200 if qdrant_status["ok"] else 503
+        return jsonify(status="ok" if qdrant_status["ok"] else "degraded", qdrant=qdrant_status), status_code
+
     # 7. Registrar os Blueprints (módulos de rotas) na aplicação
     app.register_blueprint(auth.bp) # Registra rotas de autenticação (ex: /auth/guest)
     app.register_blueprint(tasks.bp) # Registra rotas de tarefas (ex: /tasks/)
     app.register_blueprint(chat.bp) # Registra rotas de chat (ex: /chat/send)
     app.register_blueprint(documents.bp) # Registra rotas de documentos (ex: /documents/upload)
     
-    # 8. Retorna a instância do app pronta para ser executada pelo Gunicorn/Render
+    # 8. Comando de CLI para rodar um worker de ingestão dedicado
+    # Uso: flask --app run ingestion-worker --workers 4
+    @app.cli.command("ingestion-worker")
+    @click.option("--workers", default=None, type=int, help="Número de threads do pool.")
+    def ingestion_worker(workers):
+        """Processa a fila de ingestão de documentos (bloqueia até Ctrl+C)."""
+        ingestion_pool.start(app, num_workers=workers)
+        try:
+            ingestion_pool.join()
+        except KeyboardInterrupt:
+            ingestion_pool.stop()
+
+    # Comando de CLI para criar/reconciliar a coleção de vetores (rodar no deploy)
+    # Uso: flask --app run bootstrap-collection
+    @app.cli.command("bootstrap-collection")
+    def bootstrap_collection_command():
+        """Cria a coleção no Qdrant ou ajusta a existente ao esquema declarado."""
+        if not run_bootstrap(app):
+            raise SystemExit(1)
+
+    # Comando de CLI para registrar documentos enviados antes da tabela 'documents'
+    # Uso: flask --app run backfill-documents
+    @app.cli.command("backfill-documents")
+    def backfill_documents():
+        """Cria no registro os documentos que só existem no Qdrant."""
+        from app.services import rag_service
+        created = rag_service.backfill_registry()
+        print(f"{created} documento(s) adicionados ao registro.")
+
+    # Comando de CLI para migrar os pontos antigos para o modo multi-tenant
+    # Uso: QDRANT_MULTITENANT=true flask --app run migrate-tenants
+    @app.cli.command("migrate-tenants")
+    def migrate_tenants():
+        """Grava o campo 'tenant' nos pontos do Qdrant que ainda não o têm."""
+        from app.services import rag_service
+        updated = rag_service.backfill_tenant_field()
+        print(f"{updated} ponto(s) migrados para o modo multi-tenant.")
+
+    # Comando de CLI para recriar a coleção no esquema atual (ex: busca híbrida)
+    # Uso: flask --app run rebuild-collection (com os workers de ingestão parados e sem uploads/remoções)
+    @app.cli.command("rebuild-collection")
+    def rebuild_collection():
+        """Copia os pontos para uma coleção nova com o esquema atual e troca o alias (pare as escritas antes)."""
+        from app.services import rag_service
+        copied = rag_service.rebuild_collection(app.config)
+        print(f"{copied} ponto(s) copiados para a nova coleção.")
+
+    # 9. Retorna a instância do app pronta para ser executada pelo Gunicorn/Render
     return app
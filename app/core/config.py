@@ -22,6 +22,12 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL')
     # Desativa um recurso do SQLAlchemy que não usaremos (reduz overhead)
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Serializa as respostas JSON com orjson (mesmos bytes do provedor padrão do Flask)
+    JSON_FAST_PROVIDER = os.environ.get('JSON_FAST_PROVIDER', 'true').lower() == 'true'
+    # Tempo por etapa: histogramas e contadores em GET /metrics (Prometheus) e header Server-Timing
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'false').lower() == 'true'
+    # Token exigido pelo GET /metrics (Authorization: Bearer <token>); sem ele a rota não existe
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
 
     # --- Configurações da IA ---
     # Carrega a chave do Gemini do .env
@@ -34,6 +40,120 @@ class Config:
     # JWT_ACCESS_TOKEN_EXPIRES = timedelta(minutes=30) 
     QDRANT_HOST = os.environ.get('QDRANT_HOST')
     QDRANT_API_KEY = os.environ.get('QDRANT_API_KEY')
+    # gRPC (padrão) ou HTTP, e prazo (s) de cada chamada ao Qdrant
+    QDRANT_PREFER_GRPC = os.environ.get('QDRANT_PREFER_GRPC', 'true').lower() == 'true'
+    QDRANT_TIMEOUT = int(os.environ.get('QDRANT_TIMEOUT', 10))
+    # Bootstrap da coleção: 'background' (uma vez por processo, em segundo plano,
+    # na primeira requisição) ou 'off' (só pelo comando 'flask bootstrap-collection')
+    QDRANT_BOOTSTRAP = os.environ.get('QDRANT_BOOTSTRAP', 'background').lower()
     QDRANT_COLLECTION_NAME = "g_guiado_docs"
+    # Dimensão dos vetores (a mesma do modelo de embedding)
+    EMBEDDING_DIM = 768
+    # Quantização dos vetores na coleção: 'none' ou 'int8' (escalar)
+    QDRANT_QUANTIZATION = os.environ.get('QDRANT_QUANTIZATION', 'none')
+    # Guarda vetores originais / payloads no disco em vez da RAM
+    QDRANT_VECTORS_ON_DISK = os.environ.get('QDRANT_VECTORS_ON_DISK', 'false').lower() == 'true'
+    QDRANT_PAYLOAD_ON_DISK = os.environ.get('QDRANT_PAYLOAD_ON_DISK', 'false').lower() == 'true'
+    # Particiona a coleção por usuário (índice de tenant + HNSW por tenant)
+    QDRANT_MULTITENANT = os.environ.get('QDRANT_MULTITENANT', 'false').lower() == 'true'
+
+    # --- Configurações do Pipeline de Ingestão (RAG) ---
+    # Tamanho e sobreposição (em caracteres) dos chunks gerados a partir do PDF
+    RAG_CHUNK_SIZE = int(os.environ.get('RAG_CHUNK_SIZE', 1000))
+    RAG_CHUNK_OVERLAP = int(os.environ.get('RAG_CHUNK_OVERLAP', 100))
+    # Quantos chunks são vetorizados e enviados ao Qdrant por vez (limita o pico de memória)
+    RAG_EMBED_BATCH_SIZE = int(os.environ.get('RAG_EMBED_BATCH_SIZE', 256))
+    # Extração paralela de texto do PDF: processos do pool (0 = um por CPU)
+    PDF_EXTRACT_WORKERS = int(os.environ.get('PDF_EXTRACT_WORKERS', 0))
+    # Abaixo deste número de páginas a extração fica no processo atual
+    PDF_PARALLEL_MIN_PAGES = int(os.environ.get('PDF_PARALLEL_MIN_PAGES', 64))
+    # Páginas por tarefa enviada ao pool
+    PDF_PAGES_PER_TASK = int(os.environ.get('PDF_PAGES_PER_TASK', 16))
+    # Busca híbrida: vetores esparsos BM25 (locais) + densos, combinados por RRF
+    RAG_HYBRID_SEARCH = os.environ.get('RAG_HYBRID_SEARCH', 'true').lower() == 'true'
+    # Candidatos buscados por cada lado (denso e esparso) antes da fusão
+    RAG_HYBRID_PREFETCH = int(os.environ.get('RAG_HYBRID_PREFETCH', 20))
+    # Parâmetros do BM25 (tamanho médio de um chunk em termos, saturação e normalização)
+    BM25_AVG_DOC_LEN = float(os.environ.get('BM25_AVG_DOC_LEN', 110))
+    BM25_K1 = float(os.environ.get('BM25_K1', 1.2))
+    BM25_B = float(os.environ.get('BM25_B', 0.75))
+    # Seleção do contexto: candidatos buscados antes do re-ranqueamento MMR
+    RAG_CANDIDATES = int(os.environ.get('RAG_CANDIDATES', 20))
+    # Peso da relevância vs diversidade no MMR (1.0 = só relevância)
+    RAG_MMR_LAMBDA = float(os.environ.get('RAG_MMR_LAMBDA', 0.7))
+    # Limites do número de chunks enviados ao modelo (escolhido pela distribuição dos scores)
+    RAG_MIN_CHUNKS = int(os.environ.get('RAG_MIN_CHUNKS', 1))
+    RAG_MAX_CHUNKS = int(os.environ.get('RAG_MAX_CHUNKS', 5))
+
+    # --- Configurações do Chat ---
+    # 'gemini' (padrão) ou 'fake' (modelo local com streaming simulado, para testes e benchmarks)
+    CHAT_PROVIDER = os.environ.get('CHAT_PROVIDER', 'gemini')
+    # Latências simuladas pelo modelo fake (s): até o primeiro token e entre tokens
+    FAKE_CHAT_FIRST_TOKEN_LATENCY = float(os.environ.get('FAKE_CHAT_FIRST_TOKEN_LATENCY', 0.0))
+    FAKE_CHAT_TOKEN_LATENCY = float(os.environ.get('FAKE_CHAT_TOKEN_LATENCY', 0.0))
+    # Gateway do modelo: prazo (s) de cada chamada e limite de chamadas simultâneas no processo
+    LLM_TIMEOUT = float(os.environ.get('LLM_TIMEOUT', 30.0))
+    LLM_MAX_CONCURRENCY = int(os.environ.get('LLM_MAX_CONCURRENCY', 16))
+    # Pedido "hedge": repete a chamada se a primeira passar do percentil recente (dobra o custo na cauda)
+    LLM_HEDGE_ENABLED = os.environ.get('LLM_HEDGE_ENABLED', 'false').lower() == 'true'
+    LLM_HEDGE_PERCENTILE = float(os.environ.get('LLM_HEDGE_PERCENTILE', 0.95))
+    # Atraso (s) do hedge enquanto ainda não há latências suficientes para o percentil
+    LLM_HEDGE_DELAY = float(os.environ.get('LLM_HEDGE_DELAY', 5.0))
+    # Disjuntor: falhas seguidas para abrir e tempo (s) aberto antes de testar de novo
+    LLM_BREAKER_FAILURES = int(os.environ.get('LLM_BREAKER_FAILURES', 5))
+    LLM_BREAKER_RESET_SECONDS = float(os.environ.get('LLM_BREAKER_RESET_SECONDS', 30.0))
+    # Orçamento de tokens (estimados localmente) da entrada enviada ao Gemini
+    CHAT_TOKEN_BUDGET = int(os.environ.get('CHAT_TOKEN_BUDGET', 8000))
+    # Fração do orçamento (depois da instrução de sistema e da pergunta) reservada ao contexto RAG;
+    # o que o contexto não usar fica para o histórico
+    CHAT_CONTEXT_SHARE = float(os.environ.get('CHAT_CONTEXT_SHARE', 0.4))
+    # Threads compartilhadas que buscam o contexto RAG em paralelo com a leitura do histórico (0 = em sequência)
+    CHAT_FANOUT_WORKERS = int(os.environ.get('CHAT_FANOUT_WORKERS', 8))
+    # Prazo (s) da busca do contexto RAG; estourado, o turno segue sem contexto
+    CHAT_RETRIEVAL_TIMEOUT = float(os.environ.get('CHAT_RETRIEVAL_TIMEOUT', 5.0))
+    # Mensagens mais recentes sempre enviadas na íntegra (o resto vira o resumo da sessão)
+    CHAT_HISTORY_WINDOW = int(os.environ.get('CHAT_HISTORY_WINDOW', 10))
+    # Mensagens fora da janela acumuladas antes de atualizar o resumo (uma chamada ao modelo por lote)
+    CHAT_SUMMARY_BATCH = int(os.environ.get('CHAT_SUMMARY_BATCH', 10))
+    # Threads que atualizam o resumo em segundo plano, fora da resposta (0 = na hora, no request)
+    CHAT_SUMMARY_WORKERS = int(os.environ.get('CHAT_SUMMARY_WORKERS', 2))
+
+    # --- Configurações do Cliente de Embeddings ---
+    # 'gemini' (padrão) ou 'fake' (vetores locais, para testes e benchmarks offline)
+    EMBEDDING_PROVIDER = os.environ.get('EMBEDDING_PROVIDER', 'gemini')
+    FAKE_EMBEDDING_LATENCY = float(os.environ.get('FAKE_EMBEDDING_LATENCY', 0.0))
+    # Limites de cada requisição à API (itens e caracteres somados)
+    EMBEDDING_BATCH_MAX_ITEMS = int(os.environ.get('EMBEDDING_BATCH_MAX_ITEMS', 64))
+    EMBEDDING_BATCH_MAX_CHARS = int(os.environ.get('EMBEDDING_BATCH_MAX_CHARS', 60000))
+    # Quantas requisições de embedding podem estar em andamento ao mesmo tempo no processo
+    EMBEDDING_MAX_CONCURRENCY = int(os.environ.get('EMBEDDING_MAX_CONCURRENCY', 4))
+    # Novas tentativas para erros transitórios (429, 503...) com backoff exponencial
+    EMBEDDING_MAX_RETRIES = int(os.environ.get('EMBEDDING_MAX_RETRIES', 5))
+
+    # --- Configurações do Cache de Embeddings (tabela embedding_cache) ---
+    EMBEDDING_CACHE_ENABLED = os.environ.get('EMBEDDING_CACHE_ENABLED', 'true').lower() == 'true'
+    # Número máximo de vetores guardados (cada um ocupa ~3 KB com 768 dimensões)
+    EMBEDDING_CACHE_MAX_ENTRIES = int(os.environ.get('EMBEDDING_CACHE_MAX_ENTRIES', 500000))
+    # A cada quantas inserções o tamanho do cache é verificado
+    EMBEDDING_CACHE_EVICT_EVERY = int(os.environ.get('EMBEDDING_CACHE_EVICT_EVERY', 1000))
+    # Um acerto só regrava o last_used_at (LRU) se ele tiver mais que isto (s): leituras quentes não escrevem
+    EMBEDDING_CACHE_TOUCH_SECONDS = int(os.environ.get('EMBEDDING_CACHE_TOUCH_SECONDS', 3600))
+
+    # --- Configurações do Cache de Embeddings de Perguntas (em memória, por processo) ---
+    QUERY_CACHE_MAX_ENTRIES = int(os.environ.get('QUERY_CACHE_MAX_ENTRIES', 2048))
+    QUERY_CACHE_TTL_SECONDS = float(os.environ.get('QUERY_CACHE_TTL_SECONDS', 3600))
+
+    # --- Configurações da Fila de Ingestão (uploads assíncronos) ---
+    # Pasta onde os uploads ficam guardados até o job terminar (disco local:
+    # a fila só funciona num único host, ou com esta pasta compartilhada)
+    INGESTION_UPLOAD_DIR = os.environ.get('INGESTION_UPLOAD_DIR', os.path.join(basedir, '..', '..', 'uploads'))
+    # Número de threads do pool local de ingestão em cada processo
+    INGESTION_WORKERS = int(os.environ.get('INGESTION_WORKERS', 2))
+    # Intervalo (s) de polling da fila quando não há jobs
+    INGESTION_POLL_INTERVAL = float(os.environ.get('INGESTION_POLL_INTERVAL', 2.0))
+    # Tempo (s) sem heartbeat para um job 'running' ser considerado abandonado
+    INGESTION_LEASE_SECONDS = int(os.environ.get('INGESTION_LEASE_SECONDS', 300))
+    # Tentativas antes de marcar o job como 'failed'
+    INGESTION_MAX_ATTEMPTS = int(os.environ.get('INGESTION_MAX_ATTEMPTS', 3))
 # Exporta uma instância da classe para ser usada no app
 settings = Config()
@@ -0,0 +1,29 @@
+# /app/core/genai.py
+
+import threading
+from app.core.config import settings
+from app.core.lazy import lazy_import
+
+_genai = lazy_import("google.generativeai")
+_api_key = None
+_configured = False
+_lock = threading.Lock()
+
+
+def init_app(app):
+    """Guarda a chave do Gemini do app; o SDK só é importado e configurado no primeiro uso."""
+    global _api_key, _configured
+    with _lock:
+        _api_key = app.config.get('GOOGLE_API_KEY')
+        _configured = False
+
+
+def get_genai():
+    """Retorna o SDK do Gemini (google.generativeai), já configurado com a chave da API."""
+    global _configured
+    if not _configured:
+        with _lock:
+            if not _configured:
+                _genai.configure(api_key=_api_key if _api_key is not None else settings.GOOGLE_API_KEY)
+                _configured = True
+    return _genai
@@ -0,0 +1,97 @@
+# /app/core/json_provider.py
+"""
+Provedor JSON do Flask com orjson (jsonify, request.get_json, etc.).
+
+Gera os mesmos bytes do provedor padrão do Flask: chaves ordenadas,
+saída compacta fora do modo debug, caracteres não ASCII como \\uXXXX
+(ensure_ascii) e datas no formato HTTP. Tipos que o orjson não serializa
+(ou valores que ele recusa, como inteiros acima de 64 bits) caem no
+json da biblioteca padrão. Diferenças conhecidas, só em floats: valores
+muito grandes ou muito pequenos podem ter o expoente escrito de outro
+jeito (1e16 em vez de 1e+16, com o mesmo valor) e NaN/Infinity viram null.
+
+Escapar os acentos (ensure_ascii) é a parte mais cara para textos em
+português; com app.json.ensure_ascii = False o JSON sai em UTF-8 direto.
+"""
+
+import codecs
+import orjson
+from flask.json.provider import DefaultJSONProvider
+
+# Trechos não ASCII já escapados (os mesmos acentos se repetem muito)
+_escaped_runs = {}
+
+
+def _escape_char(char):
+    code = ord(char)
+    if code > 0xFFFF:
+        # Fora do plano básico: par substituto, como o json padrão
+        code -= 0x10000
+        return "\\u%04x\\u%04x" % (0xD800 | (code >> 10), 0xDC00 | (code & 0x3FF))
+    return "\\u%04x" % code
+
+
+def _json_escape_errors(error):
+    """Tratador de erro do codec ascii: troca cada trecho não ASCII por \\uXXXX (como ensure_ascii)."""
+    run = error.object[error.start:error.end]
+    escaped = _escaped_runs.get(run)
+    if escaped is None:
+        escaped = "".join(_escape_char(char) for char in run)
+        if len(_escaped_runs) < 4096:
+            _escaped_runs[run] = escaped
+    return escaped, error.end
+
+
+codecs.register_error("json_escape", _json_escape_errors)
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """DefaultJSONProvider com dumps/loads feitos pelo orjson."""
+
+    def _option(self):
+        # Datas e dataclasses passam pelo self.default, como no provedor padrão.
+        # Chaves que não são texto fazem o orjson falhar e cair no json padrão,
+        # que as ordena antes de converter (2 antes de 10).
+        option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return option
+
+    def _dumps_bytes(self, obj):
+        """Serializa em bytes compactos, ou None se o orjson não conseguir."""
+        try:
+            data = orjson.dumps(obj, default=self.default, option=self._option())
+        except TypeError:
+            return None
+        if self.ensure_ascii:
+            if not data.isascii():
+                data = data.decode().encode("ascii", "json_escape")
+            if b"\x7f" in data:
+                # O json padrão também escapa o DEL
+                data = data.replace(b"\x7f", b"\\u007f")
+        return data
+
+    def dumps(self, obj, **kwargs):
+        # Só o formato compacto (o do jsonify) vai pelo orjson; os outros usam o json padrão
+        if kwargs == {"separators": (",", ":")}:
+            data = self._dumps_bytes(obj)
+            if data is not None:
+                return data.decode()
+        return super().dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        try:
+            return orjson.loads(s)
+        except orjson.JSONDecodeError:
+            # Mesmas regras e mensagens de erro do json padrão (ex: NaN, que o orjson recusa)
+            return super().loads(s)
+
+    def response(self, *args, **kwargs):
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            return super().response(*args, **kwargs)
+        data = self._dumps_bytes(self._prepare_response_obj(args, kwargs))
+        if data is None:
+            return super().response(*args, **kwargs)
+        return self._app.response_class(data + b"\n", mimetype=self.mimetype)
@@ -0,0 +1,32 @@
+# /app/core/lazy.py
+
+import importlib
+import types
+
+
+class LazyModule(types.ModuleType):
+    """
+    Módulo importado só no primeiro acesso a um atributo.
+    Usado para dependências pesadas (SDK do Gemini, qdrant-client, pypdf,
+    langchain) que só alguns caminhos do código usam: importar o app fica
+    rápido e cada worker só paga o import do que de fato executar.
+    """
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__["_module"] = None
+
+    def _load(self):
+        module = self.__dict__["_module"]
+        if module is None:
+            module = importlib.import_module(self.__name__)
+            self.__dict__["_module"] = module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+
+def lazy_import(name: str):
+    """Ex: models = lazy_import("qdrant_client.models") — o import acontece em models.X."""
+    return LazyModule(name)
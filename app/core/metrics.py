@@ -0,0 +1,238 @@
+# /app/core/metrics.py
+"""
+Medição do tempo de cada etapa das requisições (e da ingestão), com
+histogramas e contadores no formato do Prometheus em GET /metrics e o
+header Server-Timing nas respostas.
+
+Uso nos serviços:
+    with metrics.stage("llm"):
+        ...
+    @metrics.timed("commit")
+    def ...
+    for page in metrics.timed_iter("pdf_parse", pages):
+        ...
+    metrics.count("cache_hits_total", cache="query")
+
+Cada execução de uma etapa é uma observação no histograma
+gguiado_stage_seconds{stage=...}. Dentro de uma requisição, a duração
+também entra no Server-Timing (somada, se a etapa rodar mais de uma vez).
+Threads auxiliares só contam para o Server-Timing se rodarem no contexto
+copiado da requisição (contextvars.copy_context), como a busca RAG do chat.
+
+Com METRICS_ENABLED=false (padrão) nada é registrado: stage() devolve um
+context manager vazio já criado e count() retorna na hora. Os valores são
+por processo (cada worker do gunicorn tem os seus); o Prometheus soma.
+
+GET /metrics só existe com METRICS_TOKEN definido e exige o header
+"Authorization: Bearer <token>" (no Prometheus: 'authorization' do scrape).
+"""
+
+import bisect
+import contextvars
+import functools
+import hmac
+import threading
+import time
+from contextlib import nullcontext
+
+PREFIX = "gguiado_"
+# Limites (s) dos buckets dos histogramas: de 1 ms até 30 s
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_enabled = False
+_noop = nullcontext()
+_lock = threading.Lock()
+# (nome, labels ordenados) -> [contagens por bucket..., +Inf, soma]
+_histograms = {}
+# (nome, labels ordenados) -> valor
+_counters = {}
+# Durações das etapas da requisição atual: {etapa: segundos}
+_request_timings = contextvars.ContextVar("request_timings", default=None)
+
+
+def enabled():
+    return _enabled
+
+
+def _label_key(labels):
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def observe(name: str, seconds: float, **labels):
+    """Registra uma duração (s) no histograma 'name'."""
+    if not _enabled:
+        return
+    index = bisect.bisect_left(BUCKETS, seconds)
+    key = (name, _label_key(labels))
+    with _lock:
+        values = _histograms.get(key)
+        if values is None:
+            values = _histograms[key] = [0] * (len(BUCKETS) + 1) + [0.0]
+        values[index] += 1
+        values[-1] += seconds
+
+
+def count(name: str, value=1, **labels):
+    """Soma 'value' ao contador 'name' (ex: count("cache_hits_total", cache="query"))."""
+    if not _enabled:
+        return
+    key = (name, _label_key(labels))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def record_stage(name: str, seconds: float):
+    """Registra a duração de uma etapa no histograma e no Server-Timing da requisição atual."""
+    observe("stage_seconds", seconds, stage=name)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings[name] = timings.get(name, 0.0) + seconds
+
+
+class _Stage:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record_stage(self.name, time.perf_counter() - self.start)
+        return False
+
+
+def stage(name: str):
+    """Context manager que mede uma etapa (mesmo se ela terminar com exceção)."""
+    if not _enabled:
+        return _noop
+    return _Stage(name)
+
+
+def timed(name: str):
+    """Decorador: mede cada chamada da função como a etapa 'name'."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            with _Stage(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def timed_iter(name: str, iterable):
+    """Mede o tempo para produzir cada item de um iterável (ex: páginas de um PDF) como a etapa 'name'."""
+    if not _enabled:
+        return iterable
+    return _timed_iter(name, iter(iterable))
+
+
+def _timed_iter(name, iterator):
+    while True:
+        start = time.perf_counter()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            return
+        record_stage(name, time.perf_counter() - start)
+        yield item
+
+
+def _format_labels(labels, extra=()):
+    pairs = [*labels, *extra]
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + "}"
+
+
+def render():
+    """Texto no formato de exposição do Prometheus (versão 0.0.4)."""
+    with _lock:
+        histograms = {key: list(values) for key, values in _histograms.items()}
+        counters = dict(_counters)
+
+    lines = []
+    for metric_type, series in (("histogram", histograms), ("counter", counters)):
+        for name in sorted({name for name, _ in series}):
+            full_name = PREFIX + name
+            lines.append(f"# TYPE {full_name} {metric_type}")
+            for (series_name, labels), values in sorted(series.items(), key=lambda item: item[0][1]):
+                if series_name != name:
+                    continue
+                if metric_type == "counter":
+                    lines.append(f"{full_name}{_format_labels(labels)} {values}")
+                    continue
+                cumulative = 0
+                for bound, bucket in zip((*BUCKETS, "+Inf"), values):
+                    cumulative += bucket
+                    lines.append(f"{full_name}_bucket{_format_labels(labels, (('le', bound),))} {cumulative}")
+                lines.append(f"{full_name}_sum{_format_labels(labels)} {values[-1]}")
+                lines.append(f"{full_name}_count{_format_labels(labels)} {cumulative}")
+    return "\n".join(lines) + "\n"
+
+
+def reset():
+    """Zera histogramas e contadores (benchmarks)."""
+    with _lock:
+        _histograms.clear()
+        _counters.clear()
+
+
+def _server_timing(timings, total):
+    entries = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in timings.items()]
+    entries.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(entries)
+
+
+def init_app(app):
+    """
+    Liga a medição (METRICS_ENABLED): a duração de cada requisição vira o
+    histograma http_request_seconds, as etapas vão para o Server-Timing e
+    a rota GET /metrics (protegida por METRICS_TOKEN) expõe tudo.
+    Desligada, nenhum hook é registrado.
+    """
+    global _enabled
+    _enabled = bool(app.config.get('METRICS_ENABLED'))
+    if not _enabled:
+        return
+
+    from flask import g, jsonify, request
+
+    @app.before_request
+    def start_request_timing():
+        g.metrics_start = time.perf_counter()
+        g.metrics_timings = {}
+        _request_timings.set(g.metrics_timings)
+
+    @app.after_request
+    def finish_request_timing(response):
+        start = g.pop('metrics_start', None)
+        if start is None:
+            return response
+        total = time.perf_counter() - start
+        timings = g.pop('metrics_timings')
+        _request_timings.set(None)
+        observe(
+            "http_request_seconds", total,
+            endpoint=request.endpoint or "desconhecido", method=request.method, status=response.status_code
+        )
+        if request.endpoint != 'metrics':
+            response.headers['Server-Timing'] = _server_timing(timings, total)
+        return response
+
+    token = app.config.get('METRICS_TOKEN')
+    if not token:
+        print("AVISO: METRICS_TOKEN não definido; GET /metrics desativado (o Server-Timing continua).")
+        return
+
+    @app.route('/metrics')
+    def metrics():
+        expected = f"Bearer {token}".encode()
+        if not hmac.compare_digest(request.headers.get('Authorization', '').encode(), expected):
+            return jsonify(error="Não autorizado"), 401, {"WWW-Authenticate": "Bearer"}
+        return render(), 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
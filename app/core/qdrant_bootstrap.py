@@ -0,0 +1,202 @@
+# /app/core/qdrant_bootstrap.py
+"""
+Esquema declarado da coleção de vetores no Qdrant.
+
+'bootstrap_collection' cria a coleção se ela não existir ou, se já existir,
+reconcilia a configuração dela com o esquema declarado aqui (índices de
+payload, quantização e armazenamento em disco). A versão do esquema fica
+gravada nos metadados da coleção.
+
+Com QDRANT_MULTITENANT=true a coleção é particionada por usuário (índice
+de tenant + HNSW por tenant). Para migrar uma coleção existente, basta
+rodar o bootstrap com a flag ligada (ele reconcilia índices e HNSW) e
+rodar 'flask migrate-tenants' para gravar o campo 'tenant' nos pontos antigos.
+
+A busca híbrida precisa do vetor esparso 'bm25', que só pode ser definido
+na criação da coleção. Coleções antigas são migradas com
+'flask rebuild-collection' (cópia para uma nova coleção + alias).
+
+O bootstrap não roda no create_app: é executado por 'flask
+bootstrap-collection' (deploy) ou, com QDRANT_BOOTSTRAP=background, uma
+vez por processo em segundo plano, na primeira requisição.
+"""
+
+from app.core.lazy import lazy_import
+
+# O qdrant-client só é importado quando o esquema é de fato usado
+models = lazy_import("qdrant_client.models")
+
+# Suba esta versão sempre que mudar o esquema declarado abaixo
+SCHEMA_VERSION = 3
+
+# Vetor esparso (BM25) usado na busca híbrida; o IDF é calculado pelo Qdrant
+SPARSE_VECTOR_NAME = "bm25"
+
+
+def _sparse_vectors_config():
+    return {SPARSE_VECTOR_NAME: models.SparseVectorParams(modifier=models.Modifier.IDF)}
+
+
+def _payload_indexes(config):
+    """
+    Campos do payload usados em filtros (busca, scroll, delete e deduplicação).
+
+    Modo multi-tenant: o campo 'tenant' (user_id como texto) ganha um índice
+    is_tenant e o HNSW passa a ser construído por tenant (payload_m) em vez de
+    um grafo global (m=0). Os outros campos não geram grafos próprios.
+    """
+    if config['QDRANT_MULTITENANT']:
+        return {
+            "tenant": models.KeywordIndexParams(type=models.KeywordIndexType.KEYWORD, is_tenant=True),
+            "user_id": models.IntegerIndexParams(type=models.IntegerIndexType.INTEGER, lookup=True, range=False, enable_hnsw=False),
+            "doc_name": models.KeywordIndexParams(type=models.KeywordIndexType.KEYWORD, enable_hnsw=False),
+            "content_hash": models.KeywordIndexParams(type=models.KeywordIndexType.KEYWORD, enable_hnsw=False),
+            "complete": models.BoolIndexParams(type=models.BoolIndexType.BOOL, enable_hnsw=False),
+        }
+    return {
+        "user_id": models.PayloadSchemaType.INTEGER,
+        "doc_name": models.PayloadSchemaType.KEYWORD,
+        "content_hash": models.PayloadSchemaType.KEYWORD,
+        "complete": models.PayloadSchemaType.BOOL,
+    }
+
+
+def _hnsw_config(config):
+    if config['QDRANT_MULTITENANT']:
+        return models.HnswConfigDiff(m=0, payload_m=16)
+    return models.HnswConfigDiff(m=16)
+
+
+def _index_matches(existing, wanted):
+    """Confere se um índice existente tem o tipo e as opções declaradas."""
+    wanted_type = wanted if isinstance(wanted, models.PayloadSchemaType) else wanted.type
+    if existing.data_type.value != wanted_type.value:
+        return False
+    if isinstance(wanted, models.PayloadSchemaType):
+        return True
+    for option in ("is_tenant", "enable_hnsw"):
+        wanted_value = getattr(wanted, option, None)
+        if wanted_value is not None and getattr(existing.params, option, None) != wanted_value:
+            return False
+    return True
+
+
+def _quantization_config(config):
+    """Quantização escalar int8 (4x menos RAM para os vetores) se QDRANT_QUANTIZATION='int8'."""
+    if config['QDRANT_QUANTIZATION'] != 'int8':
+        return None
+    return models.ScalarQuantization(
+        scalar=models.ScalarQuantizationConfig(
+            type=models.ScalarType.INT8,
+            quantile=0.99, # Ignora os 1% de valores extremos ao calcular a escala
+            always_ram=True # Os vetores quantizados ficam na RAM; os originais podem ir para o disco
+        )
+    )
+
+
+def _create(client, name: str, config):
+    client.create_collection(
+        collection_name=name,
+        vectors_config=models.VectorParams(
+            size=config['EMBEDDING_DIM'], # Tamanho do vetor (compatível com o modelo de embedding)
+            distance=models.Distance.COSINE, # Métrica de distância (similaridade de cosseno)
+            on_disk=config['QDRANT_VECTORS_ON_DISK']
+        ),
+        on_disk_payload=config['QDRANT_PAYLOAD_ON_DISK'],
+        quantization_config=_quantization_config(config),
+        sparse_vectors_config=_sparse_vectors_config(),
+        hnsw_config=_hnsw_config(config),
+        metadata={"schema_version": SCHEMA_VERSION}
+    )
+
+
+def _reconcile(client, name: str, config, actions: list):
+    """Ajusta uma coleção existente para o esquema declarado."""
+    info = client.get_collection(name)
+    params = info.config.params
+    vectors = params.vectors
+
+    if vectors.size != config['EMBEDDING_DIM']:
+        # Mudar a dimensão exige recriar a coleção (e revetorizar tudo)
+        raise Exception(
+            f"A coleção '{name}' tem vetores de tamanho {vectors.size}, "
+            f"mas o esperado é {config['EMBEDDING_DIM']}."
+        )
+
+    if bool(vectors.on_disk) != config['QDRANT_VECTORS_ON_DISK']:
+        client.update_collection(
+            collection_name=name,
+            vectors_config={"": models.VectorParamsDiff(on_disk=config['QDRANT_VECTORS_ON_DISK'])}
+        )
+        actions.append(f"vectors.on_disk={config['QDRANT_VECTORS_ON_DISK']}")
+
+    if bool(params.on_disk_payload) != config['QDRANT_PAYLOAD_ON_DISK']:
+        client.update_collection(
+            collection_name=name,
+            collection_params=models.CollectionParamsDiff(on_disk_payload=config['QDRANT_PAYLOAD_ON_DISK'])
+        )
+        actions.append(f"on_disk_payload={config['QDRANT_PAYLOAD_ON_DISK']}")
+
+    wanted_quantization = _quantization_config(config)
+    current_quantization = info.config.quantization_config
+    if wanted_quantization is None and current_quantization is not None:
+        client.update_collection(collection_name=name, quantization_config=models.Disabled.DISABLED)
+        actions.append("quantization=off")
+    elif wanted_quantization is not None and current_quantization is None:
+        client.update_collection(collection_name=name, quantization_config=wanted_quantization)
+        actions.append("quantization=int8")
+
+    wanted_hnsw = _hnsw_config(config)
+    current_hnsw = info.config.hnsw_config
+    if current_hnsw.m != wanted_hnsw.m or (wanted_hnsw.payload_m is not None and current_hnsw.payload_m != wanted_hnsw.payload_m):
+        # O Qdrant reconstrói os grafos HNSW em segundo plano
+        client.update_collection(collection_name=name, hnsw_config=wanted_hnsw)
+        actions.append(f"hnsw m={wanted_hnsw.m} payload_m={wanted_hnsw.payload_m}")
+
+    # Vetores esparsos não podem ser adicionados a uma coleção existente:
+    # é preciso recriá-la ('flask rebuild-collection'). Até lá a busca fica só densa.
+    if SPARSE_VECTOR_NAME not in (params.sparse_vectors or {}):
+        print(f"AVISO: a coleção '{name}' não tem o vetor esparso '{SPARSE_VECTOR_NAME}'; "
+              "a busca híbrida fica desligada até rodar 'flask rebuild-collection'.")
+        return info.payload_schema or {}
+
+    current_version = (info.config.metadata or {}).get("schema_version")
+    if current_version != SCHEMA_VERSION:
+        client.update_collection(collection_name=name, metadata={"schema_version": SCHEMA_VERSION})
+        actions.append(f"schema_version {current_version} -> {SCHEMA_VERSION}")
+
+    return info.payload_schema or {}
+
+
+def bootstrap_collection(client, config):
+    """
+    Garante que a coleção existe e segue o esquema declarado.
+    'config' é o app.config (ou qualquer mapeamento com as mesmas chaves).
+    Retorna a lista de ações executadas (vazia se já estava tudo em dia).
+    """
+    name = config['QDRANT_COLLECTION_NAME']
+    actions = []
+
+    if not client.collection_exists(name):
+        _create(client, name, config)
+        actions.append("created")
+        existing_indexes = {}
+    else:
+        existing_indexes = _reconcile(client, name, config, actions)
+
+    # Cria os índices de payload que faltam (e recria os que mudaram de opções)
+    for field_name, field_schema in _payload_indexes(config).items():
+        existing = existing_indexes.get(field_name)
+        if existing is not None and _index_matches(existing, field_schema):
+            continue
+        if existing is not None:
+            client.delete_payload_index(collection_name=name, field_name=field_name, wait=True)
+        client.create_payload_index(
+            collection_name=name,
+            field_name=field_name,
+            field_schema=field_schema,
+            wait=True
+        )
+        actions.append(f"index {field_name}")
+
+    return actions
@@ -6,7 +6,9 @@ from flask_migrate import Migrate
 from flask_bcrypt import Bcrypt
 from flask_jwt_extended import JWTManager
 from flask_marshmallow import Marshmallow
-from qdrant_client import QdrantClient
+import os
+import threading
+import time
 # Cria instâncias vazias das extensões
 # Elas não estão ligadas a nenhum app Flask... ainda.
 # Elas serão "ligadas" na nossa fábrica de app.
@@ -16,5 +18,92 @@ bcrypt = Bcrypt()
 jwt = JWTManager()
 ma = Marshmallow()
 
-qdrant = QdrantClient(prefer_grpc=True)
+
+class FlaskQdrant:
+    """
+    Extensão do cliente Qdrant no mesmo molde das outras (init_app).
+
+    O cliente não é criado no import nem no create_app: nasce no primeiro
+    uso, dentro do processo que vai usá-lo. Assim cada worker do gunicorn
+    (depois do fork) tem o seu próprio cliente e o seu próprio canal gRPC,
+    reutilizado por todas as requisições e threads do processo. Se o PID
+    mudar (fork depois do primeiro uso), um cliente novo é criado e o
+    herdado é descartado sem ser usado.
+
+    Os métodos do QdrantClient são acessíveis direto pela extensão
+    (qdrant.query_points(...)), então quem faz 'from app.extensions import
+    qdrant' sempre enxerga o cliente certo.
+    """
+
+    def __init__(self, app=None):
+        self._config = None
+        self._client = None
+        self._pid = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self._config = {
+            key: app.config.get(key)
+            for key in ("QDRANT_HOST", "QDRANT_API_KEY", "QDRANT_PREFER_GRPC", "QDRANT_TIMEOUT")
+        }
+        app.extensions["qdrant"] = self
+
+    def _settings(self):
+        if self._config is not None:
+            return self._config
+        # Uso fora de um app (scripts, benchmarks): lê direto da configuração
+        from app.core.config import settings
+        return {key: getattr(settings, key) for key in ("QDRANT_HOST", "QDRANT_API_KEY", "QDRANT_PREFER_GRPC", "QDRANT_TIMEOUT")}
+
+    def _create_client(self):
+        # Import tardio: o qdrant-client é pesado e só os caminhos que usam o Qdrant pagam por ele
+        from qdrant_client import QdrantClient
+
+        config = self._settings()
+        if config["QDRANT_HOST"] == ":memory:":
+            # Modo local em memória (testes)
+            return QdrantClient(":memory:")
+        return QdrantClient(
+            host=config["QDRANT_HOST"],
+            api_key=config["QDRANT_API_KEY"],
+            prefer_grpc=config["QDRANT_PREFER_GRPC"], # gRPC para melhor performance, se disponível
+            timeout=config["QDRANT_TIMEOUT"],
+        )
+
+    @property
+    def client(self):
+        """Cliente do processo atual (criado no primeiro uso)."""
+        pid = os.getpid()
+        if self._client is None or self._pid != pid:
+            with self._lock:
+                if self._client is None or self._pid != pid:
+                    self._client = self._create_client()
+                    self._pid = pid
+        return self._client
+
+    def set_client(self, client):
+        """Troca o cliente do processo (ex: QdrantClient(':memory:') em testes)."""
+        with self._lock:
+            self._client = client
+            self._pid = os.getpid()
+
+    def health_check(self):
+        """Faz uma chamada leve ao Qdrant e retorna {'ok', 'latency_ms', 'error'}."""
+        start = time.perf_counter()
+        try:
+            self.client.get_collections()
+            return {"ok": True, "latency_ms": round((time.perf_counter() - start) * 1000, 1), "error": None}
+        except Exception as e:
+            return {"ok": False, "latency_ms": round((time.perf_counter() - start) * 1000, 1), "error": str(e)}
+
+    def __getattr__(self, name):
+        # Só é chamado para atributos que a extensão não tem: repassa ao cliente
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.client, name)
+
+
+qdrant = FlaskQdrant()
 
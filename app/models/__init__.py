@@ -2,3 +2,7 @@ from app.extensions import db
 from .user_model import User
 from .task_model import Task
 from .chat_history_model import ChatHistory
+from .ingestion_job_model import IngestionJob
+from .embedding_cache_model import EmbeddingCache
+from .document_model import Document
+from .chat_summary_model import ChatSummary
@@ -4,10 +4,16 @@ import datetime
 
 class ChatHistory(db.Model):
     __tablename__ = "chat_histories"
+    # Busca e paginação das mensagens de uma sessão (filtro + ordenação pelo índice).
+    # Toda consulta filtra por user_id e session_id, então este índice também
+    # substitui o antigo índice só em session_id.
+    __table_args__ = (
+        db.Index('ix_chat_histories_user_id_session_id_id', 'user_id', 'session_id', 'id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     # session_id permite agrupar mensagens da mesma conversa
-    session_id = db.Column(db.String(100), nullable=False, index=True)
+    session_id = db.Column(db.String(100), nullable=False)
     role = db.Column(db.String(10), nullable=False) # 'user' ou 'model'
     message = db.Column(db.Text, nullable=False)
     timestamp = db.Column(db.DateTime, default=datetime.datetime.utcnow)
@@ -0,0 +1,29 @@
+# /app/models/chat_summary_model.py
+from app.extensions import db
+import datetime
+
+class ChatSummary(db.Model):
+    """
+    Resumo acumulado de uma sessão de chat.
+    As mensagens até 'last_message_id' (inclusive) estão resumidas em
+    'summary'; só as posteriores são enviadas ao modelo na íntegra.
+    """
+    __tablename__ = "chat_summaries"
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'session_id', name='uq_chat_summaries_user_id_session_id'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    session_id = db.Column(db.String(100), nullable=False)
+    summary = db.Column(db.Text, nullable=False, default="")
+    # Última mensagem (chat_histories.id) incorporada ao resumo
+    last_message_id = db.Column(db.Integer, nullable=False, default=0)
+    # Quantas mensagens já foram resumidas
+    message_count = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
+
+    # Chave Estrangeira
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+
+    def __repr__(self):
+        return f'<ChatSummary {self.session_id} até {self.last_message_id}>'
@@ -0,0 +1,30 @@
+# /app/models/document_model.py
+from app.extensions import db
+import datetime
+
+class Document(db.Model):
+    """
+    Registro dos documentos enviados por cada usuário.
+    Os chunks e vetores continuam no Qdrant; esta tabela guarda um resumo
+    por documento, para listar sem varrer os pontos da coleção.
+    """
+    __tablename__ = "documents"
+    # (user_id, name) é único e serve para filtrar e ordenar a listagem
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'name', name='uq_documents_user_id_name'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(255), nullable=False)
+    # SHA-256 do arquivo (nulo para documentos anteriores ao registro)
+    content_hash = db.Column(db.String(64), nullable=True, index=True)
+    chunk_count = db.Column(db.Integer, nullable=False, default=0)
+    byte_size = db.Column(db.BigInteger, nullable=True)
+    page_count = db.Column(db.Integer, nullable=True)
+    uploaded_at = db.Column(db.DateTime, default=datetime.datetime.utcnow)
+
+    # Chave Estrangeira
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+
+    def __repr__(self):
+        return f'<Document {self.name}>'
@@ -0,0 +1,24 @@
+# /app/models/embedding_cache_model.py
+from app.extensions import db
+import datetime
+
+class EmbeddingCache(db.Model):
+    """
+    Cache persistente de embeddings de chunks.
+    A chave é o SHA-256 de (modelo, task_type, dimensão, texto), então o
+    mesmo trecho enviado por qualquer usuário reaproveita o mesmo vetor.
+    """
+    __tablename__ = "embedding_cache"
+
+    key = db.Column(db.String(64), primary_key=True)
+    model = db.Column(db.String(100), nullable=False)
+    task_type = db.Column(db.String(50), nullable=False)
+    dimension = db.Column(db.Integer, nullable=False)
+    # Vetor serializado como float32 (4 bytes por dimensão)
+    embedding = db.Column(db.LargeBinary, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.datetime.utcnow)
+    # Usado pela política de expulsão (LRU): os menos usados saem primeiro
+    last_used_at = db.Column(db.DateTime, default=datetime.datetime.utcnow, index=True)
+
+    def __repr__(self):
+        return f'<EmbeddingCache {self.key[:12]}>'
@@ -0,0 +1,47 @@
+# /app/models/ingestion_job_model.py
+from app.extensions import db
+import datetime
+import uuid
+
+class IngestionJob(db.Model):
+    """
+    Um trabalho de ingestão de documento (upload assíncrono).
+    A tabela funciona como fila: os workers pegam os jobs 'queued' (ou
+    'running' com heartbeat vencido, caso um worker tenha morrido no meio).
+    """
+    __tablename__ = "ingestion_jobs"
+
+    # Estados possíveis de um job
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    doc_name = db.Column(db.String(255), nullable=False)
+    # Caminho do arquivo salvo em disco até o job terminar
+    file_path = db.Column(db.String(512), nullable=False)
+    # SHA-256 do arquivo (para não enfileirar o mesmo conteúdo duas vezes)
+    content_hash = db.Column(db.String(64), nullable=True, index=True)
+    status = db.Column(db.String(20), nullable=False, default=QUEUED, index=True)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+
+    # --- Progresso ---
+    pages_parsed = db.Column(db.Integer, nullable=False, default=0)
+    chunks_embedded = db.Column(db.Integer, nullable=False, default=0)
+    chunks_stored = db.Column(db.Integer, nullable=False, default=0)
+
+    # --- Resultado ---
+    result = db.Column(db.Text, nullable=True)
+    error = db.Column(db.Text, nullable=True)
+
+    created_at = db.Column(db.DateTime, default=datetime.datetime.utcnow)
+    # Atualizado a cada lote processado; serve de heartbeat para o lease
+    updated_at = db.Column(db.DateTime, default=datetime.datetime.utcnow)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    # Chave Estrangeira
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+
+    def __repr__(self):
+        return f'<IngestionJob {self.id} {self.status}>'
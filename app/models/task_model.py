@@ -4,7 +4,11 @@ import datetime
 
 class Task(db.Model):
     __tablename__ = "tasks"
-    
+    # Listagem paginada das tarefas do usuário (filtro + ordenação pelo índice)
+    __table_args__ = (
+        db.Index('ix_tasks_user_id_created_at_id', 'user_id', 'created_at', 'id'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     content = db.Column(db.Text, nullable=False)
     is_completed = db.Column(db.Boolean, default=False, nullable=False)
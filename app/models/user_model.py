@@ -15,6 +15,8 @@ class User(db.Model):
     password_hash = db.Column(db.String(128), nullable=True)# Senha criptografada
     is_guest = db.Column(db.Boolean, default=True, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.datetime.utcnow) # Data de criação
+    # Versão da lista de tarefas: sobe a cada mudança nas tarefas do usuário (ETag do GET /tasks/)
+    tasks_version = db.Column(db.Integer, default=0, server_default='0', nullable=False)
 
     # --- Relacionamentos ---
     # Define a relação "um-para-muitos" com Tarefas e Histórico
@@ -1,7 +1,7 @@
 from flask import Blueprint, request, jsonify # Importa Blueprint, request, jsonify do Flask
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity # Importa create_access_token, jwt_required, get_jwt_identity do flask_jwt_extended
 from app.services import user_service # Importa o user_service
-from app.schemas.user_schema import user_schema # Importa o user_schema
+from app.schemas.user_schema import user_serializer # Serializador do usuário (mesma saída do user_schema)
 from marshmallow import ValidationError # Importa o ValidationError do marshmallow
 
 # --- NOVAS IMPORTAÇÕES PARA A CORREÇÃO ---
@@ -53,7 +53,7 @@ def create_guest(): # Define a função para criar convidado
         access_token = create_access_token(identity=guest_user.id) 
         
         # 5. Serializar os dados do usuário para retornar ao front-end
-        guest_data = user_schema.dump(guest_user) 
+        guest_data = user_serializer.dump(guest_user) 
  
         # 6. Retornar o token e os dados do usuário com status 200 (OK)
         return jsonify(access_token=access_token, user=guest_data), 200 
@@ -76,7 +76,7 @@ def get_current_user(): # Define a função para buscar dados do usuário atual
             return jsonify(error="Usuário não encontrado"), 404 # Retorna erro 404 se o usuário não for encontrado
 
  
-        return jsonify(user_schema.dump(user)), 200 # Serializa e retorna os dados do usuário com status 200
+        return jsonify(user_serializer.dump(user)), 200 # Serializa e retorna os dados do usuário com status 200
     except Exception as e: # Captura qualquer exceção
         print(f"ERRO /me: {e}") # Loga o erro no servidor
         return jsonify(error="Erro ao buscar dados do usuário."), 500 # Retorna erro interno com status 500
@@ -1,9 +1,11 @@
 # /app/routers/chat.py
 
-from flask import Blueprint, request, jsonify
+import json
+from flask import Blueprint, request, jsonify, Response, stream_with_context
 from markupsafe import escape
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.services import chat_service
+from app.services.llm_gateway import LLMTimeoutError, LLMUnavailableError
 from marshmallow import ValidationError
 
 bp = Blueprint('chat', __name__, url_prefix='/chat')
@@ -25,6 +27,11 @@ def send_message():
             user_id=current_user_id
         )
         return jsonify(ai_response), 200
+    except LLMUnavailableError:
+        # Disjuntor aberto: falha rápido em vez de segurar o worker
+        return jsonify(error="O tutor está indisponível no momento. Tente novamente em instantes."), 503
+    except LLMTimeoutError:
+        return jsonify(error="O tutor demorou demais para responder. Tente novamente."), 504
     except Exception as e:
         # Log do erro real no servidor para debug
         print(f"ERRO no endpoint /chat/send: {e}") 
@@ -32,21 +39,85 @@ def send_message():
         return jsonify(error="Ocorreu um erro ao processar sua mensagem."), 500
 
 
+def _sse(events):
+    """Formata os eventos do chat_service como Server-Sent Events."""
+    for event, data in events:
+        if event == "token":
+            data = {"text": data}
+        elif event == "error":
+            data = {"error": data}
+        yield f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@bp.route('/stream', methods=['POST'])
+@jwt_required()
+def stream_message():
+    """
+    Igual a /chat/send, mas devolve a resposta aos pedaços (text/event-stream):
+    eventos 'token' ({"text"}) durante a geração e, no fim, 'done' (a
+    mensagem salva) ou 'error' (erros depois da validação também chegam
+    como evento, pois o status 200 já foi enviado).
+    """
+    current_user_id = get_jwt_identity()
+    json_data = request.get_json()
+    if not json_data: return jsonify(error="Nenhum dado de entrada fornecido"), 400
+    prompt = json_data.get('prompt')
+    session_id = json_data.get('session_id')
+    if not prompt: return jsonify(error="O campo 'prompt' é obrigatório"), 400
+    if not session_id: return jsonify(error="O campo 'session_id' é obrigatório"), 400
+    events = chat_service.stream_chat_message(
+        prompt=prompt,
+        session_id=escape(session_id), # Sanitiza session_id
+        user_id=current_user_id
+    )
+    return Response(
+        stream_with_context(_sse(events)),
+        mimetype="text/event-stream",
+        # Sem cache e sem buffer em proxies (ex: nginx), para os tokens chegarem na hora
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+def _message_cursor(name):
+    """Lê o cursor ?before=/?after= (id de mensagem). Levanta ValueError se não for um inteiro."""
+    value = request.args.get(name)
+    if value is None or value == '':
+        return None
+    return int(value)
+
+
 # --- NOVA ROTA ---
 @bp.route('/<string:session_id>', methods=['GET'])
 @jwt_required()
 def get_history(session_id):
     """
     Busca o histórico de mensagens para uma sessão de chat específica.
+    Paginação por cursor: ?limit=50 traz as mensagens mais recentes;
+    ?before=<id> as anteriores a essa mensagem e ?after=<id> as posteriores.
+    O cursor da próxima página (na mesma direção) vem no header
+    'X-Next-Cursor' (ausente quando não há mais mensagens).
     """
     current_user_id = get_jwt_identity()
     # Sanitiza o session_id vindo da URL
     safe_session_id = escape(session_id)
+    limit = min(request.args.get('limit', 50, type=int), 200)
+    if limit < 1:
+        return jsonify(error="O parâmetro 'limit' deve ser positivo"), 400
+    try:
+        before = _message_cursor('before')
+        after = _message_cursor('after')
+    except ValueError:
+        return jsonify(error="Cursor inválido"), 400
+    if before is not None and after is not None:
+        return jsonify(error="Use 'before' ou 'after', não os dois"), 400
     
     try:
-        history = chat_service.get_chat_history(safe_session_id, current_user_id)
+        history, next_cursor = chat_service.get_chat_history(
+            safe_session_id, current_user_id, limit=limit, before=before, after=after
+        )
+        headers = {'X-Next-Cursor': str(next_cursor)} if next_cursor else {}
         # O serviço já retorna os dados serializados
-        return jsonify(history), 200
+        return jsonify(history), 200, headers
     except Exception as e:
         print(f"ERRO no endpoint GET /chat/{safe_session_id}: {e}")
         return jsonify(error="Ocorreu um erro ao buscar o histórico."), 500
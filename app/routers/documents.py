@@ -1,9 +1,10 @@
 # /app/routers/documents.py
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app, url_for
 from markupsafe import escape
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from app.services import rag_service
+from app.services import rag_service, ingestion_service
+from app.services.ingestion_worker import ingestion_pool
 # --- NOVA IMPORTAÇÃO ---
 from app.schemas.document_schema import documents_schema 
 import os
@@ -16,9 +17,26 @@ def allowed_file(filename):
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+@bp.before_app_request
+def start_ingestion_pool():
+    """
+    Inicia o pool local de ingestão na primeira requisição do processo
+    (depois do fork do Gunicorn). Jobs pendentes de antes de um restart
+    são retomados a partir daqui. Todos os workers web do host consomem a
+    fila, então os uploads (disco local) precisam estar no mesmo host.
+    """
+    if not ingestion_pool.started and current_app.config['INGESTION_WORKERS'] > 0:
+        ingestion_pool.start(current_app._get_current_object())
+
 @bp.route('/upload', methods=['POST'])
 @jwt_required()
 def upload_document():
+    """
+    Recebe um PDF e o coloca na fila de ingestão.
+    Responde 202 na hora com o ID do job; o progresso é consultado em
+    GET /documents/jobs/<job_id>. Se o usuário já enviou um arquivo com
+    o mesmo conteúdo, responde 200 sem criar job.
+    """
     current_user_id = get_jwt_identity()
     if 'file' not in request.files:
         return jsonify(error="Nenhum arquivo enviado"), 400
@@ -28,11 +46,35 @@ def upload_document():
     if not file or not allowed_file(file.filename):
         return jsonify(error="Formato de arquivo não permitido. Envie apenas .pdf"), 400
     try:
-        result_message = rag_service.process_and_store_document(
+        job, duplicate_of = ingestion_service.enqueue_document(
             file_storage=file,
             user_id=current_user_id
         )
-        return jsonify(message=result_message), 201
+        if duplicate_of:
+            # Conteúdo idêntico já enviado pelo usuário: nada a processar
+            return jsonify(
+                message=f"Este arquivo já foi enviado como '{duplicate_of}'.",
+                duplicate_of=duplicate_of
+            ), 200
+        ingestion_pool.notify()
+        status_url = url_for('documents.get_ingestion_job', job_id=job['id'])
+        return jsonify(job_id=job['id'], status=job['status'], status_url=status_url), 202, {'Location': status_url}
+    except Exception as e:
+        return jsonify(error=str(e)), 500
+
+# --- NOVA ROTA ---
+@bp.route('/jobs/<string:job_id>', methods=['GET'])
+@jwt_required()
+def get_ingestion_job(job_id):
+    """
+    Retorna o status e o progresso de um job de ingestão do usuário logado.
+    """
+    current_user_id = get_jwt_identity()
+    try:
+        job = ingestion_service.get_job(job_id, current_user_id)
+        if not job:
+            return jsonify(error="Job não encontrado"), 404
+        return jsonify(job), 200
     except Exception as e:
         return jsonify(error=str(e)), 500
 
@@ -41,13 +83,25 @@ def upload_document():
 @jwt_required()
 def list_documents():
     """
-    Lista os documentos enviados pelo usuário logado.
+    Lista os documentos enviados pelo usuário logado, em ordem de nome.
+    Paginação por cursor: ?limit=50&after=<cursor>. O cursor da próxima
+    página vem no header 'X-Next-Cursor' (ausente na última página).
     """
     current_user_id = get_jwt_identity()
+    limit = min(request.args.get('limit', 50, type=int), 200)
+    if limit < 1:
+        return jsonify(error="O parâmetro 'limit' deve ser positivo"), 400
+    after = request.args.get('after')
+    if after:
+        try:
+            rag_service.decode_cursor(after)
+        except ValueError:
+            return jsonify(error="Cursor inválido"), 400
     try:
-        docs = rag_service.list_documents(current_user_id)
+        docs, next_cursor = rag_service.list_documents(current_user_id, limit=limit, after=after)
+        headers = {'X-Next-Cursor': next_cursor} if next_cursor else {}
         # Serializa usando o schema de documentos
-        return jsonify(documents_schema.dump(docs)), 200
+        return jsonify(documents_schema.dump(docs)), 200, headers
     except Exception as e:
         return jsonify(error=str(e)), 500
 
@@ -1,10 +1,11 @@
 # /app/routers/tasks.py
 
+import hashlib
 from flask import Blueprint, request, jsonify
 # Importa o decorator de proteção e a função para pegar a ID do usuário
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.services import task_service
-from app.schemas.task_schema import task_schema, tasks_schema
+from app.schemas.task_schema import task_schema, task_serializer
 from marshmallow import ValidationError
 
 # Cria o Blueprint para /tasks
@@ -25,15 +26,14 @@ def create_task():
     if not json_data:
         return jsonify(error="Nenhum dado de entrada fornecido"), 400
 
-    # 3. Valida os dados com o schema
-    try:
-        data = task_schema.load(json_data)
-    except ValidationError as err:
-        return jsonify(errors=err.messages), 422
+    # 3. Valida os dados com o schema (o user_id vem do token)
+    errors = task_schema.validate(json_data, partial=("user_id",))
+    if errors:
+        return jsonify(errors=errors), 422
 
     # 4. Chama o serviço para criar a tarefa
     try:
-        new_task = task_service.create_task(data, current_user_id)
+        new_task = task_service.create_task(json_data, current_user_id)
         return jsonify(new_task), 201
     except Exception as e:
         return jsonify(error=str(e)), 500
@@ -43,15 +43,72 @@ def create_task():
 @jwt_required() # <--- MÁGICA AQUI: Protege este endpoint
 def get_tasks():
     """
-    Busca todas as tarefas do usuário logado. Requer autenticação JWT.
+    Busca as tarefas do usuário logado, da mais nova para a mais antiga. Requer autenticação JWT.
+    Paginação por cursor: ?limit=50&after=<cursor>. O cursor da próxima
+    página vem no header 'X-Next-Cursor' (ausente na última página).
+    GET condicional: a resposta traz um ETag; com 'If-None-Match' igual
+    (lista sem mudanças) a resposta é 304, sem ler nem serializar tarefas.
     """
     # 1. Pega a ID do usuário a partir do token JWT
     current_user_id = get_jwt_identity()
+    limit = min(request.args.get('limit', 50, type=int), 200)
+    if limit < 1:
+        return jsonify(error="O parâmetro 'limit' deve ser positivo"), 400
+    after = request.args.get('after')
+    if after:
+        try:
+            task_service.decode_cursor(after)
+        except ValueError:
+            return jsonify(error="Cursor inválido"), 400
+
+    # 2. Chama o serviço para buscar as tarefas (só se a lista mudou)
+    try:
+        version = task_service.get_tasks_version(current_user_id)
+        etag = _tasks_etag(current_user_id, version, limit, after)
+        # Sem cache compartilhado e sempre revalidando com o ETag
+        headers = {'ETag': f'"{etag}"', 'Cache-Control': 'private, no-cache'}
+        if request.if_none_match.contains_weak(etag):
+            return '', 304, headers
+
+        tasks, next_cursor = task_service.get_tasks_by_user(current_user_id, limit=limit, after=after)
+        if next_cursor:
+            headers['X-Next-Cursor'] = next_cursor
+        return jsonify(tasks), 200, headers
+    except Exception as e:
+        return jsonify(error=str(e)), 500
+
+
+def _tasks_etag(user_id, version, limit, after):
+    """ETag de uma página da lista: muda quando a versão das tarefas do usuário muda."""
+    key = f"{user_id}:{version}:{limit}:{after or ''}"
+    return hashlib.sha1(key.encode()).hexdigest()[:20]
+
+
+@bp.route('/batch', methods=['POST'])
+@jwt_required()
+def batch_tasks():
+    """
+    Aplica várias operações de uma vez, em uma única transação.
+    Espera JSON: { "operations": [
+        { "op": "create", "content": "Nova tarefa" },
+        { "op": "update", "id": 1, "is_completed": true },
+        { "op": "delete", "id": 2 }
+    ] }
+    Retorna um resultado por operação, na mesma ordem (status 201/200/204/404/409/422).
+    """
+    current_user_id = get_jwt_identity()
+    json_data = request.get_json()
+    if not json_data:
+        return jsonify(error="Nenhum dado de entrada fornecido"), 400
+    operations = json_data.get('operations')
+    if not isinstance(operations, list) or not operations:
+        return jsonify(error="O campo 'operations' deve ser uma lista não vazia"), 400
+    if len(operations) > task_service.MAX_BATCH_OPERATIONS:
+        return jsonify(error=f"No máximo {task_service.MAX_BATCH_OPERATIONS} operações por lote"), 400
 
-    # 2. Chama o serviço para buscar as tarefas
     try:
-        tasks = task_service.get_tasks_by_user(current_user_id)
-        return jsonify(tasks), 200
+        results = task_service.apply_batch(operations, current_user_id)
+        return jsonify(results=results), 200
     except Exception as e:
         return jsonify(error=str(e)), 500
 
@@ -69,7 +126,7 @@ def get_task(task_id):
         if not task:
             return jsonify(error="Tarefa não encontrada"), 404
         
-        return jsonify(task_schema.dump(task)), 200
+        return jsonify(task_serializer.dump(task)), 200
     except Exception as e:
         return jsonify(error=str(e)), 500
 
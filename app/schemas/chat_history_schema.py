@@ -1,6 +1,7 @@
 # /app/schemas/chat_history_schema.py
 from app.extensions import ma
 from app.models.chat_history_model import ChatHistory
+from app.schemas.fast_serializer import FastSerializer
 
 class ChatHistorySchema(ma.SQLAlchemyAutoSchema):
     class Meta:
@@ -12,4 +13,6 @@ class ChatHistorySchema(ma.SQLAlchemyAutoSchema):
     timestamp = ma.auto_field(dump_only=True)
 
 chat_history_schema = ChatHistorySchema()
-chat_histories_schema = ChatHistorySchema(many=True)
\ No newline at end of file
+chat_histories_schema = ChatHistorySchema(many=True)
+# Mesma saída do schema.dump, sem a reflexão por campo (endpoints mais usados)
+chat_history_serializer = FastSerializer(chat_history_schema)
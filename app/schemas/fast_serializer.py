@@ -0,0 +1,101 @@
+# /app/schemas/fast_serializer.py
+"""
+Serialização rápida para os endpoints mais usados (tarefas, histórico do
+chat, usuário), com a mesma saída do schema.dump do marshmallow.
+
+O FastSerializer lê os campos de dump de um schema e gera (uma vez) uma
+função que monta o dicionário direto dos atributos, sem a reflexão por
+campo que o marshmallow faz a cada objeto. Para listas grandes, dump_rows
+serializa as linhas de uma consulta só com colunas (select(*serializer.columns)),
+sem criar objetos do ORM.
+
+Campos com tipos que o gerador não conhece (ou schemas com hooks de dump)
+usam o próprio marshmallow, então a saída continua igual.
+"""
+
+from marshmallow import fields
+
+# Campos cujo valor vai como está (o marshmallow não converte nada)
+_PASSTHROUGH = "{v}"
+# String/Email: str(value), exceto None
+_STRING = "({v} if {v}.__class__ is str or {v} is None else str({v}))"
+# Integer: int(value), exceto None
+_INTEGER = "({v} if {v}.__class__ is int or {v} is None else int({v}))"
+# DateTime no formato ISO (padrão)
+_DATETIME = "(None if {v} is None else {v}.isoformat())"
+
+
+def _template(field):
+    """Expressão Python equivalente ao _serialize do campo, ou None se não houver."""
+    serialize = type(field)._serialize
+    if serialize is fields.Field._serialize:
+        return _PASSTHROUGH
+    if serialize is fields.String._serialize:
+        return _STRING
+    if serialize is fields.Number._serialize and field.num_type is int and not field.as_string:
+        return _INTEGER
+    if type(field) is fields.DateTime and (field.format or field.DEFAULT_FORMAT) == "iso":
+        return _DATETIME
+    return None
+
+
+class FastSerializer:
+    """Serializador gerado a partir de um schema do marshmallow (mesma saída do schema.dump)."""
+
+    def __init__(self, schema):
+        self.schema = schema
+        self.model = getattr(schema.opts, "model", None)
+        # Atributos lidos do objeto, na ordem do dump
+        self.attributes = [field.attribute or name for name, field in schema.dump_fields.items()]
+        self._serialize, self._serialize_row = self._compile(schema)
+
+    @property
+    def columns(self):
+        """Colunas do modelo para uma consulta sem objetos do ORM: select(*serializer.columns)."""
+        return [getattr(self.model, attribute) for attribute in self.attributes]
+
+    @staticmethod
+    def _compile(schema):
+        """
+        Gera duas funções: uma que lê os atributos de um objeto e outra que
+        desempacota uma linha de select(*columns) (tupla na ordem do dump).
+        """
+        if any(schema._hooks.get(tag) for tag in ("pre_dump", "post_dump")):
+            return schema.dump, schema.dump
+
+        reads = []
+        items = []
+        namespace = {}
+        for index, (name, field) in enumerate(schema.dump_fields.items()):
+            key = field.data_key or name
+            attribute = field.attribute or name
+            template = _template(field)
+            if template is None or "." in attribute:
+                # Campo sem atalho: delega ao próprio campo do marshmallow
+                namespace[f"_field{index}"] = field
+                items.append(f"{key!r}: _field{index}.serialize({attribute!r}, obj)")
+                continue
+            reads.append(f"    v{index} = obj.{attribute}")
+            items.append(f"{key!r}: " + template.format(v=f"v{index}"))
+        body = "    return {" + ", ".join(items) + "}"
+        source = "\n".join(["def serialize(obj):", *reads, body])
+
+        # A versão por tupla só existe se todos os campos têm atalho
+        if len(reads) == len(items):
+            unpack = ", ".join(f"v{index}" for index in range(len(items)))
+            source += "\n\n" + "\n".join(["def serialize_row(obj):", f"    {unpack}, = obj", body])
+        exec(source, namespace)
+        serialize = namespace["serialize"]
+        return serialize, namespace.get("serialize_row", serialize)
+
+    def dump(self, obj, many: bool = False):
+        """Serializa um objeto (ou uma lista com many=True), como o schema.dump."""
+        if many:
+            serialize = self._serialize
+            return [serialize(item) for item in obj]
+        return self._serialize(obj)
+
+    def dump_rows(self, rows):
+        """Serializa as linhas de db.session.execute(select(*self.columns)), como o schema.dump(many=True)."""
+        serialize_row = self._serialize_row
+        return [serialize_row(row) for row in rows]
@@ -0,0 +1,13 @@
+# /app/schemas/ingestion_job_schema.py
+from app.extensions import ma
+from app.models.ingestion_job_model import IngestionJob
+
+class IngestionJobSchema(ma.SQLAlchemyAutoSchema):
+    class Meta:
+        model = IngestionJob
+        load_instance = False
+        include_fk = True
+        # O caminho do arquivo no servidor não deve ser exposto
+        exclude = ("file_path",)
+
+ingestion_job_schema = IngestionJobSchema()
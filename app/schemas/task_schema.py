@@ -1,6 +1,7 @@
 # /app/schemas/task_schema.py
 from app.extensions import ma
 from app.models.task_model import Task
+from app.schemas.fast_serializer import FastSerializer
 
 class TaskSchema(ma.SQLAlchemyAutoSchema):
     class Meta:
@@ -12,4 +13,6 @@ class TaskSchema(ma.SQLAlchemyAutoSchema):
     created_at = ma.auto_field(dump_only=True)
 
 task_schema = TaskSchema()
-tasks_schema = TaskSchema(many=True)
\ No newline at end of file
+tasks_schema = TaskSchema(many=True)
+# Mesma saída do schema.dump, sem a reflexão por campo (endpoints mais usados)
+task_serializer = FastSerializer(task_schema)
@@ -1,5 +1,6 @@
 from app.extensions import ma 
 from app.models.user_model import User 
+from app.schemas.fast_serializer import FastSerializer
 from marshmallow import fields 
 
 class UserSchema(ma.SQLAlchemyAutoSchema):
@@ -8,7 +9,7 @@ class UserSchema(ma.SQLAlchemyAutoSchema):
     class Meta:
         model = User
         load_instance = False 
-        exclude = ("password_hash", "tasks", "chat_histories")
+        exclude = ("password_hash", "tasks", "chat_histories", "tasks_version")
 
     id = ma.auto_field(dump_only=True)
     created_at = ma.auto_field(dump_only=True)
@@ -19,3 +20,5 @@ class UserSchema(ma.SQLAlchemyAutoSchema):
 
 user_schema = UserSchema()
 users_schema = UserSchema(many=True)
+# Mesma saída do schema.dump, sem a reflexão por campo (endpoints mais usados)
+user_serializer = FastSerializer(user_schema)
@@ -1,11 +1,20 @@
 # /app/services/chat_service.py
 
-import google.generativeai as genai
+import contextvars
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from sqlalchemy import select
 from app.extensions import db
+from app.core.config import settings
+from app.core import metrics
 from app.models.chat_history_model import ChatHistory
 # --- NOVA IMPORTAÇÃO ---
-from app.schemas.chat_history_schema import chat_history_schema, chat_histories_schema
+from app.schemas.chat_history_schema import chat_history_serializer
 from app.services import rag_service
+from app.services import prompt_builder
+from app.services import summary_service
+from app.services import llm_gateway
 
 SYSTEM_INSTRUCTION = """
 Você é um tutor de IA chamado Gênio Guiado.
@@ -19,42 +28,139 @@ Siga estritamente as seguintes regras:
 5.  **Seja Conciso e Focado**: Mantenha a linguagem direta e objetiva, mas sempre encorajadora.
 """
 
-def send_chat_message(prompt: str, session_id: str, user_id: int):
+CHAT_MODEL = "gemini-pro"
+
+# Pool compartilhado para as etapas de I/O independentes do turno (criado na primeira chamada)
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=settings.CHAT_FANOUT_WORKERS, thread_name_prefix="chat-fanout")
+    return _executor
+
+
+def _start_retrieval(prompt: str, user_id: int):
+    """
+    Dispara a busca do contexto RAG (embedding da pergunta + Qdrant), que
+    não depende do banco, no pool compartilhado. Com CHAT_FANOUT_WORKERS=0
+    roda na hora, em sequência. Retorna um Future.
+    """
+    if settings.CHAT_FANOUT_WORKERS <= 0:
+        future = Future()
+        future.set_result(rag_service.search_relevant_chunks(query=prompt, user_id=user_id))
+        return future
+    # Roda no contexto da requisição, para as etapas da busca entrarem no Server-Timing
+    return _get_executor().submit(
+        contextvars.copy_context().run, rag_service.search_relevant_chunks, query=prompt, user_id=user_id
+    )
+
+
+def _await_retrieval(future, deadline: float):
+    """
+    Espera o contexto RAG até o prazo (time.monotonic()). Estourado, cancela
+    a busca (se ainda estiver na fila) e segue sem contexto: o tutor ainda
+    responde com o histórico, em vez de deixar o aluno esperando.
+    """
+    try:
+        return future.result(timeout=max(0.0, deadline - time.monotonic()))
+    except FutureTimeoutError:
+        future.cancel()
+        print(f"[chat] busca de contexto passou do prazo de {settings.CHAT_RETRIEVAL_TIMEOUT}s; seguindo sem contexto")
+        return []
+
+
+def _prepare_turn(prompt: str, session_id: str, user_id: int):
+    """
+    Passos comuns a /chat/send e /chat/stream antes de chamar o modelo:
+    salva (flush) a mensagem do usuário, carrega o histórico, busca o
+    contexto RAG e monta o prompt. Retorna (histórico para o Gemini,
+    prompt aumentado, mensagens não resumidas).
+
+    A busca RAG (embedding + Qdrant) roda no pool compartilhado enquanto
+    esta thread lê o histórico no banco, então o tempo da preparação é o
+    da etapa mais lenta, não a soma das duas.
+    """
+    # --- 0. Disparar a busca do contexto RAG (em paralelo com o banco) ---
+    deadline = time.monotonic() + settings.CHAT_RETRIEVAL_TIMEOUT
+    retrieval = _start_retrieval(prompt, user_id)
+
     try:
         # --- 1. Salvar Mensagem do Usuário ---
         user_message = ChatHistory(session_id=session_id, role="user", message=prompt, user_id=user_id)
         db.session.add(user_message)
         # Commit inicial para que a mensagem do user apareça no histórico carregado abaixo
-        db.session.flush() 
+        with metrics.stage("db_flush"):
+            db.session.flush() 
 
-        # --- 2. Carregar Histórico ---
-        history_db = ChatHistory.query.filter_by(user_id=user_id, session_id=session_id).order_by(ChatHistory.timestamp.asc()).all()
+        # --- 2. Carregar Histórico (resumo da sessão + mensagens ainda não resumidas) ---
+        with metrics.stage("history"):
+            summary, history_db = summary_service.load_session(user_id, session_id)
         history_for_gemini = [{"role": msg.role, "parts": [msg.message]} for msg in history_db]
+    except Exception:
+        # O turno falhou: a busca não é mais necessária
+        retrieval.cancel()
+        raise
 
-        # --- 3. Buscar Contexto RAG ---
-        contexts = rag_service.search_relevant_chunks(query=prompt, user_id=user_id)
-        context_string = "\n\n".join(contexts) if contexts else "Nenhum contexto encontrado no material de estudo."
-        
-        # --- 4. Prompt Aumentado ---
-        augmented_prompt = f"---\nCONTEXTO FORNECIDO:\n{context_string}\n---\n\nPERGUNTA DO ALUNO:\n{prompt}"
-
-        # --- 5. Chamar Gemini ---
-        model = genai.GenerativeModel(model_name="gemini-pro", system_instruction=SYSTEM_INSTRUCTION)
-        # Passa o histórico COMPLETO (incluindo a última msg do user) para start_chat
-        chat_session = model.start_chat(history=history_for_gemini) 
-        # Envia SÓ o prompt aumentado (pois o histórico já está na sessão)
-        response = chat_session.send_message(augmented_prompt) 
-
-        # --- 6. Salvar Resposta da IA ---
-        model_message = ChatHistory(session_id=session_id, role="model", message=response.text, user_id=user_id)
-        db.session.add(model_message)
-        
-        # --- 7. Commitar ---
+    # --- 3. Esperar o Contexto RAG (até o prazo) ---
+    # (o tempo aqui é o que a busca passou da leitura do histórico)
+    with metrics.stage("retrieval_wait"):
+        contexts = _await_retrieval(retrieval, deadline)
+    
+    # --- 4. Prompt Aumentado (dentro do orçamento de tokens; corta o histórico mais antigo) ---
+    history_for_gemini, augmented_prompt, report = prompt_builder.build_prompt(
+        SYSTEM_INSTRUCTION, history_for_gemini, contexts, prompt,
+        summary=summary.summary if summary else None
+    )
+    print(
+        f"[prompt] sessão {session_id}: {report['tokens']}/{report['budget']} tokens "
+        f"(contexto {report['context_tokens']}, histórico {report['history_tokens']}); "
+        f"cortados: {report['messages_dropped']} mensagem(ns), {report['contexts_dropped']} chunk(s)"
+    )
+    metrics.count("chat_context_chunks_total", len(contexts) - report['contexts_dropped'])
+    metrics.count("chat_prompt_tokens_total", report['context_tokens'], part="context")
+    metrics.count("chat_prompt_tokens_total", report['history_tokens'], part="history")
+    metrics.count("chat_prompt_tokens_total", report['tokens'] - report['context_tokens'] - report['history_tokens'], part="fixed")
+    return history_for_gemini, augmented_prompt, history_db
+
+
+def _finish_turn(answer: str, session_id: str, user_id: int, history_db):
+    """Salva a resposta do modelo, commita o turno e agenda a atualização do resumo da sessão."""
+    # --- 6. Salvar Resposta da IA ---
+    model_message = ChatHistory(session_id=session_id, role="model", message=answer, user_id=user_id)
+    db.session.add(model_message)
+    
+    # --- 7. Commitar ---
+    with metrics.stage("commit"):
         db.session.commit()
+    if metrics.enabled():
+        metrics.count("chat_answer_tokens_total", prompt_builder.count_tokens(answer))
+
+    # --- 7.1. Atualizar o resumo da sessão (em segundo plano), se o trecho não resumido ficou grande ---
+    summary_service.schedule_refresh(user_id, session_id, len(history_db) + 1)
 
-        # --- 8. Retornar Resposta ---
-        return chat_history_schema.dump(model_message)
+    # --- 8. Retornar Resposta ---
+    return chat_history_serializer.dump(model_message)
 
+
+def send_chat_message(prompt: str, session_id: str, user_id: int):
+    try:
+        history_for_gemini, augmented_prompt, history_db = _prepare_turn(prompt, session_id, user_id)
+        # --- 5. Chamar Gemini (pelo gateway: prazo, hedge e disjuntor) ---
+        # O histórico recente (incluindo a última msg do user) abre a conversa
+        # e só o prompt aumentado é enviado como nova mensagem
+        with metrics.stage("llm"):
+            answer = llm_gateway.get_gateway().chat(CHAT_MODEL, SYSTEM_INSTRUCTION, history_for_gemini, augmented_prompt)
+        return _finish_turn(answer, session_id, user_id, history_db)
+
+    except llm_gateway.LLMError as e:
+        db.session.rollback()
+        print(f"ERRO DETALHADO em send_chat_message: {type(e).__name__} - {e}")
+        # Sobe o erro do gateway como está, para a rota responder 503/504
+        raise
     except Exception as e:
         db.session.rollback()
         # Log detalhado do erro real
@@ -63,20 +169,87 @@ def send_chat_message(prompt: str, session_id: str, user_id: int):
         raise Exception(f"Erro ao processar mensagem: {str(e)}")
 
 
+def stream_chat_message(prompt: str, session_id: str, user_id: int):
+    """
+    Versão em streaming de send_chat_message: gerador de eventos
+    ("token", texto) para cada pedaço da resposta e, no fim,
+    ("done", mensagem serializada) ou ("error", mensagem).
+
+    Todo o trabalho com o banco acontece dentro do gerador: a sessão do
+    SQLAlchemy do request é encerrada quando a view retorna, antes do
+    streaming começar. O turno (pergunta + resposta) só é commitado quando
+    o modelo termina; se o cliente desconectar no meio, o gerador é
+    fechado e o turno é descartado (rollback), para o histórico não ficar
+    com uma pergunta sem resposta ou uma resposta cortada.
+    """
+    parts = []
+    finished = False
+    stream = None
+    try:
+        history_for_gemini, augmented_prompt, history_db = _prepare_turn(prompt, session_id, user_id)
+        stream = llm_gateway.get_gateway().stream_chat(CHAT_MODEL, SYSTEM_INSTRUCTION, history_for_gemini, augmented_prompt)
+        # No streaming os headers já saíram: as etapas só vão para os histogramas
+        with metrics.stage("llm"):
+            for text in stream:
+                parts.append(text)
+                yield "token", text
+        message = _finish_turn("".join(parts), session_id, user_id, history_db)
+        finished = True
+        yield "done", message
+    except GeneratorExit:
+        # Cliente desconectou: para de consumir o stream do modelo
+        print(f"[stream] sessão {session_id}: cliente desconectou após {len(parts)} pedaço(s)")
+        raise
+    except llm_gateway.LLMUnavailableError as e:
+        print(f"ERRO DETALHADO em stream_chat_message: {type(e).__name__} - {e}")
+        yield "error", "O tutor está indisponível no momento. Tente novamente em instantes."
+    except Exception as e:
+        print(f"ERRO DETALHADO em stream_chat_message: {type(e).__name__} - {e}")
+        yield "error", "Ocorreu um erro ao processar sua mensagem."
+    finally:
+        if stream is not None:
+            stream.close()
+        if not finished:
+            db.session.rollback()
+
+
 # --- NOVA FUNÇÃO ---
-def get_chat_history(session_id: str, user_id: int):
+def get_chat_history(session_id: str, user_id: int, limit: int = 50, before: int = None, after: int = None):
     """
-    Busca todas as mensagens de uma sessão de chat específica para o usuário logado.
+    Busca uma página das mensagens de uma sessão de chat do usuário logado,
+    sempre da mais antiga para a mais nova dentro da página.
+
+    Paginação por cursor (keyset) no id da mensagem:
+    - sem cursor: as 'limit' mensagens mais recentes (a página que o chat abre);
+    - 'before': as mensagens anteriores a esse id (rolar para cima);
+    - 'after': as mensagens posteriores a esse id (buscar as novas).
+    Retorna (mensagens serializadas, cursor da próxima página na mesma
+    direção ou None). Usa o índice (user_id, session_id, id), então o custo
+    de cada página não depende do tamanho da sessão. Lê só as colunas
+    serializadas (sem criar objetos do ORM).
     """
     try:
-        # Busca todas as mensagens da sessão e usuário, ordenadas pela mais antiga primeiro
-        messages = ChatHistory.query.filter_by(
-            user_id=user_id, 
-            session_id=session_id
-        ).order_by(ChatHistory.timestamp.asc()).all()
-        
+        query = select(*chat_history_serializer.columns).where(
+            ChatHistory.user_id == user_id, ChatHistory.session_id == session_id
+        )
+        # Busca um a mais para saber se existe próxima página
+        if after is not None:
+            query = query.where(ChatHistory.id > after).order_by(ChatHistory.id.asc())
+            messages = db.session.execute(query.limit(limit + 1)).all()
+            has_more = len(messages) > limit
+            messages = messages[:limit]
+            next_cursor = messages[-1].id if has_more else None
+        else:
+            if before is not None:
+                query = query.where(ChatHistory.id < before)
+            messages = db.session.execute(query.order_by(ChatHistory.id.desc()).limit(limit + 1)).all()
+            has_more = len(messages) > limit
+            messages = messages[:limit]
+            messages.reverse()
+            next_cursor = messages[0].id if has_more else None
+
         # Serializa a lista de mensagens usando o schema apropriado
-        return chat_histories_schema.dump(messages)
+        return chat_history_serializer.dump_rows(messages), next_cursor
 
     except Exception as e:
         print(f"Erro ao buscar histórico do chat: {e}")
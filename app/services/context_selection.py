@@ -0,0 +1,122 @@
+# /app/services/context_selection.py
+
+from app.core.lazy import lazy_import
+
+np = lazy_import("numpy")
+
+# Sobreposição mínima (em caracteres) para considerar que dois chunks são vizinhos
+MIN_OVERLAP_CHARS = 20
+
+
+def _normalize_rows(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def adaptive_k(scores, min_k: int, max_k: int):
+    """
+    Quantos candidatos manter, olhando a distribuição dos scores: corta no
+    maior "degrau" entre scores consecutivos (ordenados), entre min_k e max_k.
+    Se os scores forem praticamente iguais, todos são igualmente bons: max_k.
+    """
+    scores = np.sort(np.asarray(scores, dtype=np.float32))[::-1]
+    n = len(scores)
+    max_k = min(max_k, n)
+    if max_k <= min_k:
+        return max_k
+    spread = scores[0] - scores[-1]
+    if spread <= 0:
+        return max_k
+    # gaps[i] = queda entre o i-ésimo e o (i+1)-ésimo score, ou seja, o
+    # degrau de manter i+1 itens; manter todos os n não tem degrau
+    gaps = np.append((scores[:-1] - scores[1:]) / spread, 0.0)
+    window = gaps[min_k - 1:max_k]
+    if window.max() < 0.05:
+        return max_k
+    return min_k + int(np.argmax(window))
+
+
+def mmr(candidate_vectors, relevance, k: int, lambda_: float = 0.7):
+    """
+    Maximal Marginal Relevance: escolhe k candidatos equilibrando relevância
+    (lambda_) e diferença em relação aos já escolhidos (1 - lambda_).
+    'relevance' é o score de cada candidato (ex: score da busca); as
+    similaridades entre candidatos são cossenos dos vetores densos.
+    Retorna os índices escolhidos, na ordem de escolha.
+    """
+    vectors = _normalize_rows(np.asarray(candidate_vectors, dtype=np.float32))
+    n = len(vectors)
+    k = min(k, n)
+    if k <= 0:
+        return []
+
+    relevance = np.asarray(relevance, dtype=np.float32)
+    # Normaliza para [0, 1], na mesma escala do cosseno (scores RRF são bem pequenos)
+    spread = relevance.max() - relevance.min()
+    relevance = (relevance - relevance.min()) / spread if spread > 0 else np.ones(n, dtype=np.float32)
+
+    similarity = vectors @ vectors.T
+    selected = [int(np.argmax(relevance))]
+    # Maior similaridade de cada candidato com algum já escolhido
+    max_similarity = similarity[selected[0]].copy()
+    available = np.ones(n, dtype=bool)
+    available[selected[0]] = False
+
+    while len(selected) < k:
+        scores = lambda_ * relevance - (1 - lambda_) * max_similarity
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        np.maximum(max_similarity, similarity[best], out=max_similarity)
+    return selected
+
+
+def _overlap(left: str, right: str, max_chars: int):
+    """Tamanho do maior sufixo de 'left' que é prefixo de 'right' (0 se menor que o mínimo)."""
+    for size in range(min(len(left), len(right), max_chars), MIN_OVERLAP_CHARS - 1, -1):
+        if left.endswith(right[:size]):
+            return size
+    return 0
+
+
+def merge_overlapping(texts, max_overlap: int):
+    """
+    Remove repetições entre os chunks escolhidos: trechos contidos em outro
+    são descartados, e chunks vizinhos no documento (o fim de um é o começo
+    do outro, por causa do chunk_overlap) viram um único trecho contínuo.
+    Mantém a ordem de relevância do primeiro chunk de cada trecho.
+    """
+    passages = []
+    for text in texts:
+        text = text.strip()
+        if not text or any(text in passage for passage in passages):
+            continue
+        for i, passage in enumerate(passages):
+            size = _overlap(passage, text, max_overlap)
+            if size:
+                passages[i] = passage + text[size:]
+                break
+            size = _overlap(text, passage, max_overlap)
+            if size:
+                passages[i] = text + passage[size:]
+                break
+        else:
+            passages.append(text)
+    return passages
+
+
+def select_context(candidates, min_k: int, max_k: int, lambda_: float, max_overlap: int):
+    """
+    Estágio pós-busca: recebe os candidatos (texto, vetor denso, score) já
+    ordenados pela busca, escolhe quantos manter pela distribuição dos
+    scores, re-ranqueia por MMR e junta/remove trechos sobrepostos.
+    Retorna a lista de textos para o prompt.
+    """
+    if not candidates:
+        return []
+    texts, vectors, scores = zip(*candidates)
+    k = adaptive_k(scores, min_k, max_k)
+    chosen = mmr(vectors, scores, k, lambda_)
+    return merge_overlapping([texts[i] for i in chosen], max_overlap)
@@ -0,0 +1,150 @@
+# /app/services/embedding_cache.py
+
+import datetime
+import hashlib
+import threading
+from array import array
+from sqlalchemy.dialects import postgresql, sqlite
+from app.core.config import settings
+from app.extensions import db
+from app.models.embedding_cache_model import EmbeddingCache
+
+# Contadores do processo (hits/misses/expulsões), protegidos por lock
+# porque os workers de ingestão rodam em threads
+_stats = {"hits": 0, "misses": 0, "stored": 0, "evicted": 0}
+_stats_lock = threading.Lock()
+# Inserções desde a última verificação de tamanho
+_inserts_since_evict = 0
+
+# O cache usa conexões próprias (db.engine.begin()), com transações
+# curtas e independentes: nunca commita nem desfaz a sessão de quem chama
+# (ex: o job de ingestão no meio do processamento).
+
+
+def make_key(model: str, task_type: str, dimension: int, text: str):
+    """Chave do cache: SHA-256 de (modelo, task_type, dimensão, texto)."""
+    raw = f"{model}\x00{task_type}\x00{dimension}\x00{text}".encode("utf-8")
+    return hashlib.sha256(raw).hexdigest()
+
+
+def _pack(vector):
+    return array("f", vector).tobytes()
+
+
+def _unpack(blob):
+    vector = array("f")
+    vector.frombytes(blob)
+    return vector.tolist()
+
+
+def _count(name: str, amount: int):
+    with _stats_lock:
+        _stats[name] += amount
+
+
+def stats():
+    """Retorna os contadores do cache e a taxa de acerto deste processo."""
+    with _stats_lock:
+        result = dict(_stats)
+    lookups = result["hits"] + result["misses"]
+    result["hit_rate"] = result["hits"] / lookups if lookups else 0.0
+    return result
+
+
+def get_many(keys: list):
+    """
+    Busca vários embeddings de uma vez (uma única query).
+    Retorna {chave: vetor} só com as chaves encontradas. O 'last_used_at'
+    (política LRU) só é regravado nas entradas em que ele tem mais de
+    EMBEDDING_CACHE_TOUCH_SECONDS: leituras de entradas quentes não escrevem nada.
+    """
+    if not settings.EMBEDDING_CACHE_ENABLED or not keys:
+        return {}
+    unique_keys = list(set(keys))
+    now = datetime.datetime.utcnow()
+    touch_before = now - datetime.timedelta(seconds=settings.EMBEDDING_CACHE_TOUCH_SECONDS)
+    try:
+        with db.engine.begin() as connection:
+            rows = connection.execute(
+                db.select(EmbeddingCache.key, EmbeddingCache.embedding, EmbeddingCache.last_used_at)
+                .where(EmbeddingCache.key.in_(unique_keys))
+            ).all()
+            found = {row.key: _unpack(row.embedding) for row in rows}
+            stale = [row.key for row in rows if row.last_used_at is None or row.last_used_at < touch_before]
+            if stale:
+                connection.execute(
+                    db.update(EmbeddingCache).where(EmbeddingCache.key.in_(stale)).values(last_used_at=now)
+                )
+    except Exception as e:
+        # O cache nunca deve quebrar a ingestão: em caso de erro, tudo vira miss
+        print(f"Erro ao ler o cache de embeddings: {e}")
+        found = {}
+
+    hits = sum(1 for key in keys if key in found)
+    _count("hits", hits)
+    _count("misses", len(keys) - hits)
+    return found
+
+
+def put_many(entries: dict, model: str, task_type: str, dimension: int):
+    """
+    Grava vários embeddings ({chave: vetor}) de uma vez.
+    Chaves que já existem (ex: gravadas por outro worker) são ignoradas.
+    """
+    global _inserts_since_evict
+    if not settings.EMBEDDING_CACHE_ENABLED or not entries:
+        return
+    now = datetime.datetime.utcnow()
+    rows = [
+        {
+            "key": key, "model": model, "task_type": task_type, "dimension": dimension,
+            "embedding": _pack(vector), "created_at": now, "last_used_at": now,
+        }
+        for key, vector in entries.items()
+    ]
+    try:
+        # INSERT ... ON CONFLICT DO NOTHING (Postgres e SQLite)
+        dialect = postgresql if db.engine.dialect.name == "postgresql" else sqlite
+        stmt = dialect.insert(EmbeddingCache).values(rows).on_conflict_do_nothing(index_elements=["key"])
+        with db.engine.begin() as connection:
+            connection.execute(stmt)
+    except Exception as e:
+        print(f"Erro ao gravar no cache de embeddings: {e}")
+        return
+
+    _count("stored", len(rows))
+    with _stats_lock:
+        _inserts_since_evict += len(rows)
+        should_evict = _inserts_since_evict >= settings.EMBEDDING_CACHE_EVICT_EVERY
+        if should_evict:
+            _inserts_since_evict = 0
+    if should_evict:
+        evict()
+
+
+def evict():
+    """
+    Mantém o cache dentro de EMBEDDING_CACHE_MAX_ENTRIES.
+    Quando passa do limite, apaga os menos usados recentemente até sobrar
+    90% do limite (a folga evita rodar a expulsão a cada inserção).
+    Retorna quantas entradas foram apagadas.
+    """
+    max_entries = settings.EMBEDDING_CACHE_MAX_ENTRIES
+    try:
+        with db.engine.begin() as connection:
+            total = connection.execute(db.select(db.func.count(EmbeddingCache.key))).scalar()
+            if total <= max_entries:
+                return 0
+            excess = total - int(max_entries * 0.9)
+            oldest = db.select(EmbeddingCache.key).order_by(
+                EmbeddingCache.last_used_at.asc()
+            ).limit(excess).subquery()
+            deleted = connection.execute(
+                db.delete(EmbeddingCache).where(EmbeddingCache.key.in_(db.select(oldest.c.key)))
+            ).rowcount
+    except Exception as e:
+        print(f"Erro ao limpar o cache de embeddings: {e}")
+        return 0
+
+    _count("evicted", deleted)
+    return deleted
@@ -0,0 +1,178 @@
+# /app/services/embedding_client.py
+
+import random
+import threading
+import time
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from app.core.config import settings
+from app.core.genai import get_genai
+from app.core.lazy import lazy_import
+
+google_exceptions = lazy_import("google.api_core.exceptions")
+
+
+@lru_cache(maxsize=None)
+def retryable_errors():
+    """
+    Erros transitórios da API que valem uma nova tentativa
+    (cota estourada, serviço indisponível, timeout, erro interno).
+    É uma função para o google.api_core só ser importado quando preciso.
+    """
+    return (
+        google_exceptions.TooManyRequests,
+        google_exceptions.ResourceExhausted,
+        google_exceptions.ServiceUnavailable,
+        google_exceptions.DeadlineExceeded,
+        google_exceptions.InternalServerError,
+    )
+
+
+def gemini_embed(texts: list, model: str, task_type: str):
+    """Provedor padrão: uma chamada ao embed_content do Gemini para um lote."""
+    result = get_genai().embed_content(model=model, content=texts, task_type=task_type)
+    return result['embedding']
+
+
+class FakeEmbedder:
+    """
+    Provedor local para testes e benchmarks offline.
+    Gera vetores determinísticos a partir do texto, simula a latência da
+    API e, opcionalmente, uma fração de respostas 429.
+    """
+
+    def __init__(self, dimension: int = 768, latency: float = 0.0, per_item_latency: float = 0.0, failure_rate: float = 0.0, seed: int = 0):
+        self.dimension = dimension
+        self.latency = latency
+        self.per_item_latency = per_item_latency
+        self.failure_rate = failure_rate
+        self.calls = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _vector(self, text: str):
+        digest = hashlib.sha256(text.encode("utf-8")).digest()
+        return [(digest[i % len(digest)] - 127.5) / 127.5 for i in range(self.dimension)]
+
+    def __call__(self, texts: list, model: str, task_type: str):
+        with self._lock:
+            self.calls += 1
+            fail = self._rng.random() < self.failure_rate
+        time.sleep(self.latency + self.per_item_latency * len(texts))
+        if fail:
+            raise google_exceptions.ResourceExhausted("Fake: cota excedida")
+        return [self._vector(text) for text in texts]
+
+
+class EmbeddingClient:
+    """
+    Cliente de embeddings em lote.
+    - Divide a entrada em lotes limitados por número de itens e de caracteres;
+    - Envia até 'max_concurrency' lotes ao mesmo tempo num pool de threads
+      (o pool é compartilhado, então o limite vale para o processo todo);
+    - Repete lotes que falharam com erro transitório, com backoff exponencial
+      e jitter;
+    - Devolve os vetores na mesma ordem da entrada.
+    """
+
+    def __init__(self, embed_fn=gemini_embed, max_batch_items: int = 100, max_batch_chars: int = 60000,
+                 max_concurrency: int = 4, max_retries: int = 5, base_delay: float = 0.5, max_delay: float = 30.0):
+        self.embed_fn = embed_fn
+        self.max_batch_items = max_batch_items
+        self.max_batch_chars = max_batch_chars
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="embedding")
+        self._stats = {"requests": 0, "retries": 0, "failures": 0, "items": 0}
+        self._stats_lock = threading.Lock()
+
+    def stats(self):
+        """Contadores de chamadas, novas tentativas e falhas definitivas."""
+        with self._stats_lock:
+            return dict(self._stats)
+
+    def _count(self, name: str, amount: int = 1):
+        with self._stats_lock:
+            self._stats[name] += amount
+
+    def split_batches(self, texts: list):
+        """Divide os textos em lotes respeitando os limites de itens e caracteres."""
+        batches = []
+        batch, batch_chars = [], 0
+        for text in texts:
+            if batch and (len(batch) >= self.max_batch_items or batch_chars + len(text) > self.max_batch_chars):
+                batches.append(batch)
+                batch, batch_chars = [], 0
+            batch.append(text)
+            batch_chars += len(text)
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def _embed_batch(self, batch: list, model: str, task_type: str):
+        """Envia um lote, repetindo em caso de erro transitório."""
+        for attempt in range(self.max_retries + 1):
+            self._count("requests")
+            try:
+                vectors = self.embed_fn(batch, model=model, task_type=task_type)
+                self._count("items", len(batch))
+                return vectors
+            except retryable_errors() as e:
+                if attempt == self.max_retries:
+                    self._count("failures")
+                    raise
+                self._count("retries")
+                # Backoff exponencial com "full jitter": espera um tempo aleatório
+                # entre 0 e base * 2^tentativa (limitado a max_delay)
+                delay = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+                print(f"Embedding: erro transitório ({type(e).__name__}), nova tentativa em {delay:.2f}s")
+                time.sleep(delay)
+
+    def embed(self, texts: list, model: str, task_type: str):
+        """Gera os embeddings de 'texts', na mesma ordem da entrada."""
+        batches = self.split_batches(texts)
+        if len(batches) == 1:
+            # Um lote só: chama direto, sem passar pelo pool
+            return self._embed_batch(batches[0], model, task_type)
+        futures = [self._executor.submit(self._embed_batch, batch, model, task_type) for batch in batches]
+        try:
+            vectors = []
+            for future in futures:
+                vectors.extend(future.result())
+            return vectors
+        finally:
+            # Se um lote falhou de vez, não adianta enviar os que ainda estão na fila
+            for future in futures:
+                future.cancel()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Retorna o cliente de embeddings do processo (criado na primeira chamada)."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            if settings.EMBEDDING_PROVIDER == "fake":
+                embed_fn = FakeEmbedder(latency=settings.FAKE_EMBEDDING_LATENCY)
+            else:
+                embed_fn = gemini_embed
+            _client = EmbeddingClient(
+                embed_fn=embed_fn,
+                max_batch_items=settings.EMBEDDING_BATCH_MAX_ITEMS,
+                max_batch_chars=settings.EMBEDDING_BATCH_MAX_CHARS,
+                max_concurrency=settings.EMBEDDING_MAX_CONCURRENCY,
+                max_retries=settings.EMBEDDING_MAX_RETRIES,
+            )
+        return _client
+
+
+def set_client(client):
+    """Troca o cliente do processo (ex: por um com FakeEmbedder em benchmarks)."""
+    global _client
+    with _client_lock:
+        _client = client
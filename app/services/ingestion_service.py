@@ -0,0 +1,172 @@
+# /app/services/ingestion_service.py
+
+import datetime
+import os
+import uuid
+from flask import current_app
+from werkzeug.datastructures import FileStorage
+from werkzeug.utils import secure_filename
+from app.extensions import db
+from app.core import metrics
+from app.models.ingestion_job_model import IngestionJob
+from app.schemas.ingestion_job_schema import ingestion_job_schema
+from app.services import rag_service
+
+
+def enqueue_document(file_storage, user_id: int):
+    """
+    Salva o upload em disco e cria um job de ingestão na fila.
+    Retorna (job serializado, nome do documento duplicado):
+    - se o usuário já tem um documento com o mesmo conteúdo (SHA-256),
+      nenhum job é criado e o job vem None;
+    - se já existe um job ativo do usuário com o mesmo conteúdo, ele é
+      devolvido em vez de criar outro.
+    """
+    upload_dir = current_app.config['INGESTION_UPLOAD_DIR']
+    os.makedirs(upload_dir, exist_ok=True)
+    # Nome único em disco (o nome original fica só no job)
+    file_path = os.path.join(upload_dir, f"{uuid.uuid4().hex}_{secure_filename(file_storage.filename)}")
+
+    try:
+        with metrics.stage("upload_save"):
+            file_storage.save(file_path)
+        with metrics.stage("hash"), open(file_path, 'rb') as f:
+            content_hash = rag_service.compute_content_hash(f)
+
+        # 1. Mesmo conteúdo já ingerido por este usuário: retorna na hora
+        existing = rag_service.find_document_by_hash(content_hash, user_id=user_id)
+        if existing:
+            _remove_file(file_path)
+            return None, existing.name
+
+        # 2. Mesmo conteúdo já na fila: reaproveita o job
+        active_job = IngestionJob.query.filter(
+            IngestionJob.user_id == user_id,
+            IngestionJob.content_hash == content_hash,
+            IngestionJob.status.in_([IngestionJob.QUEUED, IngestionJob.RUNNING])
+        ).first()
+        if active_job:
+            _remove_file(file_path)
+            return ingestion_job_schema.dump(active_job), None
+
+        # 3. Conteúdo novo: cria o job
+        job = IngestionJob(
+            doc_name=file_storage.filename,
+            file_path=file_path,
+            content_hash=content_hash,
+            user_id=user_id
+        )
+        db.session.add(job)
+        with metrics.stage("commit"):
+            db.session.commit()
+        return ingestion_job_schema.dump(job), None
+    except Exception as e:
+        db.session.rollback()
+        _remove_file(file_path)
+        print(f"Erro ao enfileirar documento: {e}")
+        raise Exception(f"Falha ao enfileirar o documento: {str(e)}")
+
+
+def get_job(job_id: str, user_id: int):
+    """
+    Busca um job de ingestão, garantindo que ele pertence ao usuário.
+    """
+    try:
+        job = IngestionJob.query.filter_by(id=job_id, user_id=user_id).first()
+        return ingestion_job_schema.dump(job) if job else None
+    except Exception as e:
+        raise Exception(f"Erro ao buscar job de ingestão: {str(e)}")
+
+
+def claim_next_job():
+    """
+    Pega o próximo job disponível e o marca como 'running'.
+    Disponível = 'queued', ou 'running' com heartbeat mais velho que o lease
+    (o worker que o pegou morreu ou foi reiniciado).
+    No Postgres, 'FOR UPDATE SKIP LOCKED' garante que dois workers nunca
+    peguem o mesmo job.
+    """
+    lease = datetime.timedelta(seconds=current_app.config['INGESTION_LEASE_SECONDS'])
+    stale_before = datetime.datetime.utcnow() - lease
+    try:
+        job = IngestionJob.query.filter(
+            db.or_(
+                IngestionJob.status == IngestionJob.QUEUED,
+                db.and_(
+                    IngestionJob.status == IngestionJob.RUNNING,
+                    IngestionJob.updated_at < stale_before
+                )
+            )
+        ).order_by(IngestionJob.created_at.asc()).with_for_update(skip_locked=True).first()
+
+        if not job:
+            db.session.rollback() # Libera a transação aberta pela consulta
+            return None
+
+        # UPDATE condicional: só vale se ninguém mudou o job desde a leitura.
+        # Garante a exclusividade também em bancos sem SKIP LOCKED (ex: SQLite).
+        claimed = IngestionJob.query.filter_by(
+            id=job.id, status=job.status, updated_at=job.updated_at
+        ).update({
+            "status": IngestionJob.RUNNING,
+            "attempts": IngestionJob.attempts + 1,
+            "updated_at": datetime.datetime.utcnow(),
+        }, synchronize_session=False)
+        db.session.commit()
+        if claimed != 1:
+            return None # Outro worker pegou o job primeiro
+        db.session.refresh(job)
+        return job
+    except Exception as e:
+        db.session.rollback()
+        print(f"Erro ao buscar próximo job de ingestão: {e}")
+        return None
+
+
+def run_job(job):
+    """
+    Executa a ingestão de um job já marcado como 'running', atualizando o
+    progresso no banco a cada lote processado.
+    """
+    def save_progress(stats):
+        job.pages_parsed = stats['pages_parsed']
+        job.chunks_embedded = stats['chunks_embedded']
+        job.chunks_stored = stats['chunks_stored']
+        job.updated_at = datetime.datetime.utcnow()
+        db.session.commit()
+
+    try:
+        with metrics.stage("ingestion_job"), open(job.file_path, 'rb') as f:
+            message = rag_service.process_and_store_document(
+                file_storage=FileStorage(stream=f, filename=job.doc_name),
+                user_id=job.user_id,
+                progress=save_progress,
+                content_hash=job.content_hash
+            )
+        job.status = IngestionJob.DONE
+        job.result = message
+        job.error = None
+    except Exception as e:
+        db.session.rollback()
+        print(f"Erro no job de ingestão {job.id}: {e}")
+        job.error = str(e)
+        # Volta para a fila até esgotar as tentativas
+        if job.attempts < current_app.config['INGESTION_MAX_ATTEMPTS']:
+            job.status = IngestionJob.QUEUED
+        else:
+            job.status = IngestionJob.FAILED
+
+    metrics.count("ingestion_jobs_total", status=job.status)
+    if job.status in (IngestionJob.DONE, IngestionJob.FAILED):
+        job.finished_at = datetime.datetime.utcnow()
+        _remove_file(job.file_path)
+    job.updated_at = datetime.datetime.utcnow()
+    db.session.commit()
+
+
+def _remove_file(file_path: str):
+    """Apaga o arquivo temporário do upload (ignora se já não existir)."""
+    try:
+        os.remove(file_path)
+    except OSError:
+        pass
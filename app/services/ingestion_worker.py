@@ -0,0 +1,83 @@
+# /app/services/ingestion_worker.py
+
+import threading
+from app.extensions import db
+from app.services import ingestion_service
+
+
+class IngestionWorkerPool:
+    """
+    Pool local de threads que consome a fila de ingestão (tabela ingestion_jobs).
+    Não precisa de broker externo: os workers fazem polling no banco e são
+    acordados na hora quando um upload é enfileirado neste mesmo processo.
+
+    Só funciona num único host: o arquivo do upload fica no disco local
+    (INGESTION_UPLOAD_DIR) e qualquer processo com o pool pode pegar o job.
+    Com mais de uma máquina, use um disco compartilhado ou rode a ingestão
+    só num host (INGESTION_WORKERS=0 nos outros e 'flask ingestion-worker').
+    """
+
+    def __init__(self):
+        self.app = None
+        self.threads = []
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def started(self):
+        return bool(self.threads)
+
+    def start(self, app, num_workers=None):
+        """Inicia as threads (só na primeira chamada; as seguintes não fazem nada)."""
+        with self._lock:
+            if self.threads:
+                return
+            self.app = app
+            self._stop.clear()
+            num_workers = num_workers or app.config['INGESTION_WORKERS']
+            for i in range(num_workers):
+                thread = threading.Thread(target=self._run, name=f"ingestion-worker-{i}", daemon=True)
+                thread.start()
+                self.threads.append(thread)
+            print(f"Pool de ingestão iniciado com {num_workers} worker(s).")
+
+    def notify(self):
+        """Acorda os workers (chamado depois de enfileirar um job)."""
+        self._wakeup.set()
+
+    def stop(self, timeout=None):
+        """Pede para as threads pararem e espera elas terminarem o job atual."""
+        self._stop.set()
+        self._wakeup.set()
+        for thread in self.threads:
+            thread.join(timeout)
+        self.threads = []
+
+    def join(self):
+        """Bloqueia até o pool ser parado (usado pelo comando de CLI)."""
+        for thread in list(self.threads):
+            thread.join()
+
+    def _run(self):
+        poll_interval = self.app.config['INGESTION_POLL_INTERVAL']
+        while not self._stop.is_set():
+            job = None
+            # Um app context por iteração => uma sessão do SQLAlchemy limpa por job
+            with self.app.app_context():
+                try:
+                    job = ingestion_service.claim_next_job()
+                    if job:
+                        ingestion_service.run_job(job)
+                except Exception as e:
+                    # Não deixa a thread morrer; o job volta pela expiração do lease
+                    print(f"Erro no worker de ingestão: {e}")
+                finally:
+                    db.session.remove()
+            if not job:
+                # Fila vazia: espera um novo upload ou o próximo polling
+                self._wakeup.wait(poll_interval)
+                self._wakeup.clear()
+
+
+ingestion_pool = IngestionWorkerPool()
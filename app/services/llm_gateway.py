@@ -0,0 +1,418 @@
+# /app/services/llm_gateway.py
+
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from app.core.config import settings
+from app.core.genai import get_genai
+from app.services.embedding_client import retryable_errors, google_exceptions
+
+
+class LLMError(Exception):
+    """Falha ao gerar uma resposta com o modelo."""
+
+
+class LLMTimeoutError(LLMError):
+    """O modelo não respondeu dentro do prazo."""
+
+
+class LLMUnavailableError(LLMError):
+    """Circuito aberto: o provedor falhou demais recentemente e as chamadas são recusadas na hora."""
+
+
+# --- Provedor fake (testes e benchmarks offline) ---
+
+class _FakeChunk:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class _FakeResponse:
+    """Resposta no formato do Gemini: '.text' completo ou iteração por chunks (stream=True)."""
+
+    def __init__(self, text: str, first_token_latency: float, token_latency: float, stream: bool):
+        self._words = text.split(" ")
+        self._first_token_latency = first_token_latency
+        self._token_latency = token_latency
+        if not stream:
+            time.sleep(first_token_latency + token_latency * len(self._words))
+        self.text = text
+
+    def __iter__(self):
+        time.sleep(self._first_token_latency)
+        for i, word in enumerate(self._words):
+            if i:
+                time.sleep(self._token_latency)
+            yield _FakeChunk(word if i == 0 else " " + word)
+
+
+class _FakeChatSession:
+    def __init__(self, model, history):
+        self.model = model
+        self.history = list(history or [])
+
+    def send_message(self, content, stream: bool = False, request_options=None):
+        self.history.append({"role": "user", "parts": [content]})
+        response = self.model.generate_content(content, stream=stream, request_options=request_options)
+        self.history.append({"role": "model", "parts": [response.text]})
+        return response
+
+
+class FakeChatModel:
+    """
+    Modelo local para testes e benchmarks offline, com a mesma interface
+    usada do GenerativeModel (start_chat/send_message/generate_content,
+    com ou sem stream). Responde um texto determinístico e simula o tempo
+    até o primeiro token, o tempo entre tokens e, opcionalmente, uma
+    fração de respostas lentas (cauda) ou de erros 503.
+    """
+
+    def __init__(self, model_name: str = "fake", system_instruction: str = None, first_token_latency: float = 0.0,
+                 token_latency: float = 0.0, words: int = 40, slow_rate: float = 0.0, slow_latency: float = 0.0,
+                 failure_rate: float = 0.0, seed: int = 0):
+        self.model_name = model_name
+        self.system_instruction = system_instruction
+        self.first_token_latency = first_token_latency
+        self.token_latency = token_latency
+        self.words = words
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        self.failure_rate = failure_rate
+        self.calls = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _answer(self, content):
+        seed = str(content)[-40:].split()
+        return " ".join(seed[i % len(seed)] if seed else "ok" for i in range(self.words))
+
+    def generate_content(self, content, stream: bool = False, request_options=None):
+        with self._lock:
+            self.calls += 1
+            slow = self._rng.random() < self.slow_rate
+            fail = self._rng.random() < self.failure_rate
+        if fail:
+            time.sleep(self.first_token_latency)
+            raise google_exceptions.ServiceUnavailable("Fake: modelo indisponível")
+        first_token_latency = self.first_token_latency + (self.slow_latency if slow else 0.0)
+        return _FakeResponse(self._answer(content), first_token_latency, self.token_latency, stream)
+
+    def start_chat(self, history=None):
+        return _FakeChatSession(self, history)
+
+
+# --- Proteções ---
+
+class CircuitBreaker:
+    """
+    Disjuntor: depois de 'failure_threshold' falhas seguidas, abre por
+    'reset_timeout' segundos e recusa as chamadas na hora (sem ocupar um
+    worker esperando um provedor fora do ar). Passado o tempo, deixa uma
+    chamada de teste passar (meio-aberto): sucesso fecha, falha reabre.
+
+    Quem recebeu a chamada de teste tem que resolvê-la (record_success,
+    record_failure ou release). Se ela se perder mesmo assim, depois de
+    'probe_timeout' segundos outra chamada pode testar o provedor, então o
+    disjuntor nunca fica preso no meio-aberto.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold: int, reset_timeout: float, probe_timeout: float = None):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.probe_timeout = reset_timeout if probe_timeout is None else probe_timeout
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_started = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """True se a chamada pode seguir."""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            now = time.monotonic()
+            if (
+                (self.state == self.OPEN and now - self._opened_at >= self.reset_timeout)
+                or (self.state == self.HALF_OPEN and now - self._probe_started >= self.probe_timeout)
+            ):
+                # Só a primeira chamada depois do tempo de espera testa o provedor
+                self.state = self.HALF_OPEN
+                self._probe_started = now
+                return True
+            return False
+
+    def release(self):
+        """
+        A chamada terminou sem dizer nada sobre o provedor (ex: o cliente
+        desconectou no meio do stream). Se era a chamada de teste, a próxima
+        chamada testa de novo, sem esperar outro reset_timeout.
+        """
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self.state = self.OPEN
+                self._opened_at = time.monotonic() - self.reset_timeout
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self.state = self.CLOSED
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+
+class LatencyTracker:
+    """Janela das últimas latências de sucesso, para calcular o atraso do pedido 'hedge'."""
+
+    def __init__(self, window: int = 200):
+        self._values = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._values.append(seconds)
+
+    def percentile(self, p: float, min_samples: int = 20):
+        """Percentil das latências recentes, ou None se ainda houver poucas amostras."""
+        with self._lock:
+            if len(self._values) < min_samples:
+                return None
+            ordered = sorted(self._values)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+
+# --- Gateway ---
+
+class LLMGateway:
+    """
+    Ponto único de acesso ao modelo de geração:
+      - reutiliza as instâncias de modelo (uma por modelo + instrução de sistema);
+      - aplica um prazo por chamada (o worker volta a tempo mesmo se o provedor travar);
+      - opcionalmente envia um segundo pedido igual ("hedge") se o primeiro
+        passar do p95 recente, e fica com a primeira resposta;
+      - usa um disjuntor para falhar rápido durante quedas do provedor.
+    """
+
+    def __init__(self, model_factory, timeout: float, hedge_enabled: bool, hedge_delay: float,
+                 hedge_percentile: float, breaker: CircuitBreaker, max_concurrency: int):
+        self.model_factory = model_factory
+        self.timeout = timeout
+        self.hedge_enabled = hedge_enabled
+        self.hedge_delay = hedge_delay
+        self.hedge_percentile = hedge_percentile
+        self.breaker = breaker
+        self.latencies = LatencyTracker()
+        self._models = {}
+        self._models_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="llm")
+        self._stats = {"calls": 0, "hedged": 0, "hedge_wins": 0, "timeouts": 0, "failures": 0, "rejected": 0}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, key: str):
+        with self._stats_lock:
+            self._stats[key] += 1
+
+    def get_model(self, model_name: str, system_instruction: str = None):
+        """Instância reutilizada do modelo (criada na primeira chamada)."""
+        key = (model_name, system_instruction)
+        with self._models_lock:
+            model = self._models.get(key)
+            if model is None:
+                model = self._models[key] = self.model_factory(model_name=model_name, system_instruction=system_instruction)
+        return model
+
+    def _current_hedge_delay(self):
+        observed = self.latencies.percentile(self.hedge_percentile)
+        return observed if observed is not None else self.hedge_delay
+
+    def _check_breaker(self):
+        if not self.breaker.allow():
+            self._count("rejected")
+            raise LLMUnavailableError("Modelo indisponível no momento (circuito aberto).")
+
+    def _call(self, fn, timeout: float = None):
+        """
+        Executa fn() no pool com prazo e, se habilitado, um pedido 'hedge'.
+        Um erro transitório (503, 429...) ganha uma nova tentativa se ainda
+        houver prazo. Retorna o resultado da primeira tentativa que der certo.
+        """
+        self._check_breaker()
+        self._count("calls")
+        timeout = self.timeout if timeout is None else timeout
+        start = time.monotonic()
+        deadline = start + timeout
+
+        pending = {self._executor.submit(fn): False} # future -> é o pedido 'hedge'?
+        hedge_at = start + self._current_hedge_delay() if self.hedge_enabled else None
+        retries_left = 1
+        error = None
+        while pending:
+            now = time.monotonic()
+            if now >= deadline:
+                break
+            wake_at = min(deadline, hedge_at) if hedge_at else deadline
+            done, _ = wait(list(pending), timeout=max(0.0, wake_at - now), return_when=FIRST_COMPLETED)
+            for future in done:
+                is_hedge = pending.pop(future)
+                try:
+                    result = future.result()
+                except retryable_errors() as e:
+                    error = e
+                    if not pending and retries_left and time.monotonic() < deadline:
+                        retries_left -= 1
+                        pending[self._executor.submit(fn)] = is_hedge
+                    continue
+                except Exception as e:
+                    # Erro do pedido (ex: argumento inválido), não do provedor: não tenta de novo.
+                    # O provedor respondeu, então para o disjuntor conta como sucesso
+                    for other in pending:
+                        other.cancel()
+                    self.breaker.record_success()
+                    self._count("failures")
+                    raise LLMError(f"Falha ao chamar o modelo: {e}") from e
+                for other in pending:
+                    other.cancel()
+                self.latencies.record(time.monotonic() - start)
+                self.breaker.record_success()
+                if is_hedge:
+                    self._count("hedge_wins")
+                return result
+            if hedge_at and pending and time.monotonic() >= hedge_at:
+                # O primeiro pedido passou do p95 recente: dispara uma cópia
+                hedge_at = None
+                self._count("hedged")
+                pending[self._executor.submit(fn)] = True
+
+        # Prazo estourado ou todas as tentativas falharam
+        for future in pending:
+            future.cancel()
+        self.breaker.record_failure()
+        if pending or error is None:
+            self._count("timeouts")
+            raise LLMTimeoutError(f"O modelo não respondeu em {timeout:.1f}s.")
+        self._count("failures")
+        raise LLMError(f"Falha ao chamar o modelo: {error}") from error
+
+    def chat(self, model_name: str, system_instruction: str, history, message: str, timeout: float = None):
+        """Envia 'message' numa conversa com 'history' e retorna o texto da resposta."""
+        model = self.get_model(model_name, system_instruction)
+        request_options = {"timeout": timeout or self.timeout}
+
+        def call():
+            return model.start_chat(history=history).send_message(message, request_options=request_options).text
+
+        return self._call(call, timeout)
+
+    def generate(self, model_name: str, system_instruction: str, prompt: str, timeout: float = None):
+        """Geração simples (sem conversa), ex: atualização do resumo da sessão."""
+        model = self.get_model(model_name, system_instruction)
+        request_options = {"timeout": timeout or self.timeout}
+        return self._call(lambda: model.generate_content(prompt, request_options=request_options).text, timeout)
+
+    def stream_chat(self, model_name: str, system_instruction: str, history, message: str, timeout: float = None):
+        """
+        Versão em streaming de chat(): gerador dos pedaços de texto. Sem
+        hedge (a resposta já está sendo entregue), mas com disjuntor e com
+        o prazo verificado a cada pedaço.
+        """
+        self._check_breaker()
+        self._count("calls")
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        model = self.get_model(model_name, system_instruction)
+        try:
+            response = model.start_chat(history=history).send_message(
+                message, stream=True, request_options={"timeout": timeout}
+            )
+            for chunk in response:
+                if time.monotonic() > deadline:
+                    self._count("timeouts")
+                    raise LLMTimeoutError(f"O modelo não terminou a resposta em {timeout:.1f}s.")
+                try:
+                    text = chunk.text
+                except ValueError:
+                    # Chunk sem texto (ex: só metadados de segurança)
+                    continue
+                if text:
+                    yield text
+        except GeneratorExit:
+            # Cliente desconectou: não conta como falha do provedor (libera a chamada de teste, se era ela)
+            self.breaker.release()
+            raise
+        except LLMTimeoutError:
+            self.breaker.record_failure()
+            raise
+        except retryable_errors() as e:
+            self._count("failures")
+            self.breaker.record_failure()
+            raise LLMError(f"Falha ao chamar o modelo: {e}") from e
+        except Exception as e:
+            # Erro do pedido, não do provedor: o provedor respondeu, conta como sucesso
+            self.breaker.record_success()
+            self._count("failures")
+            raise LLMError(f"Falha ao chamar o modelo: {e}") from e
+        self.breaker.record_success()
+
+    def stats(self):
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["breaker"] = self.breaker.state
+        stats["hedge_delay"] = self._current_hedge_delay()
+        return stats
+
+
+def _default_model_factory(model_name: str, system_instruction: str = None):
+    if settings.CHAT_PROVIDER == "fake":
+        return FakeChatModel(
+            model_name=model_name,
+            system_instruction=system_instruction,
+            first_token_latency=settings.FAKE_CHAT_FIRST_TOKEN_LATENCY,
+            token_latency=settings.FAKE_CHAT_TOKEN_LATENCY,
+        )
+    return get_genai().GenerativeModel(model_name=model_name, system_instruction=system_instruction)
+
+
+_gateway = None
+_gateway_lock = threading.Lock()
+
+
+def build_gateway(model_factory=None):
+    """Cria um gateway com as configurações do app (CHAT_PROVIDER e LLM_*)."""
+    return LLMGateway(
+        model_factory=model_factory or _default_model_factory,
+        timeout=settings.LLM_TIMEOUT,
+        hedge_enabled=settings.LLM_HEDGE_ENABLED,
+        hedge_delay=settings.LLM_HEDGE_DELAY,
+        hedge_percentile=settings.LLM_HEDGE_PERCENTILE,
+        # A chamada de teste pode levar até o prazo de uma chamada
+        breaker=CircuitBreaker(
+            settings.LLM_BREAKER_FAILURES, settings.LLM_BREAKER_RESET_SECONDS,
+            probe_timeout=max(settings.LLM_TIMEOUT, settings.LLM_BREAKER_RESET_SECONDS)
+        ),
+        max_concurrency=settings.LLM_MAX_CONCURRENCY,
+    )
+
+
+def get_gateway():
+    """Retorna o gateway do processo (criado na primeira chamada)."""
+    global _gateway
+    with _gateway_lock:
+        if _gateway is None:
+            _gateway = build_gateway()
+    return _gateway
+
+
+def set_gateway(gateway):
+    """Troca o gateway do processo (ex: por um com FakeChatModel em testes e benchmarks)."""
+    global _gateway
+    with _gateway_lock:
+        _gateway = gateway
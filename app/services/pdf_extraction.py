@@ -0,0 +1,124 @@
+# /app/services/pdf_extraction.py
+
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from app.core.config import settings
+from app.core.lazy import lazy_import
+
+pypdf = lazy_import("pypdf")
+
+# Pools de processos reutilizados entre documentos (um por número de workers).
+# São criados sob demanda, então cada worker do Gunicorn cria os seus depois do fork.
+_executors = {}
+_executors_lock = threading.Lock()
+
+# Cache do PdfReader dentro de cada processo do pool: as faixas de páginas do
+# mesmo documento caem no mesmo processo várias vezes e não precisam reabrir o arquivo.
+_worker_reader = {"key": None, "reader": None}
+
+
+def _default_workers():
+    """Número de processos quando PDF_EXTRACT_WORKERS não é definido (0 = automático)."""
+    return settings.PDF_EXTRACT_WORKERS or os.cpu_count() or 1
+
+
+def _get_executor(workers: int):
+    """Retorna (criando se preciso) o pool de processos com 'workers' processos."""
+    with _executors_lock:
+        executor = _executors.get(workers)
+        if executor is None:
+            # forkserver: não herda threads nem conexões abertas do processo web
+            ctx = multiprocessing.get_context("forkserver")
+            ctx.set_forkserver_preload([__name__, "pypdf"])
+            executor = ProcessPoolExecutor(max_workers=workers, mp_context=ctx)
+            _executors[workers] = executor
+        return executor
+
+
+def _extract_range(path: str, start: int, end: int):
+    """Extrai o texto das páginas [start, end) (roda dentro do processo do pool)."""
+    stat = os.stat(path)
+    key = (path, stat.st_mtime_ns, stat.st_size)
+    if _worker_reader["key"] != key:
+        _worker_reader["key"] = key
+        _worker_reader["reader"] = pypdf.PdfReader(path)
+    pages = _worker_reader["reader"].pages
+    return [pages[i].extract_text() or "" for i in range(start, end)]
+
+
+def _iter_serial(reader):
+    """Extrai as páginas uma a uma no processo atual."""
+    for page in reader.pages:
+        yield page.extract_text() or "" # Garante que é string
+
+
+def _iter_parallel(path: str, num_pages: int, workers: int):
+    """
+    Distribui faixas de páginas entre os processos do pool e devolve o texto
+    na ordem original. Só 2 faixas por worker ficam em voo ao mesmo tempo,
+    para a memória continuar limitada em documentos enormes.
+    """
+    executor = _get_executor(workers)
+    per_task = settings.PDF_PAGES_PER_TASK
+    ranges = iter([(start, min(start + per_task, num_pages)) for start in range(0, num_pages, per_task)])
+    pending = deque()
+
+    def submit_next():
+        page_range = next(ranges, None)
+        if page_range:
+            pending.append(executor.submit(_extract_range, path, *page_range))
+
+    try:
+        for _ in range(workers * 2):
+            submit_next()
+        while pending:
+            texts = pending.popleft().result()
+            submit_next()
+            yield from texts
+    finally:
+        # Se o consumidor parar no meio (ex: erro no embedding), cancela o resto
+        for future in pending:
+            future.cancel()
+
+
+def _local_path(stream):
+    """
+    Retorna (caminho, é_temporário) de um arquivo em disco com o conteúdo do stream.
+    Se o stream já é um arquivo com caminho (ex: upload salvo pela fila de
+    ingestão), usa ele direto; senão copia em blocos para um arquivo temporário.
+    """
+    name = getattr(stream, "name", None)
+    if isinstance(name, str) and os.path.isfile(name):
+        return name, False
+    stream.seek(0)
+    with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as tmp:
+        shutil.copyfileobj(stream, tmp)
+    return tmp.name, True
+
+
+def iter_pages(stream, workers=None):
+    """
+    Gera o texto de cada página do PDF, na ordem.
+    Abaixo de PDF_PARALLEL_MIN_PAGES páginas (ou com 1 worker) a extração é
+    feita no processo atual, evitando o custo de falar com o pool; acima
+    disso as páginas são divididas entre um ProcessPoolExecutor.
+    """
+    workers = workers or _default_workers()
+    reader = pypdf.PdfReader(stream)
+    num_pages = len(reader.pages)
+
+    if workers <= 1 or num_pages < settings.PDF_PARALLEL_MIN_PAGES:
+        yield from _iter_serial(reader)
+        return
+
+    path, is_temp = _local_path(stream)
+    try:
+        yield from _iter_parallel(path, num_pages, workers)
+    finally:
+        if is_temp:
+            os.remove(path)
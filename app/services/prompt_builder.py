@@ -0,0 +1,89 @@
+# /app/services/prompt_builder.py
+
+import math
+import re
+from app.core.config import settings
+
+# Palavras e sinais de pontuação, como um tokenizador de subpalavras os separaria
+TOKEN_RE = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+# Caracteres por token de uma palavra longa (subpalavras)
+CHARS_PER_TOKEN = 4
+
+NO_CONTEXT = "Nenhum contexto encontrado no material de estudo."
+
+
+def count_tokens(text: str):
+    """
+    Estimativa local (sem chamar a API) do número de tokens de um texto:
+    cada palavra conta ceil(len/4) tokens (mínimo 1) e cada sinal de
+    pontuação conta 1. Erra para mais em português, o que é o lado seguro
+    para um orçamento.
+    """
+    return sum(max(1, math.ceil(len(piece) / CHARS_PER_TOKEN)) for piece in TOKEN_RE.findall(text))
+
+
+def format_prompt(context_string: str, question: str, summary: str = None):
+    prompt = f"---\nCONTEXTO FORNECIDO:\n{context_string}\n---\n\nPERGUNTA DO ALUNO:\n{question}"
+    if summary:
+        prompt = f"---\nRESUMO DA CONVERSA ATÉ AQUI:\n{summary}\n" + prompt
+    return prompt
+
+
+def build_prompt(system_instruction: str, history, contexts, question: str, budget: int = None, context_share: float = None,
+                 summary: str = None):
+    """
+    Monta a entrada do Gemini dentro de um orçamento de tokens.
+
+    A instrução de sistema, o resumo da sessão (se houver) e a pergunta
+    sempre entram. Do que sobra, até 'context_share' vai para os chunks do
+    RAG (na ordem de relevância, inteiros) e o resto para o histórico, que
+    é cortado das mensagens mais antigas para as mais novas. 'history' é a lista de mensagens no formato
+    do Gemini ({"role", "parts"}), da mais antiga para a mais nova.
+
+    Retorna (histórico mantido, prompt aumentado, relatório do que foi cortado).
+    """
+    budget = settings.CHAT_TOKEN_BUDGET if budget is None else budget
+    context_share = settings.CHAT_CONTEXT_SHARE if context_share is None else context_share
+
+    fixed_tokens = count_tokens(system_instruction) + count_tokens(format_prompt("", question, summary))
+    available = max(0, budget - fixed_tokens)
+
+    # --- 1. Contexto: chunks inteiros, do mais relevante para o menos ---
+    context_budget = int(available * context_share)
+    kept_contexts = []
+    context_tokens = 0
+    for text in contexts:
+        tokens = count_tokens(text)
+        if context_tokens + tokens > context_budget:
+            continue
+        kept_contexts.append(text)
+        context_tokens += tokens
+    context_string = "\n\n".join(kept_contexts) if kept_contexts else NO_CONTEXT
+
+    # --- 2. Histórico: o que sobrou, das mensagens mais novas para as mais antigas ---
+    history_budget = available - context_tokens
+    kept_history = []
+    history_tokens = 0
+    for message in reversed(history):
+        tokens = sum(count_tokens(part) for part in message["parts"])
+        if history_tokens + tokens > history_budget:
+            break
+        kept_history.append(message)
+        history_tokens += tokens
+    kept_history.reverse()
+    # O histórico do Gemini começa com uma mensagem do usuário
+    while kept_history and kept_history[0]["role"] != "user":
+        history_tokens -= sum(count_tokens(part) for part in kept_history.pop(0)["parts"])
+
+    report = {
+        "budget": budget,
+        "tokens": fixed_tokens + context_tokens + history_tokens,
+        "fixed_tokens": fixed_tokens,
+        "context_tokens": context_tokens,
+        "history_tokens": history_tokens,
+        "contexts_kept": len(kept_contexts),
+        "contexts_dropped": len(contexts) - len(kept_contexts),
+        "messages_kept": len(kept_history),
+        "messages_dropped": len(history) - len(kept_history),
+    }
+    return kept_history, format_prompt(context_string, question, summary), report
@@ -0,0 +1,84 @@
+# /app/services/query_cache.py
+
+import threading
+import time
+import unicodedata
+from array import array
+from collections import OrderedDict
+from app.core.config import settings
+
+
+def normalize_query(text: str):
+    """
+    Normaliza a pergunta para usar como chave do cache: Unicode NFC,
+    sem diferença de maiúsculas/minúsculas e com espaços colapsados.
+    Assim "O que é  Mitocôndria? " e "o que é mitocôndria?" caem na mesma chave.
+    """
+    return " ".join(unicodedata.normalize("NFC", text).casefold().split())
+
+
+class LRUTTLCache:
+    """
+    Cache LRU em memória com expiração (TTL), seguro para threads.
+    Os vetores ficam guardados como float32 (array), então cada entrada de
+    768 dimensões ocupa ~3 KB e o total fica limitado por 'max_entries'.
+    """
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data = OrderedDict() # chave -> (expira_em, vetor)
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "expired": 0, "evicted": 0}
+
+    def get(self, key: str):
+        """Retorna o vetor (lista) ou None se não estiver no cache ou tiver expirado."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            expires_at, vector = entry
+            if expires_at <= now:
+                del self._data[key]
+                self._stats["expired"] += 1
+                self._stats["misses"] += 1
+                return None
+            # Marca como usado recentemente
+            self._data.move_to_end(key)
+            self._stats["hits"] += 1
+        return vector.tolist()
+
+    def put(self, key: str, vector):
+        """Guarda um vetor, expulsando o menos usado se o cache estiver cheio."""
+        entry = (time.monotonic() + self.ttl, array("f", vector))
+        with self._lock:
+            self._data[key] = entry
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self._stats["evicted"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        """Contadores, taxa de acerto e memória aproximada ocupada pelos vetores."""
+        with self._lock:
+            result = dict(self._stats)
+            result["entries"] = len(self._data)
+            result["approx_bytes"] = sum(
+                len(key) + vector.itemsize * len(vector) for key, (_, vector) in self._data.items()
+            )
+        lookups = result["hits"] + result["misses"]
+        result["hit_rate"] = result["hits"] / lookups if lookups else 0.0
+        return result
+
+
+# Cache de embeddings de perguntas (um por processo)
+query_embedding_cache = LRUTTLCache(
+    max_entries=settings.QUERY_CACHE_MAX_ENTRIES,
+    ttl=settings.QUERY_CACHE_TTL_SECONDS,
+)
@@ -1,118 +1,519 @@
 # /app/services/rag_service.py
 
-import google.generativeai as genai
-from app.extensions import qdrant # Nosso cliente Qdrant
+from app.extensions import db, qdrant # Banco de dados e nosso cliente Qdrant
+from app.models.document_model import Document # Registro de documentos
+from app.models.ingestion_job_model import IngestionJob # Fila de ingestão (checada antes de recriar a coleção)
 from app.core.config import settings # Nossas configurações
-import pypdf
-from io import BytesIO
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+from app.core import metrics # Tempo por etapa e contadores (Server-Timing e /metrics)
+from app.services import pdf_extraction # Extração de texto do PDF (serial ou em paralelo)
+from app.services import embedding_cache # Cache persistente de embeddings
+from app.services import embedding_client # Cliente de embeddings em lote (com retry)
+from app.services.query_cache import query_embedding_cache, normalize_query # Cache de embeddings de perguntas
+from app.services import sparse_encoder # Vetores esparsos BM25 (busca híbrida)
+from app.services import context_selection # Re-ranqueamento MMR do contexto
+from app.core.qdrant_bootstrap import bootstrap_collection, SCHEMA_VERSION, SPARSE_VECTOR_NAME
+from app.core.lazy import lazy_import # Dependências pesadas importadas só no primeiro uso
 import uuid
-# Importa models necessários para delete
-from qdrant_client import models
+import base64
+import hashlib
+import datetime
+import os
+import time
+from sqlalchemy import func
+# Modelos do Qdrant (filtros, pontos, etc.) e o divisor de texto da ingestão
+models = lazy_import("qdrant_client.models")
+text_splitters = lazy_import("langchain_text_splitters")
 
 # Define o nome da coleção que usaremos no Qdrant
 COLLECTION_NAME = settings.QDRANT_COLLECTION_NAME
+# Modelo de embedding usado na ingestão e na busca
+EMBEDDING_MODEL = "models/text-embedding-004"
+# Se a coleção tem o vetor esparso (None = ainda não verificado)
+_sparse_available = None
+_sparse_checked_at = 0.0
+# Um "não" é verificado de novo depois deste tempo (s): a coleção pode ter
+# sido recriada com o vetor esparso por 'flask rebuild-collection' em outro processo
+SPARSE_RECHECK_SECONDS = 60
+# Dimensão dos vetores gerados pelo modelo (a mesma da coleção no Qdrant)
+EMBEDDING_DIM = settings.EMBEDDING_DIM
+DOCUMENT_TASK_TYPE = "RETRIEVAL_DOCUMENT"
 
-def process_and_store_document(file_storage, user_id: int):
+
+def tenant_key(user_id):
+    """Valor do campo 'tenant' do payload (o índice de tenant do Qdrant só aceita keyword)."""
+    return str(user_id)
+
+
+def _hybrid_enabled():
+    """
+    A busca híbrida está ligada (RAG_HYBRID_SEARCH) e a coleção tem o vetor
+    esparso? Um "sim" vale para sempre no processo; um "não" é consultado
+    de novo a cada SPARSE_RECHECK_SECONDS.
+    """
+    global _sparse_available, _sparse_checked_at
+    if not settings.RAG_HYBRID_SEARCH:
+        return False
+    if _sparse_available is None or (
+        not _sparse_available and time.monotonic() - _sparse_checked_at >= SPARSE_RECHECK_SECONDS
+    ):
+        try:
+            info = qdrant.get_collection(COLLECTION_NAME)
+            _sparse_available = SPARSE_VECTOR_NAME in (info.config.params.sparse_vectors or {})
+            _sparse_checked_at = time.monotonic()
+        except Exception as e:
+            # Não guarda o resultado: tenta de novo na próxima chamada
+            print(f"Erro ao verificar o vetor esparso da coleção: {e}")
+            return False
+    return _sparse_available
+
+
+def _point_vector(dense_vector, text: str, hybrid: bool):
+    """Vetor(es) de um ponto: só o denso, ou denso + esparso (BM25) no modo híbrido."""
+    if not hybrid:
+        return dense_vector
+    return {"": dense_vector, SPARSE_VECTOR_NAME: sparse_encoder.encode_document(text)}
+
+
+def _dense_vector(vector):
+    """Extrai o vetor denso de um ponto lido do Qdrant (com ou sem vetores nomeados)."""
+    return vector.get("") if isinstance(vector, dict) else vector
+
+
+def _user_condition(user_id):
+    """
+    Condição que restringe uma operação aos pontos do usuário.
+    No modo multi-tenant usa o campo 'tenant' (índice is_tenant), que faz o
+    Qdrant percorrer só o grafo HNSW daquele usuário; senão usa 'user_id'.
+    """
+    if settings.QDRANT_MULTITENANT:
+        return models.FieldCondition(key="tenant", match=models.MatchValue(value=tenant_key(user_id)))
+    return models.FieldCondition(key="user_id", match=models.MatchValue(value=user_id))
+
+
+def _iter_chunks(pages, text_splitter):
+    """
+    Quebra o texto em chunks de forma incremental, página a página.
+    O último pedaço de cada rodada pode estar incompleto, então ele fica
+    guardado e é concatenado com a próxima página antes de ser emitido.
+    """
+    buffer = ""
+    for page_text in pages:
+        if not page_text:
+            continue
+        buffer += page_text
+        with metrics.stage("split"):
+            pieces = text_splitter.split_text(buffer)
+        if len(pieces) > 1:
+            # Emite todos os chunks completos e guarda só o final
+            yield from pieces[:-1]
+            buffer = pieces[-1]
+    # Emite o que sobrou no final do documento
+    if buffer:
+        with metrics.stage("split"):
+            pieces = text_splitter.split_text(buffer)
+        yield from pieces
+
+
+def _iter_batches(items, batch_size: int):
+    """Agrupa um iterável em listas de no máximo 'batch_size' itens."""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _request_embeddings(chunks: list):
+    """Gera os embeddings de um lote de chunks pelo cliente de embeddings (lotes, concorrência e retry)."""
+    return embedding_client.get_client().embed(chunks, model=EMBEDDING_MODEL, task_type=DOCUMENT_TASK_TYPE)
+
+
+def _embed_documents(chunks: list):
+    """
+    Gera os embeddings de um lote de chunks (na mesma ordem).
+    Consulta primeiro o cache de embeddings (uma query para o lote todo) e
+    só envia para a API os chunks que ainda não foram vetorizados.
+    """
+    keys = [
+        embedding_cache.make_key(EMBEDDING_MODEL, DOCUMENT_TASK_TYPE, EMBEDDING_DIM, chunk)
+        for chunk in chunks
+    ]
+    cached = embedding_cache.get_many(keys)
+
+    # Chunks que faltam (sem repetir textos iguais dentro do lote)
+    missing = {}
+    for key, chunk in zip(keys, chunks):
+        if key not in cached and key not in missing:
+            missing[key] = chunk
+    metrics.count("cache_hits_total", len(keys) - len(missing), cache="embedding")
+    metrics.count("cache_misses_total", len(missing), cache="embedding")
+
+    if missing:
+        fresh = dict(zip(missing.keys(), _request_embeddings(list(missing.values()))))
+        embedding_cache.put_many(fresh, EMBEDDING_MODEL, DOCUMENT_TASK_TYPE, EMBEDDING_DIM)
+        cached.update(fresh)
+
+    return [cached[key] for key in keys]
+
+
+def _point_id(user_id, doc_name: str, content_hash: str, index: int):
+    """
+    ID determinístico do chunk 'index' de um documento: uma nova tentativa
+    da mesma ingestão (ex: job retomado depois que o worker morreu)
+    sobrescreve os mesmos pontos em vez de duplicá-los.
+    """
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"gguiado:{user_id}:{content_hash}:{doc_name}:{index}"))
+
+
+def _delete_incomplete(content_hash: str, user_id: int, doc_name: str):
+    """Remove os pontos de uma tentativa anterior que não terminou (complete=False)."""
+    qdrant.delete(
+        collection_name=COLLECTION_NAME,
+        points_selector=models.FilterSelector(filter=models.Filter(must=[
+            _user_condition(user_id),
+            models.FieldCondition(key="doc_name", match=models.MatchValue(value=doc_name)),
+            models.FieldCondition(key="content_hash", match=models.MatchValue(value=content_hash)),
+            models.FieldCondition(key="complete", match=models.MatchValue(value=False)),
+        ])),
+        wait=True
+    )
+
+
+def _delete_points(point_ids: list):
+    """Remove pontos pelo ID (usado para desfazer uma ingestão que falhou no meio)."""
+    if not point_ids:
+        return
+    try:
+        qdrant.delete(
+            collection_name=COLLECTION_NAME,
+            points_selector=models.PointIdsList(points=point_ids),
+            wait=True
+        )
+    except Exception as e:
+        print(f"Erro ao desfazer a ingestão parcial no Qdrant: {e}")
+
+
+def compute_content_hash(stream):
+    """
+    Calcula o SHA-256 do conteúdo do arquivo, lendo em blocos de 1 MB.
+    O stream volta para o início no final, pronto para ser processado.
+    """
+    digest = hashlib.sha256()
+    stream.seek(0)
+    for block in iter(lambda: stream.read(1024 * 1024), b""):
+        digest.update(block)
+    stream.seek(0)
+    return digest.hexdigest()
+
+
+def _hash_filter(content_hash: str, user_id=None, doc_name=None):
+    """Filtro de pontos de um documento já ingerido por completo, pelo hash."""
+    conditions = [
+        models.FieldCondition(key="content_hash", match=models.MatchValue(value=content_hash)),
+        models.FieldCondition(key="complete", match=models.MatchValue(value=True)),
+    ]
+    if user_id is not None:
+        conditions.append(_user_condition(user_id))
+    if doc_name is not None:
+        conditions.append(models.FieldCondition(key="doc_name", match=models.MatchValue(value=doc_name)))
+    return models.Filter(must=conditions)
+
+
+def find_document_by_hash(content_hash: str, user_id=None):
+    """
+    Procura no registro um documento já ingerido com este hash (consulta indexada).
+    Com 'user_id', procura só entre os documentos do usuário.
+    Retorna o Document encontrado, ou None.
+    """
+    query = Document.query.filter_by(content_hash=content_hash)
+    if user_id is not None:
+        query = query.filter_by(user_id=user_id)
+    return query.first()
+
+
+def _iter_existing_batches(source, content_hash: str):
+    """
+    Gera lotes (textos, vetores) a partir dos pontos de um documento idêntico
+    ('source', do registro) já ingerido por outro usuário, sem parsear nem
+    vetorizar de novo.
+    """
+    source_filter = _hash_filter(content_hash, user_id=source.user_id, doc_name=source.name)
+    offset = None
+    while True:
+        points, offset = qdrant.scroll(
+            collection_name=COLLECTION_NAME,
+            scroll_filter=source_filter,
+            limit=settings.RAG_EMBED_BATCH_SIZE,
+            offset=offset,
+            with_payload=['text'],
+            with_vectors=True
+        )
+        if points:
+            yield [point.payload['text'] for point in points], [_dense_vector(point.vector) for point in points]
+        if offset is None:
+            break
+
+
+def _iter_new_batches(file_storage, stats: dict):
+    """
+    Gera lotes (textos, vetores) processando o PDF do zero: as páginas são
+    lidas em ordem, quebradas em chunks incrementalmente e cada lote é
+    vetorizado assim que fica pronto.
+    """
+    def counted_pages():
+        for page_text in metrics.timed_iter("pdf_parse", pdf_extraction.iter_pages(file_storage.stream)):
+            stats['pages_parsed'] += 1
+            yield page_text
+
+    text_splitter = text_splitters.RecursiveCharacterTextSplitter(
+        chunk_size=settings.RAG_CHUNK_SIZE,
+        chunk_overlap=settings.RAG_CHUNK_OVERLAP,
+        separators=["\n\n", "\n", " ", ""]
+    )
+    chunks = _iter_chunks(counted_pages(), text_splitter)
+
+    for batch in _iter_batches(chunks, settings.RAG_EMBED_BATCH_SIZE):
+        with metrics.stage("embed"):
+            embeddings = _embed_documents(batch)
+        stats['chunks_embedded'] += len(batch)
+        yield batch, embeddings
+
+
+def _mark_complete(content_hash: str, user_id: int, doc_name: str):
+    """Marca os pontos do documento como completos (liberados para deduplicação)."""
+    qdrant.set_payload(
+        collection_name=COLLECTION_NAME,
+        payload={'complete': True},
+        points=models.Filter(must=[
+            _user_condition(user_id),
+            models.FieldCondition(key="doc_name", match=models.MatchValue(value=doc_name)),
+            models.FieldCondition(key="content_hash", match=models.MatchValue(value=content_hash)),
+        ]),
+        wait=True
+    )
+
+
+def _stream_size(stream):
+    """Tamanho do arquivo em bytes (o stream volta para o início)."""
+    stream.seek(0, os.SEEK_END)
+    size = stream.tell()
+    stream.seek(0)
+    return size
+
+
+def _register_document(user_id: int, doc_name: str, content_hash: str, chunk_count: int, byte_size: int, page_count):
+    """
+    Grava (ou atualiza) o documento no registro. Se o usuário já tinha um
+    documento com o mesmo nome e outro conteúdo, os pontos antigos são
+    removidos do Qdrant depois que o novo conteúdo está salvo.
+    """
+    document = Document.query.filter_by(user_id=user_id, name=doc_name).first()
+    if document is None:
+        document = Document(user_id=user_id, name=doc_name)
+        db.session.add(document)
+    document.content_hash = content_hash
+    document.chunk_count = chunk_count
+    document.byte_size = byte_size
+    document.page_count = page_count
+    document.uploaded_at = datetime.datetime.utcnow()
+    db.session.commit()
+
+    # Remove versões anteriores com o mesmo nome (qualquer outro hash)
+    qdrant.delete(
+        collection_name=COLLECTION_NAME,
+        points_selector=models.FilterSelector(
+            filter=models.Filter(
+                must=[
+                    _user_condition(user_id),
+                    models.FieldCondition(key="doc_name", match=models.MatchValue(value=doc_name)),
+                ],
+                must_not=[
+                    models.FieldCondition(key="content_hash", match=models.MatchValue(value=content_hash)),
+                ]
+            )
+        ),
+        wait=True
+    )
+
+
+def process_and_store_document(file_storage, user_id: int, progress=None, content_hash=None):
     """
     Processa um arquivo PDF, o vetoriza e armazena no Qdrant.
     'file_storage' é o objeto de arquivo do Flask (request.files['file']).
+    'progress' (opcional) é chamado após cada lote com um dicionário
+    {'pages_parsed', 'chunks_embedded', 'chunks_stored'}.
+    'content_hash' (opcional) é o SHA-256 do arquivo, se já foi calculado.
+
+    O processamento é feito em streaming: cada lote de chunks é vetorizado
+    e enviado ao Qdrant assim que fica pronto, então o pico de memória não
+    depende do tamanho do documento. Se outro usuário já enviou um arquivo
+    idêntico, os vetores dele são copiados em vez de recalculados.
+
+    Pode ser repetido (ex: job retomado depois que o worker morreu): as
+    sobras incompletas são apagadas e os IDs dos pontos são determinísticos,
+    então o documento não fica com chunks duplicados.
     """
-    
+    doc_name = file_storage.filename # Nome do arquivo original
+    # IDs já gravados no Qdrant, para desfazer a ingestão se algo falhar no meio
+    stored_ids = []
+    # Contadores de progresso
+    stats = {'pages_parsed': 0, 'chunks_embedded': 0, 'chunks_stored': 0}
+
     try:
-        # --- 1. Ler o PDF e Extrair o Texto ---
-        pdf_bytes = file_storage.read()
-        pdf_file = BytesIO(pdf_bytes)
-        reader = pypdf.PdfReader(pdf_file)
-        
-        full_text = ""
-        for page in reader.pages:
-            full_text += page.extract_text() or "" # Garante que é string
-            
-        if not full_text:
-            raise Exception("Não foi possível extrair texto do PDF.")
+        # --- 1. Identificar o conteúdo (SHA-256) ---
+        content_hash = content_hash or compute_content_hash(file_storage.stream)
 
-        # --- 2. "Chunking" (Quebrar o texto em pedaços) ---
-        text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000,
-            chunk_overlap=100,
-            separators=["\n\n", "\n", " ", ""]
-        )
-        chunks = text_splitter.split_text(full_text)
-        
-        if not chunks:
-            raise Exception("O texto era muito curto para ser processado.")
-
-        # --- 3. "Embedding" (Gerar vetores para os chunks) ---
-        result = genai.embed_content(
-            model="models/text-embedding-004",
-            content=chunks,
-            task_type="RETRIEVAL_DOCUMENT"
-        )
-        embeddings = result['embedding']
+        byte_size = _stream_size(file_storage.stream)
+
+        # O usuário já tem este conteúdo: nada a fazer
+        own = find_document_by_hash(content_hash, user_id=user_id)
+        if own:
+            return f"Documento '{doc_name}' já foi enviado como '{own.name}'."
 
-        # --- 4. Armazenar no Qdrant ---
-        points_to_insert = []
-        # Gera IDs únicos para os pontos a serem inseridos
-        point_ids = [str(uuid.uuid4()) for _ in chunks]
+        # Sobras de uma tentativa anterior deste documento (ex: de antes dos IDs determinísticos)
+        _delete_incomplete(content_hash, user_id, doc_name)
 
-        for i, chunk_text in enumerate(chunks):
-            points_to_insert.append(
+        # --- 2. Reaproveitar um documento idêntico ou processar do zero ---
+        source = find_document_by_hash(content_hash)
+        if source:
+            batches = _iter_existing_batches(source, content_hash)
+        else:
+            batches = _iter_new_batches(file_storage, stats)
+
+        # --- 3. Armazenar no Qdrant, lote a lote ---
+        hybrid = _hybrid_enabled()
+        for texts, embeddings in batches:
+            # IDs determinísticos (posição do chunk no documento)
+            point_ids = [
+                _point_id(user_id, doc_name, content_hash, index)
+                for index in range(len(stored_ids), len(stored_ids) + len(texts))
+            ]
+            points_to_insert = [
                 models.PointStruct( # Usa a classe PointStruct
-                    id=point_ids[i],
-                    vector=embeddings[i],
+                    id=point_id,
+                    vector=_point_vector(embedding, chunk_text, hybrid),
                     payload={
                         'text': chunk_text,
                         'user_id': user_id,
-                        'doc_name': file_storage.filename # Nome do arquivo original
+                        'tenant': tenant_key(user_id), # Chave do tenant (índice is_tenant no modo multi-tenant)
+                        'doc_name': doc_name,
+                        'content_hash': content_hash,
+                        'complete': False # Vira True quando o documento inteiro estiver gravado
                     }
                 )
-            )
+                for point_id, embedding, chunk_text in zip(point_ids, embeddings, texts)
+            ]
 
-        # Envia os pontos para o Qdrant em lote
-        qdrant.upsert(
-            collection_name=COLLECTION_NAME,
-            points=points_to_insert,
-            wait=True
-        )
+            # Envia o lote para o Qdrant
+            with metrics.stage("upsert"):
+                qdrant.upsert(
+                    collection_name=COLLECTION_NAME,
+                    points=points_to_insert,
+                    wait=True
+                )
+            metrics.count("ingested_chunks_total", len(point_ids), source="copied" if source else "new")
+            stored_ids.extend(point_ids)
+            stats['chunks_stored'] += len(point_ids)
+            if progress:
+                progress(dict(stats))
+
+        if not stored_ids:
+            raise Exception("Não foi possível extrair texto do PDF.")
+
+        with metrics.stage("register"):
+            _mark_complete(content_hash, user_id, doc_name)
+            _register_document(
+                user_id, doc_name, content_hash,
+                chunk_count=len(stored_ids),
+                byte_size=byte_size,
+                page_count=source.page_count if source else stats['pages_parsed']
+            )
 
-        return f"Documento '{file_storage.filename}' processado e armazenado com sucesso. {len(chunks)} chunks criados."
+        if source:
+            return f"Documento '{doc_name}' armazenado com sucesso (conteúdo já processado anteriormente). {len(stored_ids)} chunks reaproveitados."
+        return f"Documento '{doc_name}' processado e armazenado com sucesso. {len(stored_ids)} chunks criados."
 
     except Exception as e:
+        # Remove os lotes que já tinham sido gravados para não deixar um documento pela metade
+        db.session.rollback()
+        _delete_points(stored_ids)
         print(f"Erro no rag_service (process): {e}")
         raise Exception(f"Falha ao processar o documento: {str(e)}")
 
+def _embed_query(query: str):
+    """
+    Retorna o embedding da pergunta. Perguntas repetidas (ou iguais depois
+    de normalizadas) saem do cache LRU em memória, sem chamar a API.
+    """
+    cache_key = f"{EMBEDDING_MODEL}:{normalize_query(query)}"
+    query_vector = query_embedding_cache.get(cache_key)
+    if query_vector is None:
+        metrics.count("cache_misses_total", cache="query")
+        query_vector = embedding_client.get_client().embed(
+            [query], model=EMBEDDING_MODEL, task_type="RETRIEVAL_QUERY"
+        )[0]
+        query_embedding_cache.put(cache_key, query_vector)
+    else:
+        metrics.count("cache_hits_total", cache="query")
+    return query_vector
+
+
 def search_relevant_chunks(query: str, user_id: int):
     """
     Busca no Qdrant os chunks mais relevantes para uma pergunta,
-    filtrando pelo usuário logado.
+    filtrando pelo usuário logado. Busca RAG_CANDIDATES candidatos e
+    escolhe o contexto final por MMR (ver context_selection), sem
+    trechos repetidos entre chunks vizinhos.
     """
     try:
-        # 1. Gera o embedding para a pergunta (query)
-        result = genai.embed_content(
-            model="models/text-embedding-004",
-            content=query,
-            task_type="RETRIEVAL_QUERY"
+        # 1. Gera o embedding para a pergunta (query), consultando antes o cache
+        with metrics.stage("embed_query"):
+            query_vector = _embed_query(query)
+
+        # 2. Busca no Qdrant (no modo multi-tenant, só no grafo do usuário)
+        user_filter = models.Filter( # Usa a classe Filter
+            must=[_user_condition(user_id)]
         )
-        query_vector = result['embedding']
+        with metrics.stage("qdrant_search"):
+            if _hybrid_enabled():
+                # Híbrida: candidatos densos e esparsos (BM25) combinados por
+                # Reciprocal Rank Fusion, tudo numa única chamada ao Qdrant
+                search_result = qdrant.query_points(
+                    collection_name=COLLECTION_NAME,
+                    prefetch=[
+                        models.Prefetch(query=query_vector, filter=user_filter, limit=settings.RAG_HYBRID_PREFETCH),
+                        models.Prefetch(
+                            query=sparse_encoder.encode_query(query), using=SPARSE_VECTOR_NAME,
+                            filter=user_filter, limit=settings.RAG_HYBRID_PREFETCH
+                        ),
+                    ],
+                    query=models.FusionQuery(fusion=models.Fusion.RRF),
+                    query_filter=user_filter,
+                    limit=settings.RAG_CANDIDATES,
+                    with_vectors=True
+                ).points
+            else:
+                search_result = qdrant.query_points(
+                    collection_name=COLLECTION_NAME,
+                    query=query_vector,
+                    limit=settings.RAG_CANDIDATES,
+                    query_filter=user_filter,
+                    with_vectors=True
+                ).points
 
-        # 2. Busca no Qdrant
-        search_result = qdrant.search(
-            collection_name=COLLECTION_NAME,
-            query_vector=query_vector,
-            limit=3,
-            query_filter=models.Filter( # Usa a classe Filter
-                must=[
-                    models.FieldCondition( # Usa FieldCondition
-                        key="user_id",
-                        match=models.MatchValue(value=user_id) # Usa MatchValue
-                    )
-                ]
+        # 3. Re-ranqueia (MMR), escolhe quantos chunks usar e remove sobreposições
+        candidates = [(hit.payload['text'], _dense_vector(hit.vector), hit.score) for hit in search_result]
+        with metrics.stage("context_select"):
+            contexts = context_selection.select_context(
+                candidates,
+                min_k=settings.RAG_MIN_CHUNKS,
+                max_k=settings.RAG_MAX_CHUNKS,
+                lambda_=settings.RAG_MMR_LAMBDA,
+                max_overlap=settings.RAG_CHUNK_OVERLAP
             )
-        )
-        
-        # 3. Formata os resultados (apenas o texto)
-        contexts = [hit.payload['text'] for hit in search_result]
         return contexts
 
     except Exception as e:
@@ -120,42 +521,237 @@ def search_relevant_chunks(query: str, user_id: int):
         # Retorna lista vazia em caso de erro na busca para não quebrar o chat
         return [] 
 
+def encode_cursor(document):
+    """
+    Cursor da paginação: nome do último documento da página, em base64url.
+    O nome é o do arquivo enviado (pode ter acentos e travessões), e headers
+    HTTP só levam Latin-1; o cursor precisa ser ASCII.
+    """
+    return base64.urlsafe_b64encode(document.name.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Lê um cursor gerado por encode_cursor. Levanta ValueError se for inválido."""
+    padded = cursor + "=" * (-len(cursor) % 4)
+    raw = base64.urlsafe_b64decode(padded.encode("ascii"))
+    # urlsafe_b64decode ignora caracteres fora do alfabeto: confere a ida e volta
+    if base64.urlsafe_b64encode(raw).decode("ascii") != padded:
+        raise ValueError("Cursor inválido")
+    return raw.decode("utf-8")
+
+
 # --- NOVA FUNÇÃO ---
-def list_documents(user_id: int):
+def list_documents(user_id: int, limit: int = 50, after: str = None):
     """
-    Lista os nomes de documentos únicos para um usuário consultando o Qdrant.
+    Lista os documentos de um usuário a partir do registro (tabela 'documents').
+    Paginação por cursor (keyset): 'after' é o cursor do último documento da
+    página anterior (encode_cursor). Retorna (documentos, cursor da próxima
+    página ou None).
+    Usa o índice único (user_id, name), então o custo não depende de
+    quantos vetores o usuário tem.
     """
     try:
-        # Usa a busca com scroll para pegar alguns pontos do usuário
-        # Limitamos a busca, pois só precisamos dos nomes distintos
-        scroll_response, _ = qdrant.scroll(
+        query = Document.query.filter_by(user_id=user_id)
+        if after:
+            query = query.filter(Document.name > decode_cursor(after))
+        # Busca um a mais para saber se existe próxima página
+        documents = query.order_by(Document.name.asc()).limit(limit + 1).all()
+
+        next_cursor = encode_cursor(documents[limit - 1]) if len(documents) > limit else None
+        return documents[:limit], next_cursor
+
+    except Exception as e:
+        print(f"Erro ao listar documentos: {e}")
+        raise Exception(f"Falha ao listar documentos: {str(e)}")
+
+
+def backfill_registry():
+    """
+    Cria no registro os documentos que só existem no Qdrant (enviados antes
+    da tabela 'documents'). Percorre a coleção uma vez, contando os chunks
+    de cada (user_id, doc_name). Retorna quantos documentos foram criados.
+    """
+    counts = {}
+    hashes = {}
+    offset = None
+    while True:
+        points, offset = qdrant.scroll(
             collection_name=COLLECTION_NAME,
-            scroll_filter=models.Filter(
-                must=[
-                    models.FieldCondition(
-                        key="user_id",
-                        match=models.MatchValue(value=user_id)
+            limit=1000,
+            offset=offset,
+            with_payload=['user_id', 'doc_name', 'content_hash']
+        )
+        for point in points:
+            key = (point.payload.get('user_id'), point.payload.get('doc_name'))
+            if None in key:
+                continue
+            counts[key] = counts.get(key, 0) + 1
+            hashes.setdefault(key, point.payload.get('content_hash'))
+        if offset is None:
+            break
+
+    existing = set(db.session.query(Document.user_id, Document.name).all())
+    created = 0
+    for (user_id, doc_name), chunk_count in counts.items():
+        if (user_id, doc_name) in existing:
+            continue
+        db.session.add(Document(
+            user_id=user_id, name=doc_name, content_hash=hashes[(user_id, doc_name)], chunk_count=chunk_count
+        ))
+        created += 1
+    db.session.commit()
+    return created
+
+def backfill_tenant_field(batch_size: int = 1000):
+    """
+    Migração para o modo multi-tenant: grava o campo 'tenant' nos pontos
+    antigos que só têm 'user_id'. Processa em lotes até não sobrar nenhum.
+    Retorna quantos pontos foram atualizados.
+    """
+    missing_tenant = models.Filter(must=[
+        models.IsEmptyCondition(is_empty=models.PayloadField(key="tenant"))
+    ])
+    updated = 0
+    while True:
+        points, _ = qdrant.scroll(
+            collection_name=COLLECTION_NAME,
+            scroll_filter=missing_tenant,
+            limit=batch_size,
+            with_payload=['user_id']
+        )
+        if not points:
+            return updated
+        # Agrupa os IDs por usuário: uma chamada set_payload por usuário do lote
+        ids_by_user = {}
+        for point in points:
+            ids_by_user.setdefault(point.payload.get('user_id'), []).append(point.id)
+        qdrant.batch_update_points(
+            collection_name=COLLECTION_NAME,
+            update_operations=[
+                models.SetPayloadOperation(set_payload=models.SetPayload(
+                    payload={'tenant': tenant_key(user_id)}, points=point_ids
+                ))
+                for user_id, point_ids in ids_by_user.items()
+            ],
+            wait=True
+        )
+        updated += len(points)
+
+def _write_fingerprint(collection: str):
+    """
+    Resumo do que pode mudar com escritas: pontos da coleção (contagem
+    exata) e, no registro, número de documentos, soma dos chunks e último upload.
+    """
+    points = qdrant.count(collection_name=collection, exact=True).count
+    registry = tuple(db.session.query(
+        func.count(Document.id), func.coalesce(func.sum(Document.chunk_count), 0), func.max(Document.uploaded_at)
+    ).one())
+    # Encerra a transação de leitura, para a próxima leitura ver os dados atuais
+    db.session.rollback()
+    return points, registry
+
+
+def rebuild_collection(config, batch_size: int = 256):
+    """
+    Recria a coleção com o esquema atual (ex: para ganhar o vetor esparso da
+    busca híbrida, que não pode ser adicionado a uma coleção existente).
+    Copia todos os pontos para '<nome>_v<versão>', calculando o BM25 de cada
+    chunk, e aponta o nome original (como alias) para a nova coleção.
+    Retorna quantos pontos foram copiados.
+
+    As escritas têm que estar paradas durante a cópia (workers de ingestão
+    parados e API em manutenção, ou pelo menos sem uploads e remoções):
+    - com jobs de ingestão na fila ou rodando, nada é feito;
+    - se a coleção ou o registro mudarem durante a cópia, ou a nova coleção
+      não tiver todos os pontos, a cópia é descartada e a antiga fica como está.
+    Só depois dessas verificações a coleção antiga é apagada. Se o nome
+    ainda é uma coleção (não um alias), ela precisa ser apagada antes de o
+    alias ser criado: nesse intervalo (curto) as buscas voltam sem contexto.
+    Os outros processos percebem o vetor esparso em até SPARSE_RECHECK_SECONDS.
+    """
+    global _sparse_available
+    target = f"{COLLECTION_NAME}_v{SCHEMA_VERSION}"
+    aliases = {alias.alias_name: alias.collection_name for alias in qdrant.get_aliases().aliases}
+    source = aliases.get(COLLECTION_NAME, COLLECTION_NAME)
+    if source == target:
+        raise Exception(f"A coleção '{COLLECTION_NAME}' já está no esquema v{SCHEMA_VERSION}.")
+
+    active_jobs = IngestionJob.query.filter(IngestionJob.status.in_([IngestionJob.QUEUED, IngestionJob.RUNNING])).count()
+    if active_jobs:
+        raise Exception(f"Há {active_jobs} job(s) de ingestão na fila ou rodando; pare os workers e espere a fila esvaziar.")
+
+    # Sobra de uma tentativa anterior (não é a coleção em uso: o alias aponta para 'source')
+    if qdrant.collection_exists(target):
+        qdrant.delete_collection(target)
+    bootstrap_collection(qdrant, {**config, 'QDRANT_COLLECTION_NAME': target})
+
+    before = _write_fingerprint(source)
+    copied = 0
+    offset = None
+    while True:
+        points, offset = qdrant.scroll(
+            collection_name=source,
+            limit=batch_size,
+            offset=offset,
+            with_payload=True,
+            with_vectors=True
+        )
+        if points:
+            qdrant.upsert(
+                collection_name=target,
+                points=[
+                    models.PointStruct(
+                        id=point.id,
+                        vector=_point_vector(_dense_vector(point.vector), point.payload.get('text', ''), hybrid=True),
+                        payload=point.payload
                     )
-                ]
-            ),
-            limit=100, # Pega até 100 chunks (ajuste se necessário)
-            with_payload=['doc_name'] # Só precisamos do nome do documento
+                    for point in points
+                ],
+                wait=True
+            )
+            copied += len(points)
+        if offset is None:
+            break
+
+    # Verifica a cópia antes de qualquer passo destrutivo
+    after = _write_fingerprint(source)
+    target_points = qdrant.count(collection_name=target, exact=True).count
+    if after != before or copied != before[0] or target_points != before[0]:
+        qdrant.delete_collection(target)
+        raise Exception(
+            f"A coleção mudou durante a cópia ({before[0]} -> {after[0]} pontos, {target_points} copiados); "
+            "nada foi trocado. Pare as escritas e rode de novo."
         )
-        
-        # Extrai os nomes únicos
-        doc_names = set(hit.payload['doc_name'] for hit in scroll_response if hit.payload and 'doc_name' in hit.payload)
-        
-        # Retorna como uma lista de dicionários para o schema
-        return [{"doc_name": name} for name in sorted(list(doc_names))]
 
-    except Exception as e:
-        print(f"Erro ao listar documentos do Qdrant: {e}")
-        raise Exception(f"Falha ao listar documentos: {str(e)}")
+    # Troca o alias (ou a coleção antiga) pela nova coleção
+    if COLLECTION_NAME in aliases:
+        # Troca atômica: as duas operações são aplicadas juntas
+        qdrant.update_collection_aliases(change_aliases_operations=[
+            models.DeleteAliasOperation(delete_alias=models.DeleteAlias(alias_name=COLLECTION_NAME)),
+            models.CreateAliasOperation(create_alias=models.CreateAlias(collection_name=target, alias_name=COLLECTION_NAME)),
+        ])
+        qdrant.delete_collection(source)
+    else:
+        # Um alias não pode ter o nome de uma coleção existente: apaga antes
+        # (a cópia já foi verificada, os dados estão em 'target')
+        qdrant.delete_collection(source)
+        try:
+            qdrant.update_collection_aliases(change_aliases_operations=[
+                models.CreateAliasOperation(create_alias=models.CreateAlias(collection_name=target, alias_name=COLLECTION_NAME)),
+            ])
+        except Exception as e:
+            raise Exception(
+                f"Coleção antiga apagada, mas o alias '{COLLECTION_NAME}' -> '{target}' não foi criado ({e}). "
+                f"Os dados estão em '{target}': crie o alias manualmente."
+            )
+    _sparse_available = None
+    return copied
 
 # --- NOVA FUNÇÃO ---
 def delete_document_by_name(doc_name: str, user_id: int):
     """
-    Deleta todos os chunks associados a um doc_name e user_id do Qdrant.
+    Deleta todos os chunks associados a um doc_name e user_id do Qdrant
+    e o documento do registro.
     """
     try:
         # Deleta pontos usando um filtro
@@ -164,10 +760,7 @@ def delete_document_by_name(doc_name: str, user_id: int):
             points_selector=models.FilterSelector(
                 filter=models.Filter(
                     must=[
-                        models.FieldCondition(
-                            key="user_id",
-                            match=models.MatchValue(value=user_id)
-                        ),
+                        _user_condition(user_id),
                         models.FieldCondition(
                             key="doc_name",
                             match=models.MatchValue(value=doc_name)
@@ -178,6 +771,10 @@ def delete_document_by_name(doc_name: str, user_id: int):
             wait=True # Espera a conclusão
         )
         
+        # Remove o documento do registro
+        Document.query.filter_by(user_id=user_id, name=doc_name).delete()
+        db.session.commit()
+
         print(f"Resultado da deleção para '{doc_name}' do user {user_id}: {delete_result}")
         # Verifica se algum ponto foi afetado (opcional, mas bom para feedback)
         if delete_result.status == models.UpdateStatus.COMPLETED:
@@ -188,5 +785,6 @@ def delete_document_by_name(doc_name: str, user_id: int):
              return True # Retorna True mesmo se 0 pontos foram deletados
              
     except Exception as e:
+        db.session.rollback()
         print(f"Erro ao deletar documento '{doc_name}' do Qdrant: {e}")
         raise Exception(f"Falha ao deletar documento: {str(e)}")
@@ -0,0 +1,67 @@
+# /app/services/sparse_encoder.py
+
+import re
+import unicodedata
+import zlib
+from collections import Counter
+from app.core.config import settings
+from app.core.lazy import lazy_import
+
+models = lazy_import("qdrant_client.models")
+
+# Palavras muito comuns em português que não ajudam a achar o trecho certo
+STOPWORDS = frozenset("""
+a o as os um uma uns umas de do da dos das em no na nos nas por pelo pela pelos pelas
+para com sem sob sobre entre e ou mas que se nao sim ja mais menos muito muita muitos
+muitas como quando onde qual quais quem porque pois este esta estes estas esse essa
+esses essas isso isto aquele aquela aquilo ele ela eles elas eu tu voce voces nos vos
+me te lhe lhes meu minha seu sua seus suas ao aos ate ser ter estar foi sao era sera
+tem ha pode deve the of and to in is are for on with by
+""".split())
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: str):
+    """
+    Quebra o texto em termos: sem acentos, minúsculas, sem stopwords.
+    Números e termos como 'h2so4' ou 'atp' são mantidos (são justamente
+    os casos em que a busca densa costuma falhar).
+    """
+    text = unicodedata.normalize("NFKD", text.casefold())
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return [token for token in TOKEN_RE.findall(text) if token not in STOPWORDS]
+
+
+def _term_index(token: str):
+    """Índice do termo no vetor esparso (hashing: não precisa guardar vocabulário)."""
+    return zlib.crc32(token.encode("utf-8")) & 0x7FFFFFFF
+
+
+def _sparse_vector(weights: dict):
+    indices = sorted(weights)
+    return models.SparseVector(indices=indices, values=[weights[i] for i in indices])
+
+
+def encode_document(text: str):
+    """
+    Vetor esparso BM25 de um chunk: só a parte de frequência do termo
+    (saturação k1 e normalização de tamanho b). O IDF é aplicado pelo
+    próprio Qdrant (modifier=IDF na coleção), que conhece a coleção toda.
+    """
+    tokens = tokenize(text)
+    if not tokens:
+        return models.SparseVector(indices=[], values=[])
+    k1, b = settings.BM25_K1, settings.BM25_B
+    length_norm = 1 - b + b * len(tokens) / settings.BM25_AVG_DOC_LEN
+    weights = {}
+    for token, tf in Counter(tokens).items():
+        index = _term_index(token)
+        # Colisões de hash somam os pesos (raras com 31 bits)
+        weights[index] = weights.get(index, 0.0) + tf * (k1 + 1) / (tf + k1 * length_norm)
+    return _sparse_vector(weights)
+
+
+def encode_query(text: str):
+    """Vetor esparso da pergunta: peso 1 para cada termo distinto."""
+    return _sparse_vector({_term_index(token): 1.0 for token in set(tokenize(text))})
@@ -0,0 +1,163 @@
+# /app/services/summary_service.py
+
+import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+from app.extensions import db
+from app.core.config import settings
+from app.core import metrics
+from app.models.chat_history_model import ChatHistory
+from app.models.chat_summary_model import ChatSummary
+from app.services import llm_gateway
+
+SUMMARY_MODEL = "gemini-pro"
+
+SUMMARY_INSTRUCTION = """
+Você resume conversas entre um estudante e um tutor de IA.
+Atualize o resumo existente com as novas mensagens, mantendo: os temas
+estudados, as dúvidas do aluno, o que já foi explicado e o que ficou
+pendente. Escreva em português, em no máximo 200 palavras, sem inventar
+nada que não esteja nas mensagens.
+"""
+
+# Pool dos resumos em segundo plano (criado no primeiro uso) e sessões com resumo já agendado
+_executor = None
+_executor_lock = threading.Lock()
+_scheduled = set()
+_scheduled_lock = threading.Lock()
+
+
+def load_session(user_id: int, session_id: str):
+    """
+    Carrega o que o próximo turno precisa: o resumo da sessão (ou None) e
+    as mensagens ainda não resumidas, da mais antiga para a mais nova.
+    São no máximo CHAT_HISTORY_WINDOW + CHAT_SUMMARY_BATCH + 2 mensagens,
+    lidas pelo índice (user_id, session_id, id), então o custo não cresce
+    com o tamanho da sessão.
+    """
+    summary = ChatSummary.query.filter_by(user_id=user_id, session_id=session_id).first()
+    query = ChatHistory.query.filter_by(user_id=user_id, session_id=session_id)
+    if summary:
+        query = query.filter(ChatHistory.id > summary.last_message_id)
+    limit = settings.CHAT_HISTORY_WINDOW + settings.CHAT_SUMMARY_BATCH + 2
+    messages = query.order_by(ChatHistory.id.desc()).limit(limit).all()
+    messages.reverse()
+    return summary, messages
+
+
+def summarize(previous_summary: str, messages):
+    """Gera o novo resumo a partir do anterior e das mensagens novas (uma chamada ao modelo)."""
+    transcript = "\n".join(
+        f"{'ALUNO' if msg.role == 'user' else 'TUTOR'}: {msg.message}" for msg in messages
+    )
+    prompt = (
+        f"RESUMO ATUAL:\n{previous_summary or '(vazio)'}\n\n"
+        f"NOVAS MENSAGENS:\n{transcript}\n\nRESUMO ATUALIZADO:"
+    )
+    return llm_gateway.get_gateway().generate(SUMMARY_MODEL, SUMMARY_INSTRUCTION, prompt).strip()
+
+
+def needs_refresh(pending_count: int):
+    """True se 'pending_count' mensagens não resumidas já passam da janela + lote."""
+    return pending_count > settings.CHAT_HISTORY_WINDOW + settings.CHAT_SUMMARY_BATCH
+
+
+def refresh_summary(user_id: int, session_id: str):
+    """
+    Atualiza o resumo quando as mensagens não resumidas passam de
+    CHAT_HISTORY_WINDOW + CHAT_SUMMARY_BATCH: as mais antigas (fora da
+    janela) entram no resumo de uma vez. Lê a sessão do banco (o estado
+    commitado) e retorna True se o resumo foi atualizado.
+
+    Seguro com turnos concorrentes (inclusive em outros processos): o
+    resumo só é gravado se ainda estiver na versão lida (mesmo
+    last_message_id, ou ainda inexistente); senão outro worker já resumiu
+    essas mensagens e o resultado é descartado, sem resumir nada duas vezes.
+    """
+    summary, messages = load_session(user_id, session_id)
+    if not needs_refresh(len(messages)):
+        db.session.rollback()
+        return False
+
+    window = settings.CHAT_HISTORY_WINDOW
+    to_fold = messages[:-window] if window > 0 else messages
+    # Os objetos saem da sessão com os dados já lidos: a transação de leitura
+    # é encerrada antes da chamada ao modelo (não segura o banco)
+    db.session.expunge_all()
+    db.session.rollback()
+    try:
+        with metrics.stage("summary"):
+            text = summarize(summary.summary if summary else "", to_fold)
+        values = {
+            "summary": text,
+            "last_message_id": to_fold[-1].id,
+            "updated_at": datetime.datetime.utcnow(),
+        }
+        if summary is None:
+            db.session.add(ChatSummary(user_id=user_id, session_id=session_id, message_count=len(to_fold), **values))
+            updated = 1
+        else:
+            # UPDATE condicional: só vale se ninguém mudou o resumo desde a leitura
+            updated = ChatSummary.query.filter_by(id=summary.id, last_message_id=summary.last_message_id).update(
+                {**values, "message_count": ChatSummary.message_count + len(to_fold)}, synchronize_session=False
+            )
+        db.session.commit()
+    except IntegrityError:
+        # Outro worker criou o resumo desta sessão primeiro
+        db.session.rollback()
+        updated = 0
+    except Exception as e:
+        db.session.rollback()
+        # O resumo fica para o próximo turno; a resposta já foi salva
+        print(f"Erro ao atualizar o resumo da sessão {session_id}: {e}")
+        return False
+    if not updated:
+        print(f"[resumo] sessão {session_id}: já atualizado por outro worker; resultado descartado")
+        return False
+    return True
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=settings.CHAT_SUMMARY_WORKERS, thread_name_prefix="chat-summary")
+    return _executor
+
+
+def _run_refresh(app, key):
+    try:
+        with app.app_context():
+            try:
+                refresh_summary(*key)
+            finally:
+                db.session.remove()
+    except Exception as e:
+        print(f"Erro no resumo em segundo plano da sessão {key[1]}: {e}")
+    finally:
+        with _scheduled_lock:
+            _scheduled.discard(key)
+
+
+def schedule_refresh(user_id: int, session_id: str, pending_count: int):
+    """
+    Chamado depois do commit do turno, com o número de mensagens não
+    resumidas. Se o resumo precisa ser atualizado, agenda a atualização no
+    pool de CHAT_SUMMARY_WORKERS threads, fora do caminho da resposta
+    (a chamada ao modelo não soma na latência do aluno). Uma sessão tem no
+    máximo um resumo agendado por processo. Com CHAT_SUMMARY_WORKERS=0
+    roda na hora, na thread do request.
+    """
+    if not needs_refresh(pending_count):
+        return False
+    if settings.CHAT_SUMMARY_WORKERS <= 0:
+        return refresh_summary(user_id, session_id)
+    key = (user_id, session_id)
+    with _scheduled_lock:
+        if key in _scheduled:
+            return False
+        _scheduled.add(key)
+    _get_executor().submit(_run_refresh, current_app._get_current_object(), key)
+    return True
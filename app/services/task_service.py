@@ -1,9 +1,47 @@
 # /app/services/task_service.py
 
+import datetime
 from app.models.task_model import Task
+from app.models.user_model import User
 from app.extensions import db
-from app.schemas.task_schema import task_schema, tasks_schema
+from app.schemas.task_schema import TaskSchema, task_schema, task_serializer
 from marshmallow import ValidationError
+from sqlalchemy import delete, insert, select, update
+
+# Máximo de operações aceitas em um lote (POST /tasks/batch)
+MAX_BATCH_OPERATIONS = 500
+# Campos que uma operação do lote pode definir, e o schema que os valida
+UPDATABLE_FIELDS = ("content", "is_completed")
+task_fields_schema = TaskSchema(only=UPDATABLE_FIELDS, load_instance=False)
+
+def _bump_version(user_id):
+    """
+    Marca que a lista de tarefas do usuário mudou (invalida o ETag do GET /tasks/).
+    Roda na mesma transação da mudança, então o commit grava as duas coisas juntas.
+    """
+    User.query.filter_by(id=user_id).update(
+        {User.tasks_version: User.tasks_version + 1}, synchronize_session=False
+    )
+
+
+def get_tasks_version(user_id):
+    """Versão atual da lista de tarefas do usuário (uma leitura pela chave primária)."""
+    try:
+        return db.session.query(User.tasks_version).filter_by(id=user_id).scalar() or 0
+    except Exception as e:
+        raise Exception(f"Erro ao buscar versão das tarefas: {str(e)}")
+
+
+def encode_cursor(task):
+    """Cursor da paginação: data de criação e id da última tarefa da página."""
+    return f"{task.created_at.isoformat()}|{task.id}"
+
+
+def decode_cursor(cursor):
+    """Lê um cursor gerado por encode_cursor. Levanta ValueError se for inválido."""
+    created_at, task_id = cursor.rsplit("|", 1)
+    return datetime.datetime.fromisoformat(created_at), int(task_id)
+
 
 def create_task(data, user_id):
     """
@@ -13,17 +51,19 @@ def create_task(data, user_id):
     try:
         # 1. Carrega os dados em um objeto Task
         # (O schema vai garantir que 'content' existe)
-        new_task = task_schema.load(data)
+        # (o dono vem do token, não do corpo da requisição)
+        new_task = task_schema.load(data, partial=("user_id",))
         
         # 2. Associa a tarefa ao ID do usuário
         new_task.user_id = user_id
 
         # 3. Salva no banco de dados
         db.session.add(new_task)
+        _bump_version(user_id)
         db.session.commit()
         
         # 4. Retorna a tarefa criada e serializada
-        return task_schema.dump(new_task)
+        return task_serializer.dump(new_task)
     
     except ValidationError as err:
         # Repassa o erro de validação
@@ -34,16 +74,31 @@ def create_task(data, user_id):
         raise Exception(f"Erro ao criar tarefa: {str(e)}")
 
 
-def get_tasks_by_user(user_id):
+def get_tasks_by_user(user_id, limit=50, after=None):
     """
-    Busca todas as tarefas de um usuário específico.
+    Busca uma página das tarefas de um usuário, da mais nova para a mais antiga.
+    Paginação por cursor (keyset): 'after' é o cursor da última tarefa da
+    página anterior (encode_cursor). Retorna (tarefas serializadas, cursor
+    da próxima página ou None). Usa o índice (user_id, created_at, id).
+    Lê só as colunas serializadas (sem criar objetos do ORM).
     """
     try:
-        # 1. Busca todas as tarefas filtrando pelo user_id
-        tasks = Task.query.filter_by(user_id=user_id).order_by(Task.created_at.desc()).all()
-        
-        # 2. Serializa a lista de tarefas e retorna
-        return tasks_schema.dump(tasks)
+        # 1. Busca as tarefas filtrando pelo user_id, a partir do cursor
+        query = select(*task_serializer.columns).where(Task.user_id == user_id)
+        if after:
+            created_at, task_id = decode_cursor(after)
+            query = query.where(db.or_(
+                Task.created_at < created_at,
+                db.and_(Task.created_at == created_at, Task.id < task_id),
+            ))
+        # Busca uma a mais para saber se existe próxima página
+        rows = db.session.execute(
+            query.order_by(Task.created_at.desc(), Task.id.desc()).limit(limit + 1)
+        ).all()
+        next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+
+        # 2. Serializa a página de tarefas e retorna
+        return task_serializer.dump_rows(rows[:limit]), next_cursor
     
     except Exception as e:
         raise Exception(f"Erro ao buscar tarefas: {str(e)}")
@@ -74,8 +129,9 @@ def update_task(task_id, data, user_id):
         if 'is_completed' in data:
             task.is_completed = data['is_completed']
         
+        _bump_version(user_id)
         db.session.commit()
-        return task_schema.dump(task)
+        return task_serializer.dump(task)
     except Exception as e:
         db.session.rollback()
         raise Exception(f"Erro ao atualizar tarefa: {str(e)}")
@@ -91,8 +147,128 @@ def delete_task(task_id, user_id):
 
     try:
         db.session.delete(task)
+        _bump_version(user_id)
         db.session.commit()
         return True
     except Exception as e:
         db.session.rollback()
-        raise Exception(f"Erro ao deletar tarefa: {str(e)}")
\ No newline at end of file
+        raise Exception(f"Erro ao deletar tarefa: {str(e)}")
+
+
+def _parse_operation(operation):
+    """
+    Valida uma operação do lote. Retorna (valores dos campos já convertidos
+    pelo schema, mensagem de erro ou None).
+    """
+    if not isinstance(operation, dict):
+        return None, "Operação deve ser um objeto"
+    op = operation.get("op")
+    if op not in ("create", "update", "delete"):
+        return None, "Campo 'op' deve ser 'create', 'update' ou 'delete'"
+    if op != "create" and (not isinstance(operation.get("id"), int) or isinstance(operation.get("id"), bool)):
+        return None, "Campo 'id' (inteiro) é obrigatório"
+    if op == "delete":
+        return {}, None
+    fields = {key: operation[key] for key in UPDATABLE_FIELDS if key in operation}
+    if op == "update" and not fields:
+        return None, "Nenhum campo válido para atualização"
+    try:
+        return task_fields_schema.load(fields, partial=(op == "update")), None
+    except ValidationError as err:
+        return None, err.messages
+
+
+def apply_batch(operations, user_id):
+    """
+    Aplica uma lista de operações ({"op": "create"|"update"|"delete", ...})
+    nas tarefas do usuário em uma única transação, com SQL em conjunto:
+    um INSERT em lote para as criações, um UPDATE ... WHERE id IN (...) por
+    combinação de valores (ex: "marcar todas como concluídas" é um só
+    UPDATE) e um DELETE ... WHERE id IN (...), sempre restritos ao user_id.
+
+    Retorna um resultado por operação, na ordem recebida:
+    {"index", "op", "status"} mais "task" (create/update) ou "error".
+    Operações inválidas (422), de tarefas de outro usuário ou inexistentes
+    (404) ou com id repetido no lote (409) não impedem as demais.
+    """
+    results = [None] * len(operations)
+    creates, updates, deletes = [], {}, []
+    seen_ids = set()
+
+    # 1. Validação e agrupamento (sem tocar no banco)
+    for index, operation in enumerate(operations):
+        values, error = _parse_operation(operation)
+        op = operation.get("op") if isinstance(operation, dict) else None
+        if error:
+            results[index] = {"index": index, "op": op, "status": 422, "error": error}
+            continue
+        if op == "create":
+            creates.append((index, values))
+            continue
+        task_id = operation["id"]
+        if task_id in seen_ids:
+            results[index] = {"index": index, "op": op, "status": 409, "error": "Tarefa repetida no lote"}
+            continue
+        seen_ids.add(task_id)
+        if op == "update":
+            updates.setdefault(tuple(sorted(values.items())), []).append((index, task_id))
+        else:
+            deletes.append((index, task_id))
+
+    try:
+        # 2. Quais ids pertencem ao usuário (uma consulta)
+        owned = set()
+        if seen_ids:
+            owned = set(db.session.scalars(
+                select(Task.id).where(Task.user_id == user_id, Task.id.in_(seen_ids))
+            ))
+        for items in list(updates.values()) + [deletes]:
+            for index, task_id in items:
+                if task_id not in owned:
+                    op = operations[index]["op"]
+                    results[index] = {"index": index, "op": op, "status": 404, "error": "Tarefa não encontrada"}
+
+        # 3. Criações: um INSERT com todas as linhas
+        if creates:
+            rows = [{"user_id": user_id, **values} for _, values in creates]
+            created = db.session.scalars(insert(Task).returning(Task, sort_by_parameter_order=True), rows).all()
+            for (index, _), task in zip(creates, created):
+                results[index] = {"index": index, "op": "create", "status": 201, "task": task_serializer.dump(task)}
+
+        # 4. Atualizações: um UPDATE por combinação de valores
+        updated_ids = {}
+        for values, items in updates.items():
+            ids = [task_id for _, task_id in items if task_id in owned]
+            if not ids:
+                continue
+            db.session.execute(
+                update(Task).where(Task.user_id == user_id, Task.id.in_(ids)).values(dict(values)),
+                execution_options={"synchronize_session": False}
+            )
+            updated_ids.update({task_id: index for index, task_id in items if task_id in owned})
+        if updated_ids:
+            tasks = db.session.scalars(
+                select(Task).where(Task.id.in_(updated_ids)).execution_options(populate_existing=True)
+            )
+            for task in tasks:
+                index = updated_ids[task.id]
+                results[index] = {"index": index, "op": "update", "status": 200, "task": task_serializer.dump(task)}
+
+        # 5. Remoções: um DELETE com todos os ids
+        delete_ids = [task_id for _, task_id in deletes if task_id in owned]
+        if delete_ids:
+            db.session.execute(
+                delete(Task).where(Task.user_id == user_id, Task.id.in_(delete_ids)),
+                execution_options={"synchronize_session": False}
+            )
+            for index, task_id in deletes:
+                if task_id in owned:
+                    results[index] = {"index": index, "op": "delete", "status": 204}
+
+        if creates or updated_ids or delete_ids:
+            _bump_version(user_id)
+        db.session.commit()
+        return results
+    except Exception as e:
+        db.session.rollback()
+        raise Exception(f"Erro ao aplicar lote de tarefas: {str(e)}")
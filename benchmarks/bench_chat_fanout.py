@@ -0,0 +1,114 @@
+# /benchmarks/bench_chat_fanout.py
+"""
+Benchmark de um turno do chat com latências artificiais:
+leitura do histórico (banco), embedding da pergunta, busca no Qdrant e
+chamada ao modelo. Compara as etapas em sequência (CHAT_FANOUT_WORKERS=0)
+com a busca RAG em paralelo à leitura do histórico.
+
+Tudo é local: SQLite em memória, FakeEmbedder, um Qdrant fake que só
+dorme e o FakeChatModel. O esperado é o turno cair de
+historico + embedding + busca + modelo para
+max(historico, embedding + busca) + modelo.
+
+Uso:
+    python -m benchmarks.bench_chat_fanout
+    python -m benchmarks.bench_chat_fanout --history-ms 80 --embed-ms 120 --search-ms 60 --turns 20
+"""
+
+import argparse
+import os
+import time
+import types
+
+from benchmarks.bench_qdrant_indexes import percentile
+
+
+class FakeQdrant:
+    """Fake do cliente Qdrant: dorme a latência configurada e devolve um ponto."""
+
+    def __init__(self, latency: float, dimension: int):
+        self.latency = latency
+        self.dimension = dimension
+
+    def query_points(self, collection_name, limit=10, **kwargs):
+        time.sleep(self.latency)
+        point = types.SimpleNamespace(payload={"text": "A mitocôndria produz ATP."}, vector=[1.0] * self.dimension, score=1.0)
+        return types.SimpleNamespace(points=[point])
+
+
+def run(app, turns: int, session_id: str):
+    """Executa 'turns' turnos na mesma sessão e retorna as latências (ms)."""
+    from app.services import chat_service
+
+    latencies = []
+    with app.app_context():
+        for i in range(turns):
+            start = time.perf_counter()
+            chat_service.send_chat_message(f"pergunta {i} sobre mitocôndria", session_id=session_id, user_id=1)
+            latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--history-ms", type=float, default=80)
+    parser.add_argument("--embed-ms", type=float, default=120)
+    parser.add_argument("--search-ms", type=float, default=60)
+    parser.add_argument("--model-ms", type=float, default=200)
+    parser.add_argument("--turns", type=int, default=15)
+    args = parser.parse_args()
+
+    os.environ.setdefault("SECRET_KEY", "bench")
+    from flask import Flask
+    from app.core.config import settings
+    from app.extensions import db, qdrant
+    from app.models import User
+    from app.services import embedding_client, llm_gateway, rag_service, summary_service
+
+    dimension = 8
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite://"
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        db.session.add(User(id=1, username="bench"))
+        db.session.commit()
+
+    # Latências injetadas em cada etapa
+    embedding_client.set_client(embedding_client.EmbeddingClient(
+        embed_fn=embedding_client.FakeEmbedder(dimension=dimension, latency=args.embed_ms / 1000),
+        max_batch_items=64, max_batch_chars=60000, max_concurrency=4, max_retries=0,
+    ))
+    qdrant.set_client(FakeQdrant(args.search_ms / 1000, dimension))
+    rag_service._sparse_available = False
+    llm_gateway.set_gateway(llm_gateway.build_gateway(
+        lambda **kwargs: llm_gateway.FakeChatModel(first_token_latency=args.model_ms / 1000, **kwargs)
+    ))
+    load_session = summary_service.load_session
+
+    def slow_load_session(user_id, session_id):
+        time.sleep(args.history_ms / 1000)
+        return load_session(user_id, session_id)
+
+    summary_service.load_session = slow_load_session
+
+    # Sem atualização do resumo no meio, para medir só o caminho do turno
+    settings.CHAT_SUMMARY_BATCH = args.turns * 2
+
+    results = {}
+    for label, workers in (("sequência", 0), ("paralelo", 8)):
+        settings.CHAT_FANOUT_WORKERS = workers
+        rag_service.query_embedding_cache.clear()
+        results[label] = run(app, args.turns, session_id=f"bench-{workers}")
+
+    print(f"latências injetadas (ms): histórico {args.history_ms:g}  embedding {args.embed_ms:g}  "
+          f"busca {args.search_ms:g}  modelo {args.model_ms:g}")
+    print(f"esperado (ms): sequência ~{args.history_ms + args.embed_ms + args.search_ms + args.model_ms:g}  "
+          f"paralelo ~{max(args.history_ms, args.embed_ms + args.search_ms) + args.model_ms:g}")
+    print(f"{'':>10} {'p50 ms':>8} {'p95 ms':>8}")
+    for label, values in results.items():
+        print(f"{label:>10} {percentile(values, 0.5):>8.1f} {percentile(values, 0.95):>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
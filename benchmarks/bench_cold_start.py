@@ -0,0 +1,149 @@
+# /benchmarks/bench_cold_start.py
+"""
+Benchmark de partida a frio: tempo de 'import app' (relatório no estilo
+'python -X importtime', com os módulos mais caros), tempo do create_app()
+e da primeira requisição. Cada medida roda num interpretador novo.
+
+Também confere se as dependências pesadas (SDK do Gemini, qdrant-client,
+pypdf, langchain, numpy) ficaram fora do import do app: elas só devem ser
+carregadas pelos caminhos que as usam.
+
+Tudo é local: SQLite em memória e Qdrant em memória (QDRANT_HOST=:memory:),
+sem rede.
+
+Uso:
+    python -m benchmarks.bench_cold_start
+    python -m benchmarks.bench_cold_start --runs 10 --top 15 --json cold_start.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Módulos que não deveriam ser importados junto com o app
+HEAVY_MODULES = (
+    "google.generativeai",
+    "google.api_core.exceptions",
+    "qdrant_client",
+    "pypdf",
+    "langchain_text_splitters",
+    "numpy",
+)
+
+# Mede, num processo novo, o import do app, o create_app() e a primeira requisição
+BOOT_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+flask_app = app.create_app()
+created = time.perf_counter()
+response = flask_app.test_client().get("/")
+done = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - start) * 1000,
+    "create_app_ms": (created - imported) * 1000,
+    "first_request_ms": (done - created) * 1000,
+    "status": response.status_code,
+    "heavy_loaded": sorted(name for name in %r if name in sys.modules),
+}))
+""" % (HEAVY_MODULES,)
+
+
+def bench_env():
+    env = dict(os.environ)
+    env.setdefault("SECRET_KEY", "bench")
+    env["DATABASE_URL"] = "sqlite://"
+    env["QDRANT_HOST"] = ":memory:"
+    # Sem bootstrap na primeira requisição: mede só o boot do app
+    env["QDRANT_BOOTSTRAP"] = "off"
+    return env
+
+
+def parse_importtime(stderr: str):
+    """Lê a saída do -X importtime e retorna [(módulo, próprio µs, acumulado µs)] na ordem do relatório."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue
+        rows.append((parts[2].strip(), int(parts[0]), int(parts[1])))
+    return rows
+
+
+def importtime_report(env):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app"],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+    return parse_importtime(result.stderr)
+
+
+def boot_once(env):
+    result = subprocess.run(
+        [sys.executable, "-c", BOOT_SCRIPT],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+    # A última linha JSON (o app pode imprimir logs antes)
+    return json.loads([line for line in result.stdout.splitlines() if line.startswith("{")][-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5, help="Processos novos por medida (usa a mediana).")
+    parser.add_argument("--top", type=int, default=10, help="Quantos módulos mostrar no relatório de import.")
+    parser.add_argument("--json", default=None, help="Grava o resultado neste arquivo JSON.")
+    args = parser.parse_args()
+
+    env = bench_env()
+
+    rows = importtime_report(env)
+    total_us = next(cumulative for name, _, cumulative in rows if name == "app")
+    loaded = {name for name, _, _ in rows}
+    heavy = [name for name in HEAVY_MODULES if name in loaded]
+    top = sorted(rows, key=lambda row: row[2], reverse=True)[1:args.top + 1]
+
+    print(f"import app (-X importtime): {total_us / 1000:.1f} ms, {len(rows)} módulos")
+    print(f"{'acumulado ms':>13} {'próprio ms':>11}  módulo")
+    for name, self_us, cumulative_us in top:
+        print(f"{cumulative_us / 1000:>13.1f} {self_us / 1000:>11.1f}  {name}")
+    print(f"dependências pesadas no import: {', '.join(heavy) or 'nenhuma'}")
+
+    runs = [boot_once(env) for _ in range(args.runs)]
+    summary = {
+        key: statistics.median(run[key] for run in runs)
+        for key in ("import_ms", "create_app_ms", "first_request_ms")
+    }
+    summary["total_ms"] = sum(summary.values())
+    print(f"\npartida a frio (mediana de {args.runs} processos):")
+    print(f"  import app       {summary['import_ms']:>8.1f} ms")
+    print(f"  create_app()     {summary['create_app_ms']:>8.1f} ms")
+    print(f"  1ª requisição    {summary['first_request_ms']:>8.1f} ms")
+    print(f"  total            {summary['total_ms']:>8.1f} ms")
+    print(f"dependências pesadas após a 1ª requisição: {', '.join(runs[-1]['heavy_loaded']) or 'nenhuma'}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({
+                "python": sys.version.split()[0],
+                "importtime_total_ms": total_us / 1000,
+                "importtime_top": [
+                    {"module": name, "self_ms": self_us / 1000, "cumulative_ms": cumulative_us / 1000}
+                    for name, self_us, cumulative_us in top
+                ],
+                "heavy_on_import": heavy,
+                "boot": summary,
+                "runs": runs,
+            }, f, indent=2)
+        print(f"resultado gravado em {args.json}")
+
+
+if __name__ == "__main__":
+    main()
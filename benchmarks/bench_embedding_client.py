@@ -0,0 +1,53 @@
+# /benchmarks/bench_embedding_client.py
+"""
+Benchmark do cliente de embeddings (app.services.embedding_client).
+
+Usa o FakeEmbedder (latência simulada + fração de 429) para medir, sem
+rede, a vazão em textos/s com diferentes níveis de concorrência e quantas
+novas tentativas foram necessárias. Também confere que a ordem de saída
+bate com a de entrada.
+
+Uso:
+    python -m benchmarks.bench_embedding_client
+    python -m benchmarks.bench_embedding_client --texts 5000 --failure-rate 0.2
+"""
+
+import argparse
+import time
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--texts", type=int, default=2000)
+    parser.add_argument("--chars", type=int, default=900, help="Tamanho de cada texto")
+    parser.add_argument("--latency", type=float, default=0.08, help="Latência fixa por requisição (s)")
+    parser.add_argument("--per-item-latency", type=float, default=0.001)
+    parser.add_argument("--failure-rate", type=float, default=0.1)
+    parser.add_argument("--batch-items", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    from app.services.embedding_client import EmbeddingClient, FakeEmbedder
+
+    texts = [f"chunk {i} " + "x" * args.chars for i in range(args.texts)]
+    reference = FakeEmbedder(dimension=8)
+
+    print(f"textos: {args.texts}  latência: {args.latency}s  falhas: {args.failure_rate:.0%}")
+    print(f"{'concorrência':>12} {'s':>7} {'textos/s':>9} {'requisições':>11} {'retries':>8} {'ordem ok':>9}")
+    for concurrency in args.concurrency:
+        fake = FakeEmbedder(dimension=8, latency=args.latency, per_item_latency=args.per_item_latency,
+                            failure_rate=args.failure_rate, seed=concurrency)
+        client = EmbeddingClient(embed_fn=fake, max_batch_items=args.batch_items, max_concurrency=concurrency,
+                                 max_retries=8, base_delay=0.05, max_delay=1.0)
+        start = time.perf_counter()
+        vectors = client.embed(texts, model="fake", task_type="RETRIEVAL_DOCUMENT")
+        elapsed = time.perf_counter() - start
+
+        in_order = vectors == [reference._vector(t) for t in texts]
+        stats = client.stats()
+        print(f"{concurrency:>12} {elapsed:>7.2f} {args.texts / elapsed:>9.0f} {stats['requests']:>11} "
+              f"{stats['retries']:>8} {str(in_order):>9}")
+
+
+if __name__ == "__main__":
+    main()
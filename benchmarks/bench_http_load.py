@@ -0,0 +1,343 @@
+# /benchmarks/bench_http_load.py
+"""
+Teste de carga HTTP da API: sobe o create_app num servidor local (thread)
+e dispara requisições reais, com concorrência controlada, contra os
+endpoints principais. Mede vazão (req/s) e latência p50/p95/p99 por
+endpoint e grava o resultado em JSON para comparar entre commits.
+
+Tudo local: SQLite em arquivo (ou um Postgres local com --database-url),
+o Qdrant em memória (modo local do qdrant-client), o FakeChatModel no
+lugar do Gemini e o FakeEmbedder no lugar da API de embeddings, com
+latências configuráveis.
+
+Com SQLite, escritas concorrentes disputam um único lock do banco: o
+chat_send mantém a transação do turno aberta durante a chamada ao modelo,
+então sob concorrência aparecem erros "database is locked" (500). Para
+números de produção use um Postgres local (--database-url).
+
+Cenários: auth (POST /auth/guest), tasks_create, tasks_list,
+tasks_list_304 (GET condicional), tasks_batch, chat_send, chat_history,
+documents_upload.
+
+Uso:
+    python -m benchmarks.bench_http_load
+    python -m benchmarks.bench_http_load --concurrency 16 --requests 400 --model-ms 300 --output carga.json
+    python -m benchmarks.bench_http_load --database-url postgresql://localhost/aprendi_bench --compare carga.json
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from http.client import HTTPConnection
+
+from benchmarks.bench_qdrant_indexes import percentile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCENARIOS = (
+    "auth", "tasks_create", "tasks_list", "tasks_list_304", "tasks_batch",
+    "chat_send", "chat_history", "documents_upload",
+)
+
+
+def configure_env(args, tmp):
+    """Configura o app (via variáveis de ambiente) antes de importá-lo."""
+    os.environ["SECRET_KEY"] = os.environ.get("SECRET_KEY") or "bench-" + "x" * 32
+    os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+    os.environ["QDRANT_HOST"] = ":memory:"
+    os.environ["QDRANT_BOOTSTRAP"] = "off"
+    os.environ["CHAT_PROVIDER"] = "fake"
+    os.environ["FAKE_CHAT_FIRST_TOKEN_LATENCY"] = str(args.model_ms / 1000)
+    os.environ["EMBEDDING_PROVIDER"] = "fake"
+    os.environ["FAKE_EMBEDDING_LATENCY"] = str(args.embed_ms / 1000)
+    os.environ["INGESTION_UPLOAD_DIR"] = os.path.join(tmp, "uploads")
+    os.environ["INGESTION_POLL_INTERVAL"] = "0.2"
+
+
+class SerializedQdrant:
+    """
+    Cliente Qdrant em memória com uma chamada por vez. O modo local do
+    qdrant-client não é thread-safe (upsert e set_payload concorrentes
+    corrompem os arrays internos); um servidor Qdrant de verdade não precisa disso.
+    """
+
+    def __init__(self, client):
+        self._client = client
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            with self._lock:
+                return attr(*args, **kwargs)
+        return call
+
+
+def start_server(args):
+    """Cria o app, prepara banco e coleção e o serve numa thread. Retorna (servidor, app)."""
+    import logging
+    from qdrant_client import QdrantClient
+    from werkzeug.serving import make_server
+    from app import create_app, run_bootstrap
+    from app.extensions import db, qdrant
+
+    app = create_app()
+    # O /auth/guest emite o 'sub' do token como inteiro, que o PyJWT recente recusa na verificação
+    app.config["JWT_VERIFY_SUB"] = False
+    with app.app_context():
+        db.create_all()
+    qdrant.set_client(SerializedQdrant(QdrantClient(":memory:")))
+    run_bootstrap(app)
+
+    # Sem uma linha de log por requisição
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, name="bench-http", daemon=True).start()
+    return server, app
+
+
+class Client:
+    """Conexão HTTP keep-alive de um worker (reconecta se o servidor fechar)."""
+
+    def __init__(self, port):
+        self.port = port
+        self.connection = None
+
+    def request(self, method, path, body=None, headers=None):
+        for attempt in (1, 2):
+            if self.connection is None:
+                self.connection = HTTPConnection("127.0.0.1", self.port, timeout=60)
+            try:
+                self.connection.request(method, path, body=body, headers=headers or {})
+                response = self.connection.getresponse()
+                data = response.read()
+                return response.status, response.headers, data
+            except (ConnectionError, OSError):
+                self.connection.close()
+                self.connection = None
+                if attempt == 2:
+                    raise
+
+
+def json_request(client, method, path, token=None, payload=None, headers=None):
+    headers = dict(headers or {})
+    body = None
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    if payload is not None:
+        body = json.dumps(payload).encode()
+        headers["Content-Type"] = "application/json"
+    return client.request(method, path, body=body, headers=headers)
+
+
+def multipart_pdf(filename, content):
+    boundary = uuid.uuid4().hex
+    body = (
+        f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"{filename}\"\r\n"
+        f"Content-Type: application/pdf\r\n\r\n"
+    ).encode() + content + f"\r\n--{boundary}--\r\n".encode()
+    return body, f"multipart/form-data; boundary={boundary}"
+
+
+def run_scenario(port, name, requests, concurrency, make_request):
+    """
+    Executa 'requests' chamadas de make_request(client, i) com 'concurrency'
+    workers. make_request retorna (status, status esperado). Retorna as métricas.
+    """
+    latencies = []
+    errors = {}
+    lock = threading.Lock()
+    local = threading.local()
+
+    def one(i):
+        if not hasattr(local, "client"):
+            local.client = Client(port)
+        start = time.perf_counter()
+        try:
+            status, expected = make_request(local.client, i)
+            ok = status in expected
+            key = str(status)
+        except Exception as e:
+            ok, key = False, type(e).__name__
+        elapsed = (time.perf_counter() - start) * 1000
+        with lock:
+            latencies.append(elapsed)
+            if not ok:
+                errors[key] = errors.get(key, 0) + 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(requests)))
+    wall = time.perf_counter() - start
+    return {
+        "requests": requests,
+        "errors": sum(errors.values()),
+        "error_status": errors,
+        "throughput_rps": round(requests / wall, 1),
+        "mean_ms": round(sum(latencies) / len(latencies), 2),
+        "p50_ms": round(percentile(latencies, 0.50), 2),
+        "p95_ms": round(percentile(latencies, 0.95), 2),
+        "p99_ms": round(percentile(latencies, 0.99), 2),
+    }
+
+
+def build_scenarios(port, args, tokens):
+    """Monta as funções de cada cenário. Cada worker usa um dos usuários criados no setup."""
+    from benchmarks.synthetic_pdf import build_pdf
+
+    setup = Client(port)
+    token_for = lambda i: tokens[i % len(tokens)]
+
+    # Cada usuário começa com algumas tarefas e uma sessão de chat com histórico
+    for token in tokens:
+        json_request(setup, "POST", "/tasks/batch", token, {
+            "operations": [{"op": "create", "content": f"Tarefa inicial {n}"} for n in range(args.seed_tasks)]
+        })
+    task_ids = {}
+    for token in tokens:
+        _, _, data = json_request(setup, "GET", "/tasks/?limit=50", token)
+        task_ids[token] = [task["id"] for task in json.loads(data)]
+
+    def auth(client, i):
+        return client.request("POST", "/auth/guest")[0], (200, 201)
+
+    def tasks_create(client, i):
+        return json_request(client, "POST", "/tasks/", token_for(i), {"content": f"Tarefa {i}"})[0], (201,)
+
+    def tasks_list(client, i):
+        return json_request(client, "GET", "/tasks/?limit=50", token_for(i))[0], (200,)
+
+    # ETag atual da lista de cada usuário, lido no início do cenário (outros cenários mudam as tarefas)
+    etags = {}
+
+    def refresh_etags():
+        for token in tokens:
+            etags[token] = json_request(setup, "GET", "/tasks/?limit=50", token)[1].get("ETag")
+
+    def tasks_list_304(client, i):
+        token = token_for(i)
+        return json_request(client, "GET", "/tasks/?limit=50", token, headers={"If-None-Match": etags[token]})[0], (304,)
+
+    def tasks_batch(client, i):
+        token = token_for(i)
+        operations = [{"op": "update", "id": task_id, "is_completed": i % 2 == 0} for task_id in task_ids[token][:20]]
+        return json_request(client, "POST", "/tasks/batch", token, {"operations": operations})[0], (200,)
+
+    def chat_send(client, i):
+        payload = {"prompt": f"Explique a função da mitocôndria ({i})", "session_id": f"bench-{i % len(tokens)}"}
+        return json_request(client, "POST", "/chat/send", token_for(i), payload)[0], (200,)
+
+    def chat_history(client, i):
+        return json_request(client, "GET", f"/chat/bench-{i % len(tokens)}?limit=50", token_for(i))[0], (200,)
+
+    def documents_upload(client, i):
+        # PDFs diferentes (seed) para não cair na deduplicação por conteúdo
+        body, content_type = multipart_pdf(f"apostila-{i}.pdf", build_pdf(args.pdf_pages, seed=1000 + i))
+        headers = {"Authorization": f"Bearer {token_for(i)}", "Content-Type": content_type}
+        return client.request("POST", "/documents/upload", body=body, headers=headers)[0], (200, 202)
+
+    scenarios = {
+        "auth": auth, "tasks_create": tasks_create, "tasks_list": tasks_list,
+        "tasks_list_304": tasks_list_304, "tasks_batch": tasks_batch, "chat_send": chat_send,
+        "chat_history": chat_history, "documents_upload": documents_upload,
+    }
+    # Preparação que roda logo antes do cenário
+    prepare = {"tasks_list_304": refresh_etags}
+    return scenarios, prepare
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def print_results(results, previous=None):
+    header = f"{'cenário':>17} {'req':>6} {'erros':>6} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"
+    print(header + ("  Δp95 / Δreq/s vs anterior" if previous else ""))
+    for name, r in results.items():
+        line = (f"{name:>17} {r['requests']:>6} {r['errors']:>6} {r['throughput_rps']:>9.1f} "
+                f"{r['p50_ms']:>9.1f} {r['p95_ms']:>9.1f} {r['p99_ms']:>9.1f}")
+        old = (previous or {}).get(name)
+        if old:
+            line += (f"  {(r['p95_ms'] / old['p95_ms'] - 1) * 100:+6.1f}% / "
+                     f"{(r['throughput_rps'] / old['throughput_rps'] - 1) * 100:+6.1f}%")
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=200, help="Requisições por cenário.")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--users", type=int, default=8, help="Usuários (convidados) criados antes dos cenários.")
+    parser.add_argument("--seed-tasks", type=int, default=50, help="Tarefas criadas para cada usuário no setup.")
+    parser.add_argument("--model-ms", type=float, default=200, help="Latência do modelo fake (primeiro token).")
+    parser.add_argument("--embed-ms", type=float, default=50, help="Latência do embedder fake por chamada.")
+    parser.add_argument("--pdf-pages", type=int, default=5)
+    parser.add_argument("--database-url", default=None, help="Ex: postgresql://localhost/bench (padrão: SQLite em arquivo).")
+    parser.add_argument("--output", default=None, help="Grava o resultado neste arquivo JSON.")
+    parser.add_argument("--compare", default=None, help="JSON de uma execução anterior para comparar.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        configure_env(args, tmp)
+        server, app = start_server(args)
+        port = server.server_port
+        try:
+            setup = Client(port)
+            tokens = [json.loads(setup.request("POST", "/auth/guest")[2])["access_token"] for _ in range(args.users)]
+            scenarios, prepare = build_scenarios(port, args, tokens)
+
+            results = {}
+            for name in args.scenarios:
+                if name in prepare:
+                    prepare[name]()
+                results[name] = run_scenario(port, name, args.requests, args.concurrency, scenarios[name])
+                print(f"  {name}: {results[name]['throughput_rps']} req/s, p95 {results[name]['p95_ms']} ms", file=sys.stderr)
+        finally:
+            server.shutdown()
+            from app.services.ingestion_worker import ingestion_pool
+            ingestion_pool.stop()
+
+    previous = None
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)["results"]
+
+    print(f"\nconcorrência {args.concurrency}, {args.requests} req/cenário, modelo {args.model_ms:g} ms, "
+          f"embedding {args.embed_ms:g} ms, banco {'SQLite' if not args.database_url else args.database_url.split(':')[0]}")
+    print_results(results, previous)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "meta": {
+                    "commit": git_commit(),
+                    "python": sys.version.split()[0],
+                    "database": "sqlite" if not args.database_url else args.database_url.split(":")[0],
+                    "concurrency": args.concurrency,
+                    "requests": args.requests,
+                    "model_ms": args.model_ms,
+                    "embed_ms": args.embed_ms,
+                    "pdf_pages": args.pdf_pages,
+                    "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                },
+                "results": results,
+            }, f, indent=2)
+        print(f"resultado gravado em {args.output}")
+
+
+if __name__ == "__main__":
+    main()
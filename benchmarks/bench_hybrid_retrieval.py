@@ -0,0 +1,170 @@
+# /benchmarks/bench_hybrid_retrieval.py
+"""
+Benchmark offline de recall@k e latência: busca só densa vs híbrida
+(denso + BM25 esparso, combinados por Reciprocal Rank Fusion).
+
+O corpus é sintético: cada chunk mistura vocabulário comum de uma matéria
+com um termo raro e exato (sigla, fórmula, nome próprio), e cada pergunta
+cita esse termo. O "embedder" denso é de brinquedo (média de vetores
+aleatórios por palavra), o que basta para mostrar o efeito da diluição de
+termos raros. Roda no modo local em memória do qdrant-client.
+
+Uso:
+    python -m benchmarks.bench_hybrid_retrieval
+    python -m benchmarks.bench_hybrid_retrieval --chunks 5000 --queries 300
+"""
+
+import argparse
+import random
+import time
+import uuid
+
+from benchmarks.bench_qdrant_indexes import percentile
+
+TOPICS = {
+    "biologia": "célula membrana energia proteína organismo tecido síntese gene núcleo enzima",
+    "química": "reação solução ácido base molécula ligação composto elemento mistura átomo",
+    "história": "império guerra revolução tratado governo rei povo colônia período poder",
+    "física": "força massa velocidade energia campo onda corrente partícula movimento carga",
+}
+SYLLABLES = ["ka", "lo", "mi", "ri", "ta", "ne", "zu", "po", "vi", "sa", "de", "qu"]
+
+
+def rare_term(rng, i):
+    """Termo raro e único por chunk: sigla, fórmula ou nome inventado."""
+    kind = i % 3
+    if kind == 0:
+        return "".join(rng.choice("BCDFGHKLMNPRSTVXZ") for _ in range(4)) + str(i)
+    if kind == 1:
+        return f"{rng.choice('CHNOSP')}{rng.randint(2, 9)}{rng.choice('CHNOSP')}{rng.randint(2, 9)}x{i}"
+    return "".join(rng.choice(SYLLABLES) for _ in range(3)).capitalize() + str(i)
+
+
+class ToyEmbedder:
+    """Embedding denso = média normalizada de vetores aleatórios (fixos) por palavra."""
+
+    def __init__(self, dim):
+        self.dim = dim
+        self._vectors = {}
+
+    def _word(self, word):
+        vector = self._vectors.get(word)
+        if vector is None:
+            rng = random.Random(word)
+            vector = self._vectors[word] = [rng.gauss(0, 1) for _ in range(self.dim)]
+        return vector
+
+    def embed(self, text):
+        from app.services.sparse_encoder import tokenize
+
+        total = [0.0] * self.dim
+        for word in tokenize(text):
+            for j, value in enumerate(self._word(word)):
+                total[j] += value
+        norm = sum(v * v for v in total) ** 0.5 or 1.0
+        return [v / norm for v in total]
+
+
+def build_corpus(chunks, rng):
+    corpus = []
+    for i in range(chunks):
+        topic = rng.choice(list(TOPICS))
+        words = TOPICS[topic].split()
+        body = [rng.choice(words) for _ in range(60)]
+        term = rare_term(rng, i)
+        body.insert(rng.randrange(len(body)), term)
+        corpus.append((topic, term, " ".join(body)))
+    return corpus
+
+
+def run_queries(client, name, queries, embedder, hybrid, prefetch, k):
+    from qdrant_client import models
+    from app.core.qdrant_bootstrap import SPARSE_VECTOR_NAME
+    from app.services import sparse_encoder
+
+    hits = {1: 0, 3: 0, 5: 0}
+    latencies = []
+    user_filter = models.Filter(must=[models.FieldCondition(key="user_id", match=models.MatchValue(value=1))])
+    for expected_id, question in queries:
+        start = time.perf_counter()
+        vector = embedder.embed(question)
+        if hybrid:
+            points = client.query_points(
+                collection_name=name,
+                prefetch=[
+                    models.Prefetch(query=vector, filter=user_filter, limit=prefetch),
+                    models.Prefetch(
+                        query=sparse_encoder.encode_query(question), using=SPARSE_VECTOR_NAME,
+                        filter=user_filter, limit=prefetch
+                    ),
+                ],
+                query=models.FusionQuery(fusion=models.Fusion.RRF),
+                query_filter=user_filter,
+                limit=k
+            ).points
+        else:
+            points = client.query_points(collection_name=name, query=vector, query_filter=user_filter, limit=k).points
+        latencies.append((time.perf_counter() - start) * 1000)
+        ranked = [point.id for point in points]
+        for cutoff in hits:
+            if expected_id in ranked[:cutoff]:
+                hits[cutoff] += 1
+    return {cutoff: count / len(queries) for cutoff, count in hits.items()}, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--chunks", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--dim", type=int, default=64)
+    parser.add_argument("--prefetch", type=int, default=20)
+    args = parser.parse_args()
+
+    from qdrant_client import QdrantClient, models
+    from app.core.qdrant_bootstrap import bootstrap_collection, SPARSE_VECTOR_NAME
+    from app.services import sparse_encoder
+
+    rng = random.Random(11)
+    embedder = ToyEmbedder(args.dim)
+    client = QdrantClient(":memory:")
+    name = f"bench_{uuid.uuid4().hex[:8]}"
+    bootstrap_collection(client, {
+        "QDRANT_COLLECTION_NAME": name,
+        "EMBEDDING_DIM": args.dim,
+        "QDRANT_QUANTIZATION": "none",
+        "QDRANT_VECTORS_ON_DISK": False,
+        "QDRANT_PAYLOAD_ON_DISK": False,
+        "QDRANT_MULTITENANT": False,
+    })
+
+    corpus = build_corpus(args.chunks, rng)
+    ids = [str(uuid.uuid4()) for _ in corpus]
+    for start in range(0, len(corpus), 500):
+        client.upsert(name, points=[
+            models.PointStruct(
+                id=ids[i],
+                vector={"": embedder.embed(text), SPARSE_VECTOR_NAME: sparse_encoder.encode_document(text)},
+                payload={"user_id": 1, "text": text}
+            )
+            for i, (_, _, text) in enumerate(corpus[start:start + 500], start)
+        ], wait=True)
+
+    # Pergunta = termo raro + um trecho vizinho do chunk (como um aluno perguntaria)
+    queries = []
+    for i in rng.sample(range(len(corpus)), min(args.queries, len(corpus))):
+        _, term, text = corpus[i]
+        words = text.split()
+        start = max(0, words.index(term) - 6)
+        context = " ".join(word for word in words[start:start + 12] if word != term)
+        queries.append((ids[i], f"o que é {term} em '{context}'?"))
+
+    print(f"chunks: {args.chunks}  perguntas: {len(queries)}  dim: {args.dim}  prefetch: {args.prefetch}")
+    print(f"{'':>8} {'R@1':>6} {'R@3':>6} {'R@5':>6} {'p50 ms':>8} {'p95 ms':>8}")
+    for label, hybrid in (("densa", False), ("híbrida", True)):
+        recall, latencies = run_queries(client, name, queries, embedder, hybrid, args.prefetch, k=5)
+        print(f"{label:>8} {recall[1]:>6.2f} {recall[3]:>6.2f} {recall[5]:>6.2f} "
+              f"{percentile(latencies, 0.5):>8.2f} {percentile(latencies, 0.95):>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+# /benchmarks/bench_ingestion.py
+"""
+Benchmark do pipeline de ingestão (rag_service.process_and_store_document).
+
+Mede a vazão (páginas/s) e o pico de memória (RSS) para PDFs sintéticos de
+10, 100 e 1000 páginas. O Gemini e o Qdrant são substituídos por fakes locais,
+então o que se mede é só o custo de leitura, chunking e montagem dos lotes.
+
+Cada tamanho roda num subprocesso separado, para que o pico de RSS de um
+não contamine o próximo.
+
+Uso:
+    python -m benchmarks.bench_ingestion
+    python -m benchmarks.bench_ingestion --pages 10 100 1000
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+EMBEDDING_DIM = 768
+
+
+class FakeQdrant:
+    """Fake do cliente Qdrant: só conta os pontos recebidos."""
+
+    def __init__(self):
+        self.points = 0
+        self.batches = 0
+
+    def upsert(self, collection_name, points, wait=True):
+        self.points += len(points)
+        self.batches += 1
+
+    def delete(self, collection_name, points_selector, wait=True):
+        pass
+
+    def set_payload(self, collection_name, payload, points, wait=True):
+        pass
+
+
+def fake_embed_documents(chunks):
+    """Fake do embedding: devolve um vetor fixo por chunk."""
+    return [[0.0] * EMBEDDING_DIM for _ in chunks]
+
+
+def run_single(num_pages: int):
+    """Executa uma ingestão e imprime o resultado em JSON (roda no subprocesso)."""
+    from werkzeug.datastructures import FileStorage
+    from app.extensions import qdrant
+    from app.services import rag_service
+    from benchmarks.synthetic_pdf import build_pdf
+
+    fake_qdrant = FakeQdrant()
+    qdrant.set_client(fake_qdrant)
+    rag_service._sparse_available = False
+    rag_service._embed_documents = fake_embed_documents
+
+    # Registro de documentos (tabela 'documents') num SQLite em memória
+    from flask import Flask
+    from app.extensions import db
+    from app.models import User
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite://"
+    db.init_app(app)
+    app.app_context().push()
+    db.create_all()
+    db.session.add(User(id=1, username="bench"))
+    db.session.commit()
+
+    # O PDF vai para o disco, como o Werkzeug faz com uploads grandes
+    with tempfile.TemporaryFile() as tmp:
+        tmp.write(build_pdf(num_pages))
+        file_size = tmp.tell()
+        tmp.seek(0)
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+        start = time.perf_counter()
+        rag_service.process_and_store_document(
+            FileStorage(stream=tmp, filename=f"bench_{num_pages}.pdf"),
+            user_id=1
+        )
+        elapsed = time.perf_counter() - start
+
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({
+        "pages": num_pages,
+        "file_mb": round(file_size / 1e6, 2),
+        "seconds": round(elapsed, 3),
+        "pages_per_s": round(num_pages / elapsed, 1),
+        "chunks": fake_qdrant.points,
+        "batches": fake_qdrant.batches,
+        # ru_maxrss é em KB no Linux
+        "peak_rss_mb": round(rss_after / 1024, 1),
+        "rss_growth_mb": round((rss_after - rss_before) / 1024, 1),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pages", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--single", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single:
+        run_single(args.single)
+        return
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    print(f"{'páginas':>8} {'MB':>7} {'s':>8} {'pág/s':>9} {'chunks':>7} {'pico RSS MB':>12} {'Δ RSS MB':>9}")
+    for num_pages in args.pages:
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_ingestion", "--single", str(num_pages)],
+            cwd=root, capture_output=True, text=True, check=True
+        ).stdout
+        r = json.loads(output.strip().splitlines()[-1])
+        print(f"{r['pages']:>8} {r['file_mb']:>7} {r['seconds']:>8} {r['pages_per_s']:>9} "
+              f"{r['chunks']:>7} {r['peak_rss_mb']:>12} {r['rss_growth_mb']:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+# /benchmarks/bench_llm_gateway.py
+"""
+Benchmark do gateway do modelo (app.services.llm_gateway) com o
+FakeChatModel: latência de cauda com e sem pedido "hedge" quando uma
+fração das respostas é lenta, e tempo de resposta durante uma queda do
+provedor com o disjuntor.
+
+Uso:
+    python -m benchmarks.bench_llm_gateway
+    python -m benchmarks.bench_llm_gateway --calls 400 --slow-rate 0.05 --slow-ms 2000
+"""
+
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.bench_qdrant_indexes import percentile
+
+
+def make_gateway(fake, hedge: bool, timeout: float, hedge_delay: float):
+    from app.services import llm_gateway
+
+    return llm_gateway.LLMGateway(
+        model_factory=lambda **kwargs: fake,
+        timeout=timeout,
+        hedge_enabled=hedge,
+        hedge_delay=hedge_delay,
+        hedge_percentile=0.95,
+        breaker=llm_gateway.CircuitBreaker(failure_threshold=5, reset_timeout=30),
+        max_concurrency=64,
+    )
+
+
+def measure(gateway, calls: int, concurrency: int):
+    """Faz 'calls' chamadas (com 'concurrency' em paralelo) e retorna (latências ms, erros)."""
+    errors = []
+
+    def one(i):
+        start = time.perf_counter()
+        try:
+            gateway.chat("fake", "sistema", [], f"pergunta {i}")
+        except Exception as e:
+            errors.append(type(e).__name__)
+        return (time.perf_counter() - start) * 1000
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(one, range(calls)))
+    return latencies, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--calls", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency-ms", type=float, default=100)
+    parser.add_argument("--slow-rate", type=float, default=0.05)
+    parser.add_argument("--slow-ms", type=float, default=1500)
+    parser.add_argument("--timeout", type=float, default=5.0)
+    args = parser.parse_args()
+
+    from app.services.llm_gateway import FakeChatModel
+
+    print(f"chamadas: {args.calls}  concorrência: {args.concurrency}  latência: {args.latency_ms:g} ms  "
+          f"lentas: {args.slow_rate:.0%} (+{args.slow_ms:g} ms)")
+    print(f"{'':>12} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'erros':>6}  gateway")
+    for label, hedge in (("sem hedge", False), ("com hedge", True)):
+        fake = FakeChatModel(first_token_latency=args.latency_ms / 1000, slow_rate=args.slow_rate,
+                             slow_latency=args.slow_ms / 1000, seed=1)
+        gateway = make_gateway(fake, hedge, args.timeout, hedge_delay=args.latency_ms * 2 / 1000)
+        latencies, errors = measure(gateway, args.calls, args.concurrency)
+        stats = gateway.stats()
+        print(f"{label:>12} {percentile(latencies, 0.5):>8.1f} {percentile(latencies, 0.95):>8.1f} "
+              f"{percentile(latencies, 0.99):>8.1f} {len(errors):>6}  "
+              f"hedges {stats['hedged']}, vencidos pelo hedge {stats['hedge_wins']}, chamadas ao modelo {fake.calls}")
+
+    # Queda do provedor: todas as chamadas falham depois da latência normal
+    fake = FakeChatModel(first_token_latency=args.latency_ms / 1000, failure_rate=1.0)
+    gateway = make_gateway(fake, False, args.timeout, hedge_delay=1.0)
+    latencies, errors = measure(gateway, 50, 1)
+    print(f"\nqueda do provedor (50 chamadas em sequência): p50 {percentile(latencies, 0.5):.1f} ms, "
+          f"p95 {percentile(latencies, 0.95):.1f} ms, chamadas ao modelo {fake.calls}, "
+          f"recusadas pelo disjuntor {gateway.stats()['rejected']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+# /benchmarks/bench_qdrant_indexes.py
+"""
+Benchmark da busca filtrada por usuário antes e depois do bootstrap da
+coleção (app.core.qdrant_bootstrap: índices de payload e quantização).
+
+Por padrão usa o modo local em memória do qdrant-client, que não precisa
+de servidor. Atenção: o modo local faz busca exata e ignora índices de
+payload, então a diferença real só aparece com '--url' apontando para um
+servidor Qdrant (ex: docker run -p 6333:6333 qdrant/qdrant).
+
+Uso:
+    python -m benchmarks.bench_qdrant_indexes
+    python -m benchmarks.bench_qdrant_indexes --url http://localhost:6333 --points 200000 --quantization int8
+"""
+
+import argparse
+import random
+import statistics
+import time
+import uuid
+
+
+def percentile(values, p):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+
+def measure(client, name, dim, users, queries, rng):
+    """Executa buscas filtradas por user_id e doc_name e retorna as latências (ms)."""
+    from qdrant_client import models
+
+    latencies = []
+    for _ in range(queries):
+        user_id = rng.randrange(users)
+        vector = [rng.uniform(-1, 1) for _ in range(dim)]
+        start = time.perf_counter()
+        client.query_points(
+            collection_name=name,
+            query=vector,
+            limit=3,
+            query_filter=models.Filter(must=[
+                models.FieldCondition(key="user_id", match=models.MatchValue(value=user_id)),
+                models.FieldCondition(key="doc_name", match=models.MatchValue(value=f"doc_{user_id}_0.pdf")),
+            ])
+        )
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", default=None, help="URL de um servidor Qdrant (padrão: modo local em memória)")
+    parser.add_argument("--points", type=int, default=20000)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--quantization", choices=["none", "int8"], default="none")
+    args = parser.parse_args()
+
+    from qdrant_client import QdrantClient, models
+    from app.core.qdrant_bootstrap import bootstrap_collection
+
+    rng = random.Random(7)
+    client = QdrantClient(url=args.url) if args.url else QdrantClient(":memory:")
+    name = f"bench_{uuid.uuid4().hex[:8]}"
+    config = {
+        "QDRANT_COLLECTION_NAME": name,
+        "EMBEDDING_DIM": args.dim,
+        "QDRANT_QUANTIZATION": args.quantization,
+        "QDRANT_VECTORS_ON_DISK": False,
+        "QDRANT_PAYLOAD_ON_DISK": False,
+        "QDRANT_MULTITENANT": False,
+    }
+
+    # "Antes": coleção como o create_app criava (só vetores, sem índices)
+    client.create_collection(name, vectors_config=models.VectorParams(size=args.dim, distance=models.Distance.COSINE))
+    try:
+        for start in range(0, args.points, 1000):
+            client.upsert(name, points=[
+                models.PointStruct(
+                    id=str(uuid.uuid4()),
+                    vector=[rng.uniform(-1, 1) for _ in range(args.dim)],
+                    payload={"user_id": (start + i) % args.users, "doc_name": f"doc_{(start + i) % args.users}_{i % 3}.pdf", "text": "x"}
+                )
+                for i in range(min(1000, args.points - start))
+            ], wait=True)
+
+        before = measure(client, name, args.dim, args.users, args.queries, rng)
+        actions = bootstrap_collection(client, config)
+        after = measure(client, name, args.dim, args.users, args.queries, rng)
+
+        print(f"modo: {'servidor ' + args.url if args.url else 'local em memória (ignora índices)'}")
+        print(f"pontos: {args.points}  usuários: {args.users}  bootstrap: {', '.join(actions)}")
+        print(f"{'':>8} {'p50 ms':>8} {'p95 ms':>8} {'média ms':>9}")
+        for label, values in (("antes", before), ("depois", after)):
+            print(f"{label:>8} {percentile(values, 0.5):>8.2f} {percentile(values, 0.95):>8.2f} {statistics.mean(values):>9.2f}")
+    finally:
+        client.delete_collection(name)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# /benchmarks/bench_serialization.py
+"""
+Microbenchmark da serialização de listas de tarefas: o caminho antigo
+(objetos do ORM + tasks_schema.dump + JSON padrão do Flask) contra o novo
+(consulta só com colunas + task_serializer + OrjsonProvider), em linhas/s,
+separando consulta, dump e JSON. Confere também que os bytes são iguais.
+
+Usa SQLite em memória.
+
+Uso:
+    python -m benchmarks.bench_serialization
+    python -m benchmarks.bench_serialization --sizes 10 1000 100000 --repeat 5
+"""
+
+import argparse
+import datetime
+import os
+import time
+
+
+def best_of(repeat, fn):
+    """Menor tempo (s) de 'repeat' execuções e o resultado da última."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 100000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    os.environ.setdefault("SECRET_KEY", "bench")
+    from flask import Flask
+    from flask.json.provider import DefaultJSONProvider
+    from sqlalchemy import select
+    from app.core.json_provider import OrjsonProvider
+    from app.extensions import db
+    from app.models import Task, User
+    from app.schemas.task_schema import tasks_schema, task_serializer
+
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite://"
+    db.init_app(app)
+    default_json = DefaultJSONProvider(app)
+    fast_json = OrjsonProvider(app)
+
+    print(f"{'linhas':>7} {'caminho':>8} {'consulta':>10} {'dump':>10} {'json':>10} {'total':>10} {'linhas/s':>11}")
+    with app.app_context():
+        db.create_all()
+        db.session.add(User(id=1, username="bench"))
+        db.session.commit()
+        created = 0
+        start_time = datetime.datetime(2026, 1, 1)
+        for size in sorted(args.sizes):
+            db.session.execute(Task.__table__.insert(), [
+                {"content": f"Revisar o capítulo {i} de biologia", "is_completed": i % 3 == 0,
+                 "created_at": start_time + datetime.timedelta(seconds=i), "user_id": 1}
+                for i in range(created, size)
+            ])
+            db.session.commit()
+            created = max(created, size)
+
+            def orm_query():
+                db.session.expunge_all()
+                return Task.query.filter_by(user_id=1).order_by(Task.created_at.desc()).limit(size).all()
+
+            def column_query():
+                return db.session.execute(
+                    select(*task_serializer.columns).where(Task.user_id == 1).order_by(Task.created_at.desc()).limit(size)
+                ).all()
+
+            results = {}
+            for label, query, dump, provider in (
+                ("antigo", orm_query, tasks_schema.dump, default_json),
+                ("novo", column_query, task_serializer.dump_rows, fast_json),
+            ):
+                query_s, rows = best_of(args.repeat, query)
+                dump_s, data = best_of(args.repeat, lambda: dump(rows))
+                json_s, response = best_of(args.repeat, lambda: provider.response(data))
+                total = query_s + dump_s + json_s
+                results[label] = response.get_data()
+                print(f"{size:>7} {label:>8} {query_s * 1000:>8.2f}ms {dump_s * 1000:>8.2f}ms {json_s * 1000:>8.2f}ms "
+                      f"{total * 1000:>8.2f}ms {size / total:>11,.0f}")
+            print(f"{'':>7} bytes iguais: {results['antigo'] == results['novo']}")
+
+
+if __name__ == "__main__":
+    main()
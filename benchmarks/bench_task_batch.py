@@ -0,0 +1,118 @@
+# /benchmarks/bench_task_batch.py
+"""
+Benchmark do POST /tasks/batch contra N chamadas individuais
+(POST /tasks/, PUT /tasks/<id>, DELETE /tasks/<id>): criar N tarefas,
+marcar todas como concluídas e apagar todas.
+
+Usa o app de verdade (create_app + test client) com SQLite em arquivo,
+para o custo de cada commit aparecer. Não há rede entre cliente e
+servidor, então em produção a diferença é maior (um round trip por chamada).
+
+Uso:
+    python -m benchmarks.bench_task_batch
+    python -m benchmarks.bench_task_batch --sizes 10 100 500
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+
+def make_app(db_path):
+    os.environ.setdefault("SECRET_KEY", "bench")
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    os.environ["QDRANT_HOST"] = ":memory:"
+    os.environ["QDRANT_BOOTSTRAP"] = "off"
+    from app import create_app
+    from app.extensions import db
+
+    app = create_app()
+    # O /auth/guest emite o 'sub' do token como inteiro, que o PyJWT recente recusa na verificação
+    app.config["JWT_VERIFY_SUB"] = False
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def count_statements(app):
+    """Conta os comandos SQL executados (para mostrar quantos cada abordagem gera)."""
+    from sqlalchemy import event
+    from app.extensions import db
+
+    counter = {"n": 0}
+    with app.app_context():
+        event.listen(db.engine, "before_cursor_execute", lambda *args: counter.__setitem__("n", counter["n"] + 1))
+    return counter
+
+
+def timed(counter, fn):
+    before = counter["n"]
+    start = time.perf_counter()
+    fn()
+    return (time.perf_counter() - start) * 1000, counter["n"] - before
+
+
+def run_single(client, headers, size):
+    ids = []
+
+    def create():
+        for i in range(size):
+            response = client.post("/tasks/", json={"content": f"tarefa {i}"}, headers=headers)
+            ids.append(response.get_json()["id"])
+
+    def complete():
+        for task_id in ids:
+            client.put(f"/tasks/{task_id}", json={"is_completed": True}, headers=headers)
+
+    def remove():
+        for task_id in ids:
+            client.delete(f"/tasks/{task_id}", headers=headers)
+
+    return create, complete, remove
+
+
+def run_batch(client, headers, size):
+    ids = []
+
+    def batch(operations):
+        return client.post("/tasks/batch", json={"operations": operations}, headers=headers).get_json()["results"]
+
+    def create():
+        results = batch([{"op": "create", "content": f"tarefa {i}"} for i in range(size)])
+        ids.extend(result["task"]["id"] for result in results)
+
+    def complete():
+        batch([{"op": "update", "id": task_id, "is_completed": True} for task_id in ids])
+
+    def remove():
+        batch([{"op": "delete", "id": task_id} for task_id in ids])
+
+    return create, complete, remove
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 500])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = make_app(os.path.join(tmp, "bench.db"))
+        counter = count_statements(app)
+        client = app.test_client()
+        token = client.post("/auth/guest").get_json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+
+        print(f"{'N':>5} {'etapa':>10} {'individual ms':>14} {'SQL':>6} {'lote ms':>9} {'SQL':>5} {'ganho':>7}")
+        for size in args.sizes:
+            single = run_single(client, headers, size)
+            batch = run_batch(client, headers, size)
+            for label, single_step, batch_step in zip(("criar", "concluir", "apagar"), single, batch):
+                single_ms, single_sql = timed(counter, single_step)
+                batch_ms, batch_sql = timed(counter, batch_step)
+                print(f"{size:>5} {label:>10} {single_ms:>14.1f} {single_sql:>6} {batch_ms:>9.1f} {batch_sql:>5} "
+                      f"{single_ms / batch_ms:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
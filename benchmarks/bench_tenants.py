@@ -0,0 +1,103 @@
+# /benchmarks/bench_tenants.py
+"""
+Benchmark de escala: latência da busca de um usuário em função do número
+de tenants na coleção, no modo compartilhado (filtro por user_id sobre o
+grafo global) e no modo multi-tenant (QDRANT_MULTITENANT: índice de tenant
++ HNSW por tenant).
+
+Cada tenant tem o mesmo número de pontos, então o ideal é a latência do
+modo multi-tenant ficar plana enquanto o número de tenants cresce.
+Como no bench_qdrant_indexes, o modo local em memória faz busca exata e
+ignora índices; use '--url' com um servidor Qdrant para medir de verdade.
+
+Uso:
+    python -m benchmarks.bench_tenants
+    python -m benchmarks.bench_tenants --url http://localhost:6333 --tenants 10 100 1000 --points-per-tenant 500
+"""
+
+import argparse
+import random
+import time
+import uuid
+
+from benchmarks.bench_qdrant_indexes import percentile
+
+
+def build_collection(client, name, tenants, points_per_tenant, dim, multitenant, rng):
+    """Cria a coleção pelo bootstrap do app e insere os pontos de todos os tenants."""
+    from qdrant_client import models
+    from app.core.qdrant_bootstrap import bootstrap_collection
+    from app.services.rag_service import tenant_key
+
+    bootstrap_collection(client, {
+        "QDRANT_COLLECTION_NAME": name,
+        "EMBEDDING_DIM": dim,
+        "QDRANT_QUANTIZATION": "none",
+        "QDRANT_VECTORS_ON_DISK": False,
+        "QDRANT_PAYLOAD_ON_DISK": False,
+        "QDRANT_MULTITENANT": multitenant,
+    })
+    batch = []
+    for user_id in range(tenants):
+        for _ in range(points_per_tenant):
+            batch.append(models.PointStruct(
+                id=str(uuid.uuid4()),
+                vector=[rng.uniform(-1, 1) for _ in range(dim)],
+                payload={"user_id": user_id, "tenant": tenant_key(user_id), "doc_name": "doc.pdf", "text": "x"}
+            ))
+            if len(batch) == 1000:
+                client.upsert(name, points=batch, wait=True)
+                batch = []
+    if batch:
+        client.upsert(name, points=batch, wait=True)
+
+
+def measure(client, name, tenants, dim, queries, multitenant, rng):
+    """Latências (ms) de buscas filtradas pelo usuário, como no rag_service."""
+    from qdrant_client import models
+
+    key = "tenant" if multitenant else "user_id"
+    latencies = []
+    for _ in range(queries):
+        user_id = rng.randrange(tenants)
+        value = str(user_id) if multitenant else user_id
+        vector = [rng.uniform(-1, 1) for _ in range(dim)]
+        start = time.perf_counter()
+        client.query_points(
+            collection_name=name, query=vector, limit=3,
+            query_filter=models.Filter(must=[models.FieldCondition(key=key, match=models.MatchValue(value=value))])
+        )
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", default=None, help="URL de um servidor Qdrant (padrão: modo local em memória)")
+    parser.add_argument("--tenants", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--points-per-tenant", type=int, default=50)
+    parser.add_argument("--dim", type=int, default=128)
+    parser.add_argument("--queries", type=int, default=100)
+    args = parser.parse_args()
+
+    from qdrant_client import QdrantClient
+
+    client = QdrantClient(url=args.url) if args.url else QdrantClient(":memory:")
+    print(f"modo: {'servidor ' + args.url if args.url else 'local em memória (ignora índices)'}  "
+          f"pontos por tenant: {args.points_per_tenant}")
+    print(f"{'tenants':>8} {'modo':>12} {'p50 ms':>8} {'p95 ms':>8}")
+    for tenants in args.tenants:
+        for multitenant in (False, True):
+            rng = random.Random(tenants)
+            name = f"bench_{uuid.uuid4().hex[:8]}"
+            try:
+                build_collection(client, name, tenants, args.points_per_tenant, args.dim, multitenant, rng)
+                values = measure(client, name, tenants, args.dim, args.queries, multitenant, rng)
+            finally:
+                client.delete_collection(name)
+            label = "multi-tenant" if multitenant else "compartilhado"
+            print(f"{tenants:>8} {label:>12} {percentile(values, 0.5):>8.2f} {percentile(values, 0.95):>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# /benchmarks/synthetic_pdf.py
+"""
+Gera PDFs sintéticos (com texto extraível) para os benchmarks.
+Não depende de nenhuma biblioteca externa: o PDF é montado "na mão".
+"""
+
+import random
+
+# Vocabulário simples para gerar um texto parecido com material de estudo
+WORDS = (
+    "célula mitocôndria energia membrana proteína núcleo função processo "
+    "equação derivada integral limite vetor matriz força massa aceleração "
+    "história revolução império economia sociedade cultura política estado "
+    "átomo molécula reação ligação elétron próton carbono oxigênio solução"
+).split()
+
+
+def _page_text(rng, lines_per_page: int, words_per_line: int):
+    """Gera as linhas de texto de uma página."""
+    return [
+        " ".join(rng.choice(WORDS) for _ in range(words_per_line))
+        for _ in range(lines_per_page)
+    ]
+
+
+def _escape(text: str):
+    """Escapa os caracteres especiais de strings literais do PDF."""
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def build_pdf(num_pages: int, lines_per_page: int = 45, words_per_line: int = 12, seed: int = 42):
+    """
+    Monta um PDF com 'num_pages' páginas de texto e retorna os bytes.
+    Cada página tem aproximadamente 'lines_per_page * words_per_line' palavras.
+    """
+    rng = random.Random(seed)
+    objects = []
+
+    # 1: Catálogo, 2: Árvore de páginas, 3: Fonte (as páginas vêm depois)
+    page_ids = [4 + 2 * i for i in range(num_pages)]
+    objects.append(b"<< /Type /Catalog /Pages 2 0 R >>")
+    kids = " ".join(f"{pid} 0 R" for pid in page_ids)
+    objects.append(f"<< /Type /Pages /Kids [{kids}] /Count {num_pages} >>".encode())
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+
+    for pid in page_ids:
+        lines = _page_text(rng, lines_per_page, words_per_line)
+        ops = ["BT", "/F1 10 Tf", "14 TL", "40 800 Td"]
+        for line in lines:
+            ops.append(f"({_escape(line)}) Tj T*")
+        ops.append("ET")
+        stream = "\n".join(ops).encode("cp1252")
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {pid + 1} 0 R >>".encode()
+        )
+        objects.append(b"<< /Length " + str(len(stream)).encode() + b" >>\nstream\n" + stream + b"\nendstream")
+
+    # Monta o arquivo com a tabela de referências cruzadas (xref)
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n".encode() + body + b"\nendobj\n"
+    xref_offset = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    for offset in offsets:
+        out += f"{offset:010d} 00000 n \n".encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n".encode()
+    return bytes(out)
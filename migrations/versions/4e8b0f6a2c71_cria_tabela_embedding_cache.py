@@ -0,0 +1,38 @@
+"""Cria tabela embedding_cache (cache persistente de embeddings)
+
+Revision ID: 4e8b0f6a2c71
+Revises: 9c2e4a7b1d30
+Create Date: 2026-10-17 11:03:15.552094
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4e8b0f6a2c71'
+down_revision = '9c2e4a7b1d30'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('embedding_cache',
+    sa.Column('key', sa.String(length=64), nullable=False),
+    sa.Column('model', sa.String(length=100), nullable=False),
+    sa.Column('task_type', sa.String(length=50), nullable=False),
+    sa.Column('dimension', sa.Integer(), nullable=False),
+    sa.Column('embedding', sa.LargeBinary(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('last_used_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('key')
+    )
+    with op.batch_alter_table('embedding_cache', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_embedding_cache_last_used_at'), ['last_used_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('embedding_cache', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_embedding_cache_last_used_at'))
+
+    op.drop_table('embedding_cache')
@@ -0,0 +1,40 @@
+"""Cria tabela chat_summaries e índice (user_id, session_id, id) em chat_histories
+
+Revision ID: 5a1f7c3e9b82
+Revises: e3a9c6d2f418
+Create Date: 2026-10-17 14:02:41.508213
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5a1f7c3e9b82'
+down_revision = 'e3a9c6d2f418'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('chat_summaries',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('session_id', sa.String(length=100), nullable=False),
+    sa.Column('summary', sa.Text(), nullable=False),
+    sa.Column('last_message_id', sa.Integer(), nullable=False),
+    sa.Column('message_count', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'session_id', name='uq_chat_summaries_user_id_session_id')
+    )
+    with op.batch_alter_table('chat_histories', schema=None) as batch_op:
+        batch_op.create_index('ix_chat_histories_user_id_session_id_id', ['user_id', 'session_id', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('chat_histories', schema=None) as batch_op:
+        batch_op.drop_index('ix_chat_histories_user_id_session_id_id')
+
+    op.drop_table('chat_summaries')
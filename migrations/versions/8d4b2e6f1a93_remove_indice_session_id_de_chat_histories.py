@@ -0,0 +1,26 @@
+"""Remove índice só em session_id de chat_histories (coberto por (user_id, session_id, id))
+
+Revision ID: 8d4b2e6f1a93
+Revises: 5a1f7c3e9b82
+Create Date: 2026-10-17 16:21:09.734512
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d4b2e6f1a93'
+down_revision = '5a1f7c3e9b82'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('chat_histories', schema=None) as batch_op:
+        batch_op.drop_index('ix_chat_histories_session_id')
+
+
+def downgrade():
+    with op.batch_alter_table('chat_histories', schema=None) as batch_op:
+        batch_op.create_index('ix_chat_histories_session_id', ['session_id'], unique=False)
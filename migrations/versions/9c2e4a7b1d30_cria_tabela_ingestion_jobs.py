@@ -0,0 +1,48 @@
+"""Cria tabela ingestion_jobs (fila de ingestão de documentos)
+
+Revision ID: 9c2e4a7b1d30
+Revises: 315d89ec3e2d
+Create Date: 2026-10-17 10:12:41.208311
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9c2e4a7b1d30'
+down_revision = '315d89ec3e2d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('ingestion_jobs',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('doc_name', sa.String(length=255), nullable=False),
+    sa.Column('file_path', sa.String(length=512), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('pages_parsed', sa.Integer(), nullable=False),
+    sa.Column('chunks_embedded', sa.Integer(), nullable=False),
+    sa.Column('chunks_stored', sa.Integer(), nullable=False),
+    sa.Column('result', sa.Text(), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('ingestion_jobs', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_ingestion_jobs_status'), ['status'], unique=False)
+        batch_op.create_index(batch_op.f('ix_ingestion_jobs_user_id'), ['user_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('ingestion_jobs', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_ingestion_jobs_user_id'))
+        batch_op.drop_index(batch_op.f('ix_ingestion_jobs_status'))
+
+    op.drop_table('ingestion_jobs')
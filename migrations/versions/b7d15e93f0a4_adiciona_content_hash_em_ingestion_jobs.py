@@ -0,0 +1,28 @@
+"""Adiciona content_hash em ingestion_jobs
+
+Revision ID: b7d15e93f0a4
+Revises: 4e8b0f6a2c71
+Create Date: 2026-10-17 11:41:52.903417
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7d15e93f0a4'
+down_revision = '4e8b0f6a2c71'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('ingestion_jobs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('content_hash', sa.String(length=64), nullable=True))
+        batch_op.create_index(batch_op.f('ix_ingestion_jobs_content_hash'), ['content_hash'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('ingestion_jobs', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_ingestion_jobs_content_hash'))
+        batch_op.drop_column('content_hash')
@@ -0,0 +1,44 @@
+"""Cria tabela documents (registro de documentos enviados)
+
+Revision ID: e3a9c6d2f418
+Revises: b7d15e93f0a4
+Create Date: 2026-10-17 12:26:07.118540
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e3a9c6d2f418'
+down_revision = 'b7d15e93f0a4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('documents',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=255), nullable=False),
+    sa.Column('content_hash', sa.String(length=64), nullable=True),
+    sa.Column('chunk_count', sa.Integer(), nullable=False),
+    sa.Column('byte_size', sa.BigInteger(), nullable=True),
+    sa.Column('page_count', sa.Integer(), nullable=True),
+    sa.Column('uploaded_at', sa.DateTime(), nullable=True),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'name', name='uq_documents_user_id_name')
+    )
+    with op.batch_alter_table('documents', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_documents_content_hash'), ['content_hash'], unique=False)
+
+    # Os documentos já existentes no Qdrant entram no registro com:
+    #   flask --app run backfill-documents
+
+
+def downgrade():
+    with op.batch_alter_table('documents', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_documents_content_hash'))
+
+    op.drop_table('documents')
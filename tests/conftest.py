@@ -0,0 +1,56 @@
+# /tests/conftest.py
+"""
+Fixtures dos testes: o app de verdade (create_app) com SQLite em arquivo
+temporário, Qdrant em memória e os provedores fake de chat e embeddings,
+sem rede.
+"""
+
+import os
+
+# A configuração é lida no import de app.core.config: precisa vir antes
+os.environ.setdefault("SECRET_KEY", "testes-" + "x" * 32)
+os.environ.setdefault("QDRANT_HOST", ":memory:")
+os.environ["QDRANT_BOOTSTRAP"] = "off"
+os.environ["CHAT_PROVIDER"] = "fake"
+os.environ["EMBEDDING_PROVIDER"] = "fake"
+os.environ["INGESTION_WORKERS"] = "0"
+
+import pytest
+
+from app import create_app
+from app.core.config import Config
+from app.extensions import db
+
+
+@pytest.fixture
+def app(tmp_path):
+    class TestConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'test.db'}"
+        INGESTION_UPLOAD_DIR = str(tmp_path / "uploads")
+        TESTING = True
+
+    app = create_app(TestConfig)
+    # O /auth/guest emite o 'sub' do token como inteiro, que o PyJWT recente recusa na verificação
+    app.config["JWT_VERIFY_SUB"] = False
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def guest_headers(client):
+    """Headers de autorização de um usuário convidado novo."""
+    token = client.post("/auth/guest").get_json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def auth_headers(client):
+    return guest_headers(client)
@@ -0,0 +1,66 @@
+# /tests/test_chat_history.py
+
+from app.extensions import db
+from app.models.chat_history_model import ChatHistory
+from tests.conftest import guest_headers
+
+
+def add_messages(app, user_id, session_id, count):
+    with app.app_context():
+        messages = [ChatHistory(session_id=session_id, role="user", message=f"m{i}", user_id=user_id) for i in range(count)]
+        db.session.add_all(messages)
+        db.session.commit()
+        return [message.id for message in messages]
+
+
+def user_id(client, headers):
+    return client.get("/auth/me", headers=headers).get_json()["id"]
+
+
+def test_default_page_is_latest_messages_oldest_first(app, client, auth_headers):
+    ids = add_messages(app, user_id(client, auth_headers), "s", 5)
+    response = client.get("/chat/s?limit=3", headers=auth_headers)
+    assert [message["id"] for message in response.get_json()] == ids[2:]
+    assert response.headers["X-Next-Cursor"] == str(ids[2])
+
+
+def test_scrolling_back_with_before_covers_everything(app, client, auth_headers):
+    ids = add_messages(app, user_id(client, auth_headers), "s", 7)
+    seen = []
+    url = "/chat/s?limit=3"
+    while url:
+        response = client.get(url, headers=auth_headers)
+        seen = [message["id"] for message in response.get_json()] + seen
+        cursor = response.headers.get("X-Next-Cursor")
+        url = f"/chat/s?limit=3&before={cursor}" if cursor else None
+    assert seen == ids
+
+
+def test_after_fetches_newer_messages(app, client, auth_headers):
+    ids = add_messages(app, user_id(client, auth_headers), "s", 6)
+    response = client.get(f"/chat/s?limit=2&after={ids[1]}", headers=auth_headers)
+    assert [message["id"] for message in response.get_json()] == ids[2:4]
+    assert response.headers["X-Next-Cursor"] == str(ids[3])
+    last = client.get(f"/chat/s?limit=2&after={ids[3]}", headers=auth_headers)
+    assert [message["id"] for message in last.get_json()] == ids[4:]
+    assert "X-Next-Cursor" not in last.headers
+
+
+def test_history_is_scoped_to_user_and_session(app, client, auth_headers):
+    add_messages(app, user_id(client, auth_headers), "s", 2)
+    add_messages(app, user_id(client, auth_headers), "outra", 1)
+    other = guest_headers(client)
+    assert client.get("/chat/s", headers=other).get_json() == []
+    assert len(client.get("/chat/s", headers=auth_headers).get_json()) == 2
+
+
+def test_before_and_after_together_is_rejected(client, auth_headers):
+    assert client.get("/chat/s?before=5&after=1", headers=auth_headers).status_code == 400
+
+
+def test_malformed_cursor_is_rejected(app, client, auth_headers):
+    add_messages(app, user_id(client, auth_headers), "s", 3)
+    for query in ("before=abc", "after=abc", "before=1.5", "after=1&before=x"):
+        response = client.get(f"/chat/s?{query}", headers=auth_headers)
+        assert response.status_code == 400
+        assert response.get_json()["error"] == "Cursor inválido"
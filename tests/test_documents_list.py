@@ -0,0 +1,52 @@
+# /tests/test_documents_list.py
+
+from app.extensions import db
+from app.models.document_model import Document
+from app.services import rag_service
+from tests.conftest import guest_headers
+
+NAMES = ["Aula 1 — revisão.pdf", "Ação.pdf", "Resumo 📚.pdf", "apostila.pdf", "Édipo.pdf"]
+
+
+def add_documents(app, user_id, names):
+    with app.app_context():
+        db.session.add_all([Document(name=name, chunk_count=1, user_id=user_id) for name in names])
+        db.session.commit()
+
+
+def user_id(client, headers):
+    return client.get("/auth/me", headers=headers).get_json()["id"]
+
+
+def test_paging_through_non_ascii_names(app, client, auth_headers):
+    add_documents(app, user_id(client, auth_headers), NAMES)
+    seen = []
+    url = "/documents/?limit=2"
+    while url:
+        response = client.get(url, headers=auth_headers)
+        assert response.status_code == 200
+        seen += [document["name"] for document in response.get_json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor:
+            # O gunicorn escreve os headers em Latin-1: o cursor precisa ser ASCII
+            assert cursor.isascii()
+        url = f"/documents/?limit=2&after={cursor}" if cursor else None
+    assert seen == sorted(NAMES)
+
+
+def test_cursor_round_trip():
+    document = Document(name="Aula 1 — revisão.pdf")
+    assert rag_service.decode_cursor(rag_service.encode_cursor(document)) == document.name
+
+
+def test_invalid_cursor_is_rejected(client, auth_headers):
+    for cursor in ("não-base64", "@@@", "_w"):
+        response = client.get(f"/documents/?after={cursor}", headers=auth_headers)
+        assert response.status_code == 400
+        assert response.get_json()["error"] == "Cursor inválido"
+
+
+def test_listing_is_scoped_to_user(app, client, auth_headers):
+    add_documents(app, user_id(client, auth_headers), NAMES[:2])
+    assert client.get("/documents/", headers=guest_headers(client)).get_json() == []
+    assert len(client.get("/documents/", headers=auth_headers).get_json()) == 2
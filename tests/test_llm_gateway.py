@@ -0,0 +1,121 @@
+# /tests/test_llm_gateway.py
+
+import time
+
+import pytest
+
+from app.services.embedding_client import google_exceptions
+from app.services.llm_gateway import (
+    CircuitBreaker, LLMError, LLMGateway, LLMTimeoutError, LLMUnavailableError, FakeChatModel,
+)
+
+
+def make_gateway(model, timeout=1.0, failures=1, reset=0.05, probe_timeout=None, hedge=False, hedge_delay=5.0):
+    return LLMGateway(
+        model_factory=lambda model_name, system_instruction=None: model,
+        timeout=timeout, hedge_enabled=hedge, hedge_delay=hedge_delay, hedge_percentile=0.95,
+        breaker=CircuitBreaker(failures, reset, probe_timeout=probe_timeout), max_concurrency=4,
+    )
+
+
+class ScriptedModel(FakeChatModel):
+    """FakeChatModel que levanta as exceções da fila 'errors', uma por chamada, antes de responder normalmente."""
+
+    def __init__(self, errors=(), **kwargs):
+        super().__init__(words=3, **kwargs)
+        self.errors = list(errors)
+
+    def generate_content(self, content, stream=False, request_options=None):
+        if self.errors:
+            with self._lock:
+                self.calls += 1
+            raise self.errors.pop(0)
+        return super().generate_content(content, stream=stream, request_options=request_options)
+
+
+def open_breaker(gateway):
+    with pytest.raises(LLMError):
+        gateway.generate("m", None, "oi")
+    assert gateway.breaker.state == CircuitBreaker.OPEN
+    time.sleep(gateway.breaker.reset_timeout)
+
+
+def test_chat_returns_text():
+    gateway = make_gateway(FakeChatModel(words=3))
+    assert gateway.chat("m", "sistema", [], "uma pergunta") == "uma pergunta uma"
+
+
+def test_transient_error_is_retried_once():
+    model = ScriptedModel([google_exceptions.ServiceUnavailable("503")])
+    gateway = make_gateway(model, failures=5)
+    assert gateway.generate("m", None, "a b c") == "a b c"
+    assert model.calls == 2
+    assert gateway.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_timeout_opens_breaker_and_rejects():
+    gateway = make_gateway(FakeChatModel(first_token_latency=0.3), timeout=0.05, reset=60)
+    with pytest.raises(LLMTimeoutError):
+        gateway.generate("m", None, "oi")
+    with pytest.raises(LLMUnavailableError):
+        gateway.generate("m", None, "oi")
+
+
+def test_probe_success_closes_breaker():
+    model = ScriptedModel([google_exceptions.ServiceUnavailable("503")] * 2)
+    gateway = make_gateway(model)
+    open_breaker(gateway)
+    assert gateway.generate("m", None, "oi") == "oi oi oi"
+    assert gateway.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_probe_with_request_error_does_not_leave_breaker_half_open():
+    model = ScriptedModel([google_exceptions.ServiceUnavailable("503")] * 2 + [ValueError("pedido inválido")])
+    gateway = make_gateway(model)
+    open_breaker(gateway)
+
+    # A chamada de teste termina com erro do pedido: o provedor respondeu
+    with pytest.raises(LLMError):
+        gateway.generate("m", None, "oi")
+    assert gateway.breaker.state == CircuitBreaker.CLOSED
+    assert gateway.generate("m", None, "oi") == "oi oi oi"
+
+
+def test_stream_probe_with_request_error_closes_breaker():
+    model = ScriptedModel([google_exceptions.ServiceUnavailable("503")] * 2 + [ValueError("pedido inválido")])
+    gateway = make_gateway(model)
+    open_breaker(gateway)
+
+    with pytest.raises(LLMError):
+        list(gateway.stream_chat("m", None, [], "oi"))
+    assert gateway.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_stream_probe_disconnect_releases_probe():
+    model = ScriptedModel([google_exceptions.ServiceUnavailable("503")] * 2, token_latency=0.0)
+    gateway = make_gateway(model, reset=60)
+    with pytest.raises(LLMError):
+        gateway.generate("m", None, "oi")
+    # Pula a espera do reset_timeout
+    gateway.breaker._opened_at -= 60
+
+    stream = gateway.stream_chat("m", None, [], "um dois três")
+    next(stream)
+    assert gateway.breaker.state == CircuitBreaker.HALF_OPEN
+    stream.close() # Cliente desconectou no meio
+
+    # A próxima chamada testa o provedor na hora, sem outro reset_timeout
+    assert gateway.breaker.state == CircuitBreaker.OPEN
+    assert gateway.generate("m", None, "oi") == "oi oi oi"
+    assert gateway.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_lost_probe_expires():
+    breaker = CircuitBreaker(1, 0.01, probe_timeout=0.05)
+    breaker.record_failure()
+    time.sleep(0.02)
+    assert breaker.allow() # Chamada de teste que nunca é resolvida
+    assert not breaker.allow()
+    time.sleep(0.06)
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
@@ -0,0 +1,147 @@
+# /tests/test_serialization.py
+
+import dataclasses
+import datetime
+import decimal
+import uuid
+
+import pytest
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+from marshmallow import Schema, fields, post_dump
+from sqlalchemy import select
+
+from app.core.json_provider import OrjsonProvider
+from app.extensions import db
+from app.models import Task, User
+from app.models.chat_history_model import ChatHistory
+from app.schemas.chat_history_schema import chat_history_schema, chat_history_serializer
+from app.schemas.fast_serializer import FastSerializer
+from app.schemas.task_schema import task_schema, tasks_schema, task_serializer
+from app.schemas.user_schema import user_schema, user_serializer
+
+TEXTS = ["Revisar mitocôndria", "emoji 🧬 e   separador", 'aspas "duplas" e \\ barra', "controle \x00\x1f\x7f", ""]
+
+
+@pytest.fixture
+def rows(app):
+    with app.app_context():
+        user = User(username="ana", email=None)
+        db.session.add(user)
+        db.session.flush()
+        for i, text in enumerate(TEXTS):
+            db.session.add(Task(content=text, is_completed=i % 2 == 0, user_id=user.id,
+                                created_at=datetime.datetime(2026, 1, 1, 12, 0, i, 123456 * i % 1000000)))
+            db.session.add(ChatHistory(session_id="s", role="user", message=text, user_id=user.id))
+        db.session.commit()
+        yield user
+
+
+def test_fast_serializer_matches_schema_dump(app, rows):
+    with app.app_context():
+        tasks = Task.query.order_by(Task.id).all()
+        assert task_serializer.dump(tasks, many=True) == tasks_schema.dump(tasks)
+        assert task_serializer.dump(tasks[0]) == task_schema.dump(tasks[0])
+
+        messages = ChatHistory.query.all()
+        assert chat_history_serializer.dump(messages, many=True) == chat_history_schema.dump(messages, many=True)
+
+        user = db.session.get(User, rows.id)
+        assert user_serializer.dump(user) == user_schema.dump(user)
+
+
+def test_dump_rows_matches_schema_dump(app, rows):
+    with app.app_context():
+        query_rows = db.session.execute(select(*task_serializer.columns).order_by(Task.id)).all()
+        assert task_serializer.dump_rows(query_rows) == tasks_schema.dump(Task.query.order_by(Task.id).all())
+
+
+def test_none_values_match(app, rows):
+    with app.app_context():
+        task = Task(content="sem data", user_id=rows.id)
+        assert task.created_at is None and task.id is None
+        assert task_serializer.dump(task) == task_schema.dump(task)
+
+
+def test_unknown_fields_and_hooks_fall_back_to_marshmallow():
+    class Item:
+        price = decimal.Decimal("1.50")
+        name = 7
+        ratio = 0.25
+
+    class PriceSchema(Schema):
+        price = fields.Decimal(as_string=True)
+        name = fields.String()
+        ratio = fields.Float()
+        label = fields.Method("get_label")
+
+        def get_label(self, obj):
+            return f"item {obj.name}"
+
+    class HookSchema(Schema):
+        name = fields.String()
+
+        @post_dump
+        def upper(self, data, **kwargs):
+            return {key: value.upper() for key, value in data.items()}
+
+    assert FastSerializer(PriceSchema()).dump(Item()) == PriceSchema().dump(Item())
+    hook_item = type("HookItem", (), {"name": "abc"})()
+    assert FastSerializer(HookSchema()).dump(hook_item) == {"name": "ABC"}
+
+
+@dataclasses.dataclass
+class Point:
+    x: int
+    label: str
+
+
+PAYLOADS = [
+    {"b": 1, "a": [1, 2.5, None, True], "ç": "ção"},
+    [{"content": text, "id": i} for i, text in enumerate(TEXTS)],
+    {"when": datetime.datetime(2026, 5, 1, 8, 30), "day": datetime.date(2026, 5, 1)},
+    {"id": uuid.UUID(int=7), "price": decimal.Decimal("10.10"), "point": Point(1, "á")},
+    {2: "dois", 10: "dez", 1: "um"},
+    {"big": 2 ** 70, "neg": -(2 ** 63)},
+    "texto solto com acento é",
+    [],
+]
+
+
+@pytest.fixture
+def providers():
+    flask_app = Flask(__name__)
+    return flask_app, DefaultJSONProvider(flask_app), OrjsonProvider(flask_app)
+
+
+@pytest.mark.parametrize("payload", PAYLOADS)
+def test_orjson_provider_bytes_match_default(providers, payload):
+    flask_app, default, fast = providers
+    with flask_app.app_context():
+        assert fast.response(payload).get_data() == default.response(payload).get_data()
+        assert fast.dumps(payload, separators=(",", ":")) == default.dumps(payload, separators=(",", ":"))
+        assert fast.dumps(payload) == default.dumps(payload)
+
+
+def test_orjson_provider_without_ensure_ascii(providers):
+    flask_app, default, fast = providers
+    default.ensure_ascii = fast.ensure_ascii = False
+    with flask_app.app_context():
+        for payload in PAYLOADS[:2]:
+            assert fast.response(payload).get_data() == default.response(payload).get_data()
+
+
+def test_orjson_provider_debug_is_pretty_like_default(providers):
+    flask_app, default, fast = providers
+    flask_app.debug = True
+    with flask_app.app_context():
+        assert fast.response(PAYLOADS[0]).get_data() == default.response(PAYLOADS[0]).get_data()
+
+
+def test_orjson_provider_loads(providers):
+    _, default, fast = providers
+    text = '{"a": [1, 2.5, null], "b": "ção \\ud83e\\uddec"}'
+    assert fast.loads(text) == default.loads(text)
+    assert fast.loads("NaN") != fast.loads("NaN") # Cai no json padrão, que aceita NaN
+    with pytest.raises(ValueError):
+        fast.loads("{quebrado")
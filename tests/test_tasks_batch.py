@@ -0,0 +1,83 @@
+# /tests/test_tasks_batch.py
+
+from sqlalchemy import event
+
+from app.extensions import db
+from tests.conftest import guest_headers
+
+
+def batch(client, headers, operations):
+    response = client.post("/tasks/batch", json={"operations": operations}, headers=headers)
+    assert response.status_code == 200
+    return response.get_json()["results"]
+
+
+def test_create_update_delete_in_one_batch(client, auth_headers):
+    created = batch(client, auth_headers, [{"op": "create", "content": f"t{i}"} for i in range(3)])
+    assert [result["status"] for result in created] == [201, 201, 201]
+    ids = [result["task"]["id"] for result in created]
+    assert [result["task"]["content"] for result in created] == ["t0", "t1", "t2"]
+
+    results = batch(client, auth_headers, [
+        {"op": "update", "id": ids[0], "is_completed": True},
+        {"op": "update", "id": ids[1], "is_completed": True},
+        {"op": "delete", "id": ids[2]},
+        {"op": "create", "content": "nova"},
+    ])
+    assert [result["status"] for result in results] == [200, 200, 204, 201]
+    assert [result["index"] for result in results] == [0, 1, 2, 3]
+    assert results[0]["task"]["is_completed"] is True
+
+    listed = {task["id"]: task for task in client.get("/tasks/", headers=auth_headers).get_json()}
+    assert ids[2] not in listed
+    assert listed[ids[0]]["is_completed"] and listed[ids[1]]["is_completed"]
+    assert len(listed) == 3
+
+
+def test_per_operation_errors_do_not_block_the_rest(client, auth_headers):
+    task_id = batch(client, auth_headers, [{"op": "create", "content": "minha"}])[0]["task"]["id"]
+    foreign_id = batch(client, guest_headers(client), [{"op": "create", "content": "de outro"}])[0]["task"]["id"]
+
+    results = batch(client, auth_headers, [
+        {"op": "explode"},
+        {"op": "update", "id": task_id},
+        {"op": "update", "id": "1", "content": "x"},
+        {"op": "update", "id": foreign_id, "content": "x"},
+        {"op": "delete", "id": 999999},
+        {"op": "update", "id": task_id, "content": "editada"},
+        {"op": "delete", "id": task_id},
+        {"op": "create", "content": 123},
+    ])
+    assert [result["status"] for result in results] == [422, 422, 422, 404, 404, 200, 409, 422]
+    assert results[5]["task"]["content"] == "editada"
+
+    # A tarefa do outro usuário não mudou
+    other = client.get(f"/tasks/{foreign_id}", headers=auth_headers)
+    assert other.status_code == 404
+
+
+def test_batch_runs_constant_number_of_statements(app, client, auth_headers):
+    created = batch(client, auth_headers, [{"op": "create", "content": f"t{i}"} for i in range(50)])
+    ids = [result["task"]["id"] for result in created]
+
+    statements = []
+    with app.app_context():
+        engine = db.engine
+    listener = lambda *args: statements.append(args[2])
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        batch(client, auth_headers, [{"op": "update", "id": task_id, "is_completed": True} for task_id in ids])
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+    updates = [sql for sql in statements if sql.startswith("UPDATE tasks")]
+    assert len(updates) == 1
+    assert len(statements) < 10
+
+
+def test_request_validation(client, auth_headers):
+    assert client.post("/tasks/batch", json={"operations": []}, headers=auth_headers).status_code == 400
+    assert client.post("/tasks/batch", json={"operations": {}}, headers=auth_headers).status_code == 400
+    too_many = [{"op": "create", "content": "x"}] * 501
+    assert client.post("/tasks/batch", json={"operations": too_many}, headers=auth_headers).status_code == 400
+    assert client.post("/tasks/batch", json={"operations": [{"op": "create", "content": "x"}]}).status_code == 401
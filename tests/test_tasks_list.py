@@ -0,0 +1,80 @@
+# /tests/test_tasks_list.py
+
+from tests.conftest import guest_headers
+
+
+def create_tasks(client, headers, count):
+    operations = [{"op": "create", "content": f"tarefa {i}"} for i in range(count)]
+    results = client.post("/tasks/batch", json={"operations": operations}, headers=headers).get_json()["results"]
+    return [result["task"]["id"] for result in results]
+
+
+def test_cursor_pagination_walks_all_tasks_newest_first(client, auth_headers):
+    ids = create_tasks(client, auth_headers, 7)
+
+    seen = []
+    url = "/tasks/?limit=3"
+    pages = 0
+    while url:
+        response = client.get(url, headers=auth_headers)
+        assert response.status_code == 200
+        page = response.get_json()
+        assert len(page) <= 3
+        seen.extend(task["id"] for task in page)
+        cursor = response.headers.get("X-Next-Cursor")
+        url = f"/tasks/?limit=3&after={cursor}" if cursor else None
+        pages += 1
+
+    assert pages == 3
+    assert seen == sorted(ids, reverse=True)
+
+
+def test_list_is_scoped_to_user(client, auth_headers):
+    create_tasks(client, auth_headers, 2)
+    other = guest_headers(client)
+    assert client.get("/tasks/", headers=other).get_json() == []
+
+
+def test_invalid_cursor_and_limit(client, auth_headers):
+    assert client.get("/tasks/?after=nao-e-cursor", headers=auth_headers).status_code == 400
+    assert client.get("/tasks/?limit=0", headers=auth_headers).status_code == 400
+
+
+def test_unchanged_list_answers_304(client, auth_headers):
+    create_tasks(client, auth_headers, 2)
+    first = client.get("/tasks/", headers=auth_headers)
+    etag = first.headers["ETag"]
+    assert first.headers["Cache-Control"] == "private, no-cache"
+
+    cached = client.get("/tasks/", headers={**auth_headers, "If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.get_data() == b""
+    assert cached.headers["ETag"] == etag
+
+
+def test_etag_changes_on_every_kind_of_write(client, auth_headers):
+    task_id = create_tasks(client, auth_headers, 1)[0]
+
+    def etag():
+        return client.get("/tasks/", headers=auth_headers).headers["ETag"]
+
+    seen = {etag()}
+    client.post("/tasks/", json={"content": "nova"}, headers=auth_headers)
+    seen.add(etag())
+    client.put(f"/tasks/{task_id}", json={"is_completed": True}, headers=auth_headers)
+    seen.add(etag())
+    client.post("/tasks/batch", json={"operations": [{"op": "update", "id": task_id, "content": "x"}]}, headers=auth_headers)
+    seen.add(etag())
+    client.delete(f"/tasks/{task_id}", headers=auth_headers)
+    seen.add(etag())
+    assert len(seen) == 5
+
+    # O ETag antigo não vale mais
+    stale = client.get("/tasks/", headers={**auth_headers, "If-None-Match": next(iter(seen - {etag()}))})
+    assert stale.status_code == 200
+
+
+def test_etag_depends_on_page(client, auth_headers):
+    create_tasks(client, auth_headers, 3)
+    assert client.get("/tasks/?limit=1", headers=auth_headers).headers["ETag"] != \
+        client.get("/tasks/?limit=2", headers=auth_headers).headers["ETag"]